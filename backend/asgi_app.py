@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI服务入口
+在asyncio事件循环中提供Mock接口（/dynamic/<path> 和直接路径）、/interfaces、/files 及文件上传，
+数据库、路由表、Mock生成和文件解析与 simple_app 共用；一个进程即可维持大量keep-alive长连接
+没有在这里实现的路由（首页和前端静态文件、接口参数、Mock配置、删除文件等）转交给Flask应用处理，
+与 --server threading 的行为一致
+
+启动: python simple_app.py --server asgi（需安装uvicorn、starlette、python-multipart、a2wsgi）
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags
+
+import config
+import metrics
+import simple_app
+from fault_injection import aiter_throttled
+from listing import FILE_LISTING, INTERFACE_LISTING, ListQueryError
+from request_budget import BudgetExceeded, budget_scope
+from request_profiler import FORMAT_COLLAPSED, FORMAT_PSTATS
+
+try:
+    import socketio
+except ImportError:  # python-socketio为可选依赖，未安装时不提供WebSocket
+    socketio = None
+
+logger = logging.getLogger(__name__)
+
+DYNAMIC_METHODS = ['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS']
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+def json_response(payload, status_code=200, headers=None):
+    """使用与Flask相同的JSON序列化实现输出响应"""
+    return Response(simple_app.app.json.dumps_bytes(payload), status_code=status_code,
+                    headers=headers, media_type=JSON_CONTENT_TYPE)
+
+
+async def _stream_body(plan, mock_count, full_path, seed):
+    # 每批数据在线程池中生成，生成期间不阻塞事件循环上的其他连接
+    async for chunk in iterate_in_threadpool(simple_app.iter_mock_stream(plan, mock_count, full_path, seed)):
+        yield chunk
+
+
+def _profile_mode(request):
+    """请求头 X-Profile 或参数 _profile 要求性能分析且已授权时返回分析方式，否则返回None"""
+    flag = request.headers.get('x-profile') or request.query_params.get('_profile')
+    if not flag:
+        return None
+    return simple_app.request_profiler.requested_mode(flag, request.headers.get('x-profile-token'))
+
+
+async def _request_options(request):
+    """GET请求取查询参数，其余请求取JSON请求体，与Flask版本的解析方式一致"""
+    if request.method == 'GET':
+        return dict(request.query_params)
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# ---------- Mock接口 ----------
+
+async def dynamic_interface(request):
+    if request.method == 'OPTIONS':
+        return Response(status_code=204)
+    full_path = '/' + request.path_params['path']
+    options = await _request_options(request)
+
+    mode = _profile_mode(request)
+    started = time.perf_counter()
+    try:
+        # 生成数据是CPU密集操作，放到线程池中执行；生成时检查请求预算（run_in_threadpool会复制当前上下文），
+        # 流式输出在此之后进行，由 iter_mock_stream 使用自己的预算
+        with budget_scope(simple_app.new_request_budget()):
+            (response, fault, entry), profile_id = await run_in_threadpool(
+                simple_app.request_profiler.call, mode, f'{request.method} {request.url.path}', _build_mock_response,
+                request, full_path, options)
+    except BudgetExceeded as e:
+        logger.warning(f"请求超出预算: {request.method} {full_path}: {e}")
+        response, fault, profile_id = json_response(e.payload(), e.status), None, getattr(e, 'profile_id', None)
+        entry = simple_app.route_table.lookup(request.method, full_path)
+    if profile_id:
+        response.headers['X-Profile-Id'] = profile_id
+
+    simple_app.record_mock_request('http', request.method, full_path, options, dict(request.headers),
+                                   response.status_code,
+                                   None if isinstance(response, StreamingResponse) else response.body, started,
+                                   entry)
+    if fault is not None:
+        response = await _apply_fault(response, fault, started)
+    return response
+
+
+def _build_mock_response(request, full_path, options):
+    kind, result, fault, entry = simple_app.resolve_mock_request(request.method, full_path, options)
+    if kind == simple_app.MOCK_RESULT_STREAM:
+        return StreamingResponse(_stream_body(*result), media_type=JSON_CONTENT_TYPE), fault, entry
+    if kind == simple_app.MOCK_RESULT_CACHED:
+        body, etag = simple_app.get_cached_mock_body(*result)
+        # If-None-Match 可能包含多个ETag（逗号分隔）或 *，按列表逐个比较
+        if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+            return Response(status_code=304, headers={'ETag': f'"{etag}"'}), fault, entry
+        return Response(body, headers={'ETag': f'"{etag}"'}, media_type=JSON_CONTENT_TYPE), fault, entry
+    if kind == simple_app.MOCK_RESULT_ERROR:
+        return json_response(result[1], result[0]), fault, entry
+    return json_response(result), fault, entry
+
+
+async def _apply_fault(response, fault, started):
+    """注入延迟和带宽限制，等待使用asyncio.sleep，不占用线程"""
+    simple_app.fault_stats.record(fault.interface_id, fault.delay * 1000, (time.perf_counter() - started) * 1000,
+                                  fault.error_status is not None)
+    if fault.delay:
+        await asyncio.sleep(fault.delay)
+    if not fault.bytes_per_second:
+        return response
+    if isinstance(response, StreamingResponse):
+        response.body_iterator = aiter_throttled(response.body_iterator, fault.bytes_per_second)
+        return response
+    return StreamingResponse(aiter_throttled([response.body], fault.bytes_per_second),
+                             status_code=response.status_code, headers=dict(response.headers))
+
+
+async def mock_batch(request):
+    try:
+        data = await request.json()
+    except Exception:
+        data = None
+    items, error = simple_app.parse_mock_batch(data)
+    if error:
+        return json_response({'code': 400, 'message': error, 'data': None}, 400)
+    # 批量生成是CPU密集操作，放到线程池中执行，大数据量的项会再交给进程池；
+    # run_in_threadpool会复制当前上下文，线程中同样能取到请求预算
+    with budget_scope(simple_app.new_request_budget()):
+        body, profile_id = await run_in_threadpool(
+            simple_app.request_profiler.call, _profile_mode(request), 'POST /mock-batch', simple_app.run_mock_batch,
+            items)
+    return Response(body, headers={'X-Profile-Id': profile_id} if profile_id else None,
+                    media_type=JSON_CONTENT_TYPE)
+
+
+# ---------- 接口和文件 ----------
+
+async def get_interfaces(request):
+    try:
+        result = await run_in_threadpool(simple_app.list_records, INTERFACE_LISTING, request.query_params)
+    except ListQueryError as e:
+        return json_response({'error': str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"获取接口列表失败: {e}")
+        result = []
+    return json_response(result)
+
+
+async def get_files(request):
+    try:
+        result = await run_in_threadpool(simple_app.list_records, FILE_LISTING, request.query_params)
+    except ListQueryError as e:
+        return json_response({'error': str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"获取文件列表失败: {e}")
+        result = []
+    return json_response(result)
+
+
+def _save_upload(file_path, content):
+    with open(file_path, 'wb') as f:
+        f.write(content)
+
+
+async def upload_file(request):
+    form = await request.form()
+    file = form.get('file')
+    if file is None or isinstance(file, str):
+        return json_response({'error': 'No file part'}, 400)
+    if not file.filename:
+        return json_response({'error': 'No selected file'}, 400)
+
+    logger.info(f"开始上传文件: {file.filename}")
+    file_path = os.path.join(simple_app.UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
+    file_type = file.content_type or 'application/octet-stream'
+    try:
+        content = await file.read()
+        await run_in_threadpool(_save_upload, file_path, content)
+        # 数据库写入和文件解析是阻塞操作，放到线程池中执行
+        result, profile_id = await run_in_threadpool(
+            simple_app.request_profiler.call, _profile_mode(request), 'POST /files/upload',
+            simple_app.register_uploaded_file, file.filename, file_path, file_type)
+        return json_response(result, headers={'X-Profile-Id': profile_id} if profile_id else None)
+    except Exception as e:
+        logger.error(f"文件上传处理失败: {type(e).__name__}: {e}")
+        file_ext = os.path.splitext(file.filename)[1].lower()
+        if os.path.exists(file_path) and file_ext in ['.json', '.md', '.txt']:
+            os.remove(file_path)
+        return json_response({
+            'error': f'文件上传失败: {str(e)}',
+            'message': '文件上传失败。请检查文件格式是否正确。',
+            'parsed': 0
+        }, 500)
+    finally:
+        await file.close()
+
+
+async def prometheus_metrics(request):
+    return Response(metrics.render(), headers={'Content-Type': metrics.CONTENT_TYPE})
+
+
+def _profile_token(request):
+    return request.headers.get('x-profile-token') or request.query_params.get('token')
+
+
+async def list_profiles(request):
+    if not simple_app.request_profiler.authorized(_profile_token(request)):
+        return json_response({'code': 403, 'message': '没有查看性能分析记录的权限', 'data': None}, 403)
+    limit = request.query_params.get('limit')
+    captures = await run_in_threadpool(simple_app.request_profiler.store.list, int(limit) if limit else None)
+    return json_response({'code': 0, 'message': 'success', 'data': captures})
+
+
+async def get_profile(request):
+    if not simple_app.request_profiler.authorized(_profile_token(request)):
+        return json_response({'code': 403, 'message': '没有查看性能分析记录的权限', 'data': None}, 403)
+    capture_id = request.path_params['capture_id']
+    fmt = request.query_params.get('format', FORMAT_COLLAPSED)
+    status, body, content_type = await run_in_threadpool(simple_app.load_profile_report, capture_id, fmt)
+    headers = {'Content-Type': content_type}
+    if status == 200 and fmt == FORMAT_PSTATS:
+        headers['Content-Disposition'] = f'attachment; filename={capture_id}.prof'
+    return Response(body, status_code=status, headers=headers)
+
+
+async def health_check(request):
+    return json_response({
+        'status': 'healthy',
+        'app': '动态接口生成工具',
+        'version': '1.0.0',
+        'server': 'asgi'
+    })
+
+
+routes = [
+    Route('/health', health_check, methods=['GET']),
+    Route('/metrics', prometheus_metrics, methods=['GET']),
+    Route('/profiles', list_profiles, methods=['GET']),
+    Route('/profiles/{capture_id}', get_profile, methods=['GET']),
+    Route('/interfaces', get_interfaces, methods=['GET']),
+    Route('/files', get_files, methods=['GET']),
+    Route('/files/upload', upload_file, methods=['POST']),
+    Route('/mock-batch', mock_batch, methods=['POST']),
+    Route('/dynamic/{path:path}', dynamic_interface, methods=DYNAMIC_METHODS),
+]
+
+
+class FlaskFallback:
+    """其余路径：匹配到Mock接口的直接路径在这里处理，其他请求（包括未匹配的Mock请求）转交给Flask应用"""
+
+    # Flask中匹配其余全部路径的路由，匹配到这些路由时才按Mock接口的直接路径处理
+    CATCH_ALL_ENDPOINTS = ('static_files', 'dynamic_interface_direct')
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi_app = WSGIMiddleware(flask_app)
+
+    def _is_mock_path(self, method, path):
+        try:
+            endpoint, _ = self.flask_app.url_map.bind('localhost').match(path, method)
+        except HTTPException:
+            endpoint = None
+        if endpoint is not None and endpoint not in self.CATCH_ALL_ENDPOINTS:
+            return False
+        return simple_app.route_table.lookup(method, path) is not None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and self._is_mock_path(scope['method'], scope['path']):
+            scope['path_params'] = {'path': scope['path'].lstrip('/')}
+            response = await dynamic_interface(Request(scope, receive))
+            await response(scope, receive, send)
+            return
+        await self.wsgi_app(scope, receive, send)
+
+class RequestMetricsMiddleware:
+    """按路由模板统计HTTP请求耗时（到发送响应头为止），与Flask版本的 http_request_duration_seconds 一致"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                route = scope.get('route')
+                endpoint = getattr(route, 'path', None) or 'unmatched'
+                metrics.HTTP_REQUEST_SECONDS.observe((scope['method'], endpoint, str(message['status'])),
+                                                     time.perf_counter() - started)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+http_app = Starlette(routes=routes + [Route('/{path:path}', FlaskFallback(simple_app.app))], middleware=[
+    Middleware(RequestMetricsMiddleware),
+    Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+])
+
+
+# ---------- Socket.IO ----------
+
+def create_application():
+    """创建ASGI应用，安装了python-socketio时同时提供Socket.IO的dynamic_interface、get_interfaces等事件"""
+    if socketio is None:
+        logger.warning('未安装python-socketio，ASGI模式不提供WebSocket服务')
+        return http_app
+
+    sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+
+    @sio.on('connect')
+    async def handle_connect(sid, environ):
+        metrics.SOCKETIO_CONNECTIONS.inc()
+        metrics.SOCKETIO_EVENTS.inc(('connect',))
+
+    @sio.on('disconnect')
+    async def handle_disconnect(sid, *args):
+        metrics.SOCKETIO_CONNECTIONS.dec()
+        metrics.SOCKETIO_EVENTS.inc(('disconnect',))
+
+    @sio.on('dynamic_interface')
+    async def handle_dynamic_interface(sid, data):
+        metrics.SOCKETIO_EVENTS.inc(('dynamic_interface',))
+        data = data or {}
+        try:
+            mode, target = simple_app.socket_profile_request('dynamic_interface', data)
+            started = time.perf_counter()
+            try:
+                with budget_scope(simple_app.new_request_budget()):
+                    (payload, fault, entry), profile_id = await run_in_threadpool(
+                        simple_app.request_profiler.call, mode, target, simple_app.build_socket_mock_payload, data)
+            except BudgetExceeded as e:
+                payload, fault, profile_id = e.payload(), None, getattr(e, 'profile_id', None)
+                entry = simple_app.route_table.lookup(data.get('method', 'GET'), data.get('path', ''))
+            if profile_id:
+                payload = dict(payload, profile_id=profile_id)
+            simple_app.record_mock_request('socketio', data.get('method', 'GET'), data.get('path', ''), data, None,
+                                           200 if payload['code'] == 0 else payload['code'], payload, started,
+                                           entry)
+            if fault is not None:
+                simple_app.fault_stats.record(fault.interface_id, fault.delay * 1000,
+                                              (time.perf_counter() - started) * 1000, fault.error_status is not None)
+                if fault.delay:
+                    await asyncio.sleep(fault.delay)
+        except Exception as e:
+            logger.error(f'Error handling dynamic interface via WebSocket for sid: {sid}: {type(e).__name__}: {e}')
+            payload = {
+                'code': 500,
+                'message': f'处理动态接口失败: {str(e)}',
+                'data': None
+            }
+        await sio.emit('dynamic_response', payload, to=sid)
+
+    @sio.on('get_interfaces')
+    async def handle_get_interfaces(sid, data):
+        metrics.SOCKETIO_EVENTS.inc(('get_interfaces',))
+        try:
+            # 查询数据库是阻塞操作，每批数据在线程池中查询
+            async for event, payload in iterate_in_threadpool(simple_app.iter_interface_events(data or {})):
+                await sio.emit(event, payload, to=sid)
+        except Exception as e:
+            logger.error(f'Error getting interfaces via WebSocket for sid: {sid}: {type(e).__name__}: {e}')
+            await sio.emit('error', {'message': f'获取接口列表失败: {str(e)}'}, to=sid)
+
+    @sio.on('dynamic_batch')
+    async def handle_dynamic_batch(sid, data):
+        metrics.SOCKETIO_EVENTS.inc(('dynamic_batch',))
+        mode, target = simple_app.socket_profile_request('dynamic_batch', data)
+        items, error = simple_app.parse_mock_batch(data)
+        if error:
+            payload = {'code': 400, 'message': error, 'data': None}
+        else:
+            try:
+                with budget_scope(simple_app.new_request_budget()):
+                    body, profile_id = await run_in_threadpool(
+                        simple_app.request_profiler.call, mode, target, simple_app.run_mock_batch, items)
+                payload = simple_app.app.json.loads(body)
+                if profile_id:
+                    payload['profile_id'] = profile_id
+            except Exception as e:
+                logger.error(f'Error handling dynamic batch via WebSocket for sid: {sid}: {type(e).__name__}: {e}')
+                payload = {'code': 500, 'message': f'处理批量请求失败: {str(e)}', 'data': None}
+        await sio.emit('dynamic_batch_response', payload, to=sid)
+
+    return socketio.ASGIApp(sio, other_asgi_app=http_app)
+
+
+application = create_application()
+
+
+def _raise_open_files_limit():
+    # 每个长连接占用一个文件描述符，尽量把软限制提高到硬限制（Windows上没有resource模块）
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            logger.info(f"文件描述符上限: {soft} -> {hard}")
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"无法调整文件描述符上限: {e}")
+
+
+def run(host, port):
+    """使用uvicorn启动ASGI服务"""
+    import uvicorn
+
+    _raise_open_files_limit()
+    uvicorn.run(
+        application,
+        host=host,
+        port=port,
+        backlog=config.ASGI_BACKLOG,
+        timeout_keep_alive=config.ASGI_KEEP_ALIVE_TIMEOUT,
+        log_level='warning'
+    )
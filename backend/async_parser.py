@@ -7,6 +7,7 @@ import re
 import json
 from datetime import datetime
 import sys
+import time
 
 # 获取当前目录（支持打包后运行）
 if getattr(sys, 'frozen', False):
@@ -19,10 +20,76 @@ else:
 # 导入配置，使用与主程序相同的数据库路径
 sys.path.insert(0, BASE_DIR)
 from config import DATABASE_PATH
+import db_pool
+import metrics
+from request_budget import check_budget
 
 # 数据库配置
 DATABASE = DATABASE_PATH
 
+# 没有解析到请求参数、响应字段时使用的默认值
+DEFAULT_PARAMS = [
+    ('id', 'string', 1, '唯一标识符', '123456'),
+    ('page', 'int', 0, '页码', '1'),
+    ('page_size', 'int', 0, '每页条数', '10')
+]
+DEFAULT_RESPONSES = [
+    ('code', 'int', '响应码', '0'),
+    ('message', 'string', '响应消息', 'success'),
+    ('data', 'object', '响应数据', '{}'),
+    ('timestamp', 'string', '时间戳', '2023-01-01 12:00:00')
+]
+
+# 保存解析结果
+def save_parsed_interfaces(conn, file_id, interfaces, parsed_params, parsed_responses):
+    """
+    在一个事务中保存解析结果，interfaces为 [(名称, 路径, 方法, 请求参数列表, 响应字段列表), ...]
+    接口id在写锁内一次分配，之后每张表只执行一次 executemany
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'interfaces'").fetchone()
+    max_id = cursor.execute('SELECT MAX(id) FROM interfaces').fetchone()[0]
+    first_id = max(row[0] if row else 0, max_id or 0) + 1
+    
+    interface_rows = []
+    config_rows = []
+    param_rows = []
+    response_rows = []
+    for interface_id, (name, path, method, request_params, response_fields) in enumerate(interfaces, first_id):
+        interface_rows.append((interface_id, name, path, method, '', file_id))
+        # 默认Mock配置
+        config_rows.append((interface_id, 1, 10))
+        for param_name, param_type, required, description, example in request_params:
+            param_rows.append((param_name, param_type, required, description, example, interface_id))
+        for field_name, field_type, description, example in response_fields:
+            response_rows.append((field_name, field_type, description, example, interface_id))
+    
+    cursor.executemany('''
+        INSERT INTO interfaces (id, name, path, method, description, file_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', interface_rows)
+    cursor.executemany('''
+        INSERT INTO mock_configs (interface_id, enabled, default_count)
+        VALUES (?, ?, ?)
+    ''', config_rows)
+    cursor.executemany('''
+        INSERT INTO interface_params (name, param_type, required, description, example, interface_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', param_rows)
+    cursor.executemany('''
+        INSERT INTO interface_responses (name, response_type, description, example, interface_id)
+        VALUES (?, ?, ?, ?, ?)
+    ''', response_rows)
+    
+    # 更新文件记录，保存解析结果统计
+    cursor.execute('''
+        UPDATE interface_files
+        SET parsed_interfaces = ?, parsed_params = ?, parsed_responses = ?
+        WHERE id = ?
+    ''', (len(interfaces), parsed_params, parsed_responses, file_id))
+    conn.commit()
+
 # 异步文件解析函数
 def parse_file_async(file_id, file_path, file_name, file_content_type):
     """异步解析文件，提取接口信息"""
@@ -37,6 +104,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
         file_ext = os.path.splitext(file_name)[1].lower()
         supported_text_types = ['.json', '.md', '.txt']
         supported_binary_types = ['.docx', '.xlsx', '.pdf', '.png', '.jpg', '.jpeg']
+        extract_started = time.perf_counter()
         
         # 根据文件类型读取内容
         if file_ext in supported_text_types:
@@ -50,6 +118,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
                     from docx import Document
                     doc = Document(file_path)
                     for para in doc.paragraphs:
+                        check_budget()
                         content += para.text + '\n'
                 except ImportError:
                     print("警告：未安装python-docx库，无法解析DOCX文件")
@@ -61,6 +130,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
                     wb = load_workbook(file_path)
                     ws = wb.active
                     for row in ws.iter_rows(values_only=True):
+                        check_budget()
                         # 将每行数据转换为字符串，用制表符分隔
                         row_str = '\t'.join([str(cell) if cell is not None else '' for cell in row])
                         content += row_str + '\n'
@@ -73,6 +143,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
                     from PyPDF2 import PdfReader
                     reader = PdfReader(file_path)
                     for page in reader.pages:
+                        check_budget()
                         content += page.extract_text() + '\n'
                 except ImportError:
                     print("警告：未安装PyPDF2库，无法解析PDF文件")
@@ -131,11 +202,13 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
             # 不支持的文件类型，标记为未解析
             content = ""
         
-        # 解析接口信息
-        # 首先将文件内容按行读取，然后寻找接口定义
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+        # 统计提取文本的耗时（PDF、Office文档解析和图片OCR）
+        metrics.EXTRACT_SECONDS.observe((metrics.file_type_label(file_name),), time.perf_counter() - extract_started)
         
+        # 解析接口信息
+        # 首先将文件内容按行读取，然后寻找接口定义；解析结果先保存在内存中，最后一次写入数据库
+        parsed_result = []
+
         # 尝试直接解析JSON内容
         interface_matches = []
         swagger_data = None
@@ -152,6 +225,8 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
                 
                 # 遍历所有路径
                 for path, methods in json_data['paths'].items():
+                    # 规范较大时定期检查是否超出解析时限
+                    check_budget()
                     # 遍历该路径下的所有请求方法
                     for method, details in methods.items():
                         # 只处理HTTP方法
@@ -289,6 +364,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
             print("=== 图片接口匹配结束 ===")
         
         for i, match in enumerate(interface_matches):
+            check_budget()
             header_level_str, name, method, path, swagger_data, swagger_details = match
             
             # 清理数据
@@ -311,20 +387,6 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
             # 打印调试信息
             print(f"解析到接口: {name} {method} {path}, 标题级别: {header_level}")
             
-            # 创建接口记录
-            cursor.execute('''
-                INSERT INTO interfaces (name, path, method, description, file_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, path, method, '', file_id))
-            interface_id = cursor.lastrowid
-            parsed_interfaces += 1
-            
-            # 创建默认Mock配置
-            cursor.execute('''
-                INSERT INTO mock_configs (interface_id, enabled, default_count)
-                VALUES (?, ?, ?)
-            ''', (interface_id, 1, 10))
-            
             # 初始化请求参数和响应参数列表
             request_params = []
             response_fields = []
@@ -750,47 +812,10 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
             # 使用默认的请求参数和响应参数
             pass
             
-            # 保存请求参数到数据库
-            if len(request_params) > 0:
-                for param_name, param_type, required, description, example in request_params:
-                    cursor.execute('''
-                        INSERT INTO interface_params (name, param_type, required, description, example, interface_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (param_name, param_type, required, description, example, interface_id))
-            else:
-                # 添加默认参数
-                default_params = [
-                    ('id', 'string', 1, '唯一标识符', '123456'),
-                    ('page', 'int', 0, '页码', '1'),
-                    ('page_size', 'int', 0, '每页条数', '10')
-                ]
-                for param_name, param_type, required, description, example in default_params:
-                    cursor.execute('''
-                        INSERT INTO interface_params (name, param_type, required, description, example, interface_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (param_name, param_type, required, description, example, interface_id))
-            
-            # 保存响应参数到数据库
-            if len(response_fields) > 0:
-                for field_name, field_type, description, example in response_fields:
-                    cursor.execute('''
-                        INSERT INTO interface_responses (name, response_type, description, example, interface_id)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (field_name, field_type, description, example, interface_id))
-            else:
-                # 添加默认响应字段
-                default_responses = [
-                    ('code', 'int', '响应码', '0'),
-                    ('message', 'string', '响应消息', 'success'),
-                    ('data', 'object', '响应数据', '{}'),
-                    ('timestamp', 'string', '时间戳', '2023-01-01 12:00:00')
-                ]
-                for field_name, field_type, description, example in default_responses:
-                    cursor.execute('''
-                        INSERT INTO interface_responses (name, response_type, description, example, interface_id)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (field_name, field_type, description, example, interface_id))
-        
+            # 记录接口，没有解析到的请求参数和响应字段使用默认值
+            parsed_result.append((name, path, method, request_params or DEFAULT_PARAMS,
+                                  response_fields or DEFAULT_RESPONSES))
+
         # 如果没有匹配到，尝试另一种格式匹配：### 接口名称
 # 接口说明
 # **POST** /path
@@ -802,6 +827,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
             print(f"第二种格式匹配到 {len(alt_interface_matches)} 个接口")
             
             for match in alt_interface_matches:
+                check_budget()
                 header_level, name, method, path = match
                 
                 # 清理数据
@@ -818,55 +844,15 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
                 # 打印调试信息
                 print(f"解析到接口: {name} {method} {path}")
                 
-                # 创建接口记录
-                cursor.execute('''
-                    INSERT INTO interfaces (name, path, method, description, file_id)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (name, path, method, '', file_id))
-                interface_id = cursor.lastrowid
-                parsed_interfaces += 1
-                
-                # 创建默认Mock配置
-                cursor.execute('''
-                    INSERT INTO mock_configs (interface_id, enabled, default_count)
-                    VALUES (?, ?, ?)
-                ''', (interface_id, 1, 10))
-                
-                # 添加默认请求参数
-                default_params = [
-                    ('id', 'string', 1, '唯一标识符', '123456'),
-                    ('page', 'int', 0, '页码', '1'),
-                    ('page_size', 'int', 0, '每页条数', '10')
-                ]
-                for param_name, param_type, required, description, example in default_params:
-                    cursor.execute('''
-                        INSERT INTO interface_params (name, param_type, required, description, example, interface_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (param_name, param_type, required, description, example, interface_id))
-                parsed_params += len(default_params)
-                
-                # 添加默认响应字段
-                default_responses = [
-                    ('code', 'int', '响应码', '0'),
-                    ('message', 'string', '响应消息', 'success'),
-                    ('data', 'object', '响应数据', '{}'),
-                    ('timestamp', 'string', '时间戳', '2023-01-01 12:00:00')
-                ]
-                for field_name, field_type, description, example in default_responses:
-                    cursor.execute('''
-                        INSERT INTO interface_responses (name, response_type, description, example, interface_id)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (field_name, field_type, description, example, interface_id))
-                parsed_responses += len(default_responses)
-        
-        # 更新文件记录，保存解析结果统计
-        cursor.execute('''
-            UPDATE interface_files 
-            SET parsed_interfaces = ?, parsed_params = ?, parsed_responses = ? 
-            WHERE id = ?
-        ''', (parsed_interfaces, parsed_params, parsed_responses, file_id))
-        
-        conn.commit()
+                # 记录接口，使用默认请求参数和响应字段
+                parsed_result.append((name, path, method, DEFAULT_PARAMS, DEFAULT_RESPONSES))
+                parsed_params += len(DEFAULT_PARAMS)
+                parsed_responses += len(DEFAULT_RESPONSES)
+
+        # 在一个事务中批量写入接口、Mock配置、请求参数和响应字段
+        parsed_interfaces = len(parsed_result)
+        conn = db_pool.connect(DATABASE)
+        save_parsed_interfaces(conn, file_id, parsed_result, parsed_params, parsed_responses)
         conn.close()
         
         print(f"文件解析完成: {file_name}, 提取到 {parsed_interfaces} 个接口")
@@ -880,7 +866,7 @@ def parse_file_async(file_id, file_path, file_name, file_content_type):
         print(f"文件解析失败: {file_name}, 错误: {str(e)}")
         
         # 更新文件记录，标记为解析失败
-        conn = sqlite3.connect(DATABASE)
+        conn = db_pool.connect(DATABASE)
         cursor = conn.cursor()
         cursor.execute('''
             UPDATE interface_files 
@@ -41,6 +41,13 @@ SUPPORTED_FILE_TYPES = SUPPORTED_TEXT_TYPES + SUPPORTED_BINARY_TYPES
 HOST = '127.0.0.1'
 PORT = 5000
 DEBUG = False  # 生产环境设置为False
+SERVER_MODE = 'threading'  # 服务方式: threading（Flask线程模式）或 asgi（asyncio事件循环，需安装uvicorn、starlette）
+ASGI_BACKLOG = 16384  # ASGI模式下监听队列长度
+ASGI_KEEP_ALIVE_TIMEOUT = 75  # ASGI模式下keep-alive连接的空闲超时（秒）
+REQUEST_TIMEOUT = 30  # 单个请求的处理时限（秒），超时后返回503
+
+# JSON序列化配置
+JSON_ENCODER = 'auto'  # auto: 安装了orjson时使用orjson，否则使用标准库json；也可指定 orjson / json
 
 # 前端配置
 FRONTEND_FOLDER = os.path.join(BASE_DIR, 'frontend')
@@ -59,10 +66,75 @@ TESSERACT_CMD = None  # 自动检测，可手动指定路径
 # 文件解析配置
 MAX_PARSE_LINES = 10000  # 最大解析行数
 MAX_PARSE_SIZE = 10 * 1024 * 1024  # 10MB
+PARSE_TIMEOUT = 120  # 单个文件的解析时限（秒），超时后文件标记为解析失败
 
 # Mock服务配置
 MOCK_SERVER_PORT = 8000
 MOCK_SERVER_HOST = '0.0.0.0'
+MOCK_BULK_THRESHOLD = 10000  # Mock行数达到该值时使用NumPy按列批量生成（需安装numpy）
+MOCK_STREAM_THRESHOLD = 1000  # Mock行数达到该值时使用流式响应
+MOCK_STREAM_CHUNK_ROWS = 1000  # 流式响应每批输出的行数
+MOCK_STREAM_TIMEOUT = 300  # 流式响应的输出时限（秒），超时后结束输出并在响应末尾给出错误
+MOCK_MAX_ROWS = 2000000  # 单个请求最多生成的Mock行数
+MOCK_MAX_RESPONSE_BYTES = 256 * 1024 * 1024  # 单个Mock响应的数据量上限（256MB），按样本行估算
+MOCK_OVERSIZE_POLICY = 'reject'  # 请求的数据量超过上限时: reject 返回413，truncate 截断为上限内的行数
+MOCK_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 确定性Mock响应缓存的内存上限（64MB）
+MOCK_ARRAY_MIN_LENGTH = 1  # 嵌套数组字段的最小长度
+MOCK_ARRAY_MAX_LENGTH = 3  # 嵌套数组字段的最大长度
+MOCK_MAX_PAGE_SIZE = 1000  # 分页Mock每页最多返回的行数
+MOCK_FAULT_THREADING_MAX_DELAY_MS = 5000  # Flask线程模式下HTTP请求注入延迟与限速传输合计的上限（毫秒），期间占用处理线程，更长的请使用ASGI模式
+MOCK_POOL_ENABLED = True  # 是否为热点接口后台预生成Mock数据
+MOCK_POOL_HOT_RPS = 5  # 请求频率（次/秒）达到该值的接口才建立预生成池
+MOCK_POOL_MIN_ROWS = 100  # 预生成池的最小行数
+MOCK_POOL_MAX_ROWS = 10000  # 预生成池的最大行数
+MOCK_POOL_WINDOW_SECONDS = 2  # 预生成池按该时长内的预计请求行数确定大小
+MOCK_POOL_REFILL_INTERVAL = 0.5  # 后台刷新预生成池的间隔（秒）
+MOCK_POOL_REFILL_ROWS = 1000  # 每次刷新最多替换的行数
+MOCK_POOL_MAX_POOLS = 64  # 同时保留预生成池的接口数上限，超出时回收最久未被取用的池
+MOCK_BATCH_MAX_ITEMS = 500  # 单次批量Mock请求的最大项数
+MOCK_BATCH_PARALLEL_ROWS = 20000  # 批量请求中行数达到该值的项交给进程池并行生成
+MOCK_BATCH_WORKERS = 1  # 批量生成进程数，默认1不使用进程池；None表示CPU核数，开启前用 benchmarks/bench_mock_batch.py --workers 测量
+
+# 请求日志配置（Mock请求写入request_logs表，由后台线程批量写入）
+REQUEST_LOG_ENABLED = True  # 是否记录Mock请求日志
+REQUEST_LOG_SAMPLE_RATE = 1.0  # 采样率（0~1），1表示记录全部请求
+REQUEST_LOG_FLUSH_INTERVAL = 0.2  # 后台写入间隔（秒）
+REQUEST_LOG_BATCH_ROWS = 500  # 积累到该行数时立即写入，同时也是单个事务的最大行数
+REQUEST_LOG_QUEUE_SIZE = 10000  # 内存队列上限，写入跟不上时丢弃新记录
+REQUEST_LOG_MAX_HEADER_BYTES = 2048  # 请求头最多保存的字节数，0表示不保存
+REQUEST_LOG_MAX_BODY_BYTES = 4096  # 请求参数和响应内容最多保存的字节数，0表示不保存
+REQUEST_LOG_ROLLUP_INTERVAL = 60  # 后台汇总请求日志的间隔（秒）
+REQUEST_LOG_RETENTION_HOURS = 72  # 原始请求日志的保留时长（小时），已汇总且超过该时长的记录会被删除
+REQUEST_LOG_ROLLUP_RETENTION_DAYS = 90  # 分钟和小时汇总的保留天数
+
+# 数据库连接配置（连接池中的连接在创建时设置以下参数）
+DB_POOL_SIZE = 16  # 连接池最多保留的空闲连接数，0表示不复用连接
+DB_JOURNAL_MODE = 'WAL'  # 日志模式，WAL模式下写入不阻塞读取；None表示使用SQLite默认的DELETE模式
+DB_SYNCHRONOUS = 'NORMAL'  # 同步模式，WAL模式下NORMAL不会损坏数据库，只可能丢失最后提交的少量事务
+DB_MMAP_SIZE = 64 * 1024 * 1024  # 内存映射读取的大小（64MB），0表示不使用内存映射
+DB_CACHE_SIZE_KB = 16384  # 每个连接的页缓存大小（16MB）
+DB_BUSY_TIMEOUT = 5.0  # 数据库被锁定时的等待时间（秒）
+
+# 文件删除配置（删除文件时只写入墓碑，关联数据由后台线程分批清理）
+FILE_PURGE_CHUNK_INTERFACES = 200  # 每批清理的接口数
+FILE_PURGE_CHUNK_ROWS = 5000  # 单个事务最多删除的行数，控制每次占用写锁的时长
+FILE_PURGE_PAUSE = 0.005  # 两批之间的暂停时间（秒），让Mock请求日志等其他写入获取写锁
+
+# 列表查询配置（GET /files、/interfaces 带 limit 或 cursor 参数时按键集分页）
+LIST_DEFAULT_PAGE_SIZE = 100  # 分页查询默认每页条数
+LIST_MAX_PAGE_SIZE = 1000  # 每页（以及Socket.IO分批发送时每批）最多返回的条数
+
+# 运行指标配置
+METRICS_ENABLED = True  # 是否统计运行指标（/metrics，Prometheus文本格式）
+METRICS_MOCK_INTERFACE_LABELS = 100  # Mock请求耗时指标按接口id区分的接口数上限，超出的接口归为other，0表示不按接口区分
+
+# 性能分析配置（请求头 X-Profile: cprofile|sample 对单个请求做性能分析，结果通过 /profiles 查看）
+PROFILE_ENABLED = False  # 未配置管理令牌时是否允许按请求开启性能分析
+PROFILE_ADMIN_TOKEN = None  # 管理令牌，配置后须在请求头 X-Profile-Token 中提供相同的值
+PROFILE_FOLDER = os.path.join(BASE_DIR, 'profiles')  # 分析结果的保存目录
+PROFILE_MAX_CAPTURES = 50  # 最多保留的分析记录数，超出时删除最早的记录
+PROFILE_MAX_BYTES = 50 * 1024 * 1024  # 分析记录的总大小上限（50MB）
+PROFILE_SAMPLE_INTERVAL = 0.005  # 采样分析的采样间隔（秒）
 
 # 生成接口配置
 GENERATE_INTERFACE_TIMEOUT = 30  # 生成接口超时时间（秒）
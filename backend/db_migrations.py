@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库结构的版本迁移
+数据库当前的结构版本保存在 PRAGMA user_version 中，启动时按顺序执行版本号更大的迁移，
+每个迁移在一个事务中执行并更新版本号；已有的 api_generator.db（版本为0）会原地升级。
+HOT_QUERIES 列出按条件查询的常用语句，scanned_queries() 检查其中哪些会全表扫描
+"""
+
+import logging
+import sqlite3
+
+import file_purge
+import route_table
+from listing import FILE_LISTING, INTERFACE_LISTING, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _add_column(cursor, table, column, definition):
+    # 旧版本的数据库中可能缺少后来增加的字段
+    if column not in _columns(cursor, table):
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _create_tables(cursor):
+    """版本1：基础表结构（与之前init_db创建的表相同，缺少的字段补齐）"""
+    # 文件表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interface_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            file_type TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            uploaded_at TEXT NOT NULL,
+            parsed INTEGER DEFAULT 0
+        )
+    ''')
+    _add_column(cursor, 'interface_files', 'parsed_interfaces', 'INTEGER DEFAULT 0')
+    _add_column(cursor, 'interface_files', 'parsed_params', 'INTEGER DEFAULT 0')
+    _add_column(cursor, 'interface_files', 'parsed_responses', 'INTEGER DEFAULT 0')
+
+    # 接口表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interfaces (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            path TEXT NOT NULL,
+            method TEXT NOT NULL,
+            description TEXT,
+            file_id INTEGER NOT NULL,
+            FOREIGN KEY (file_id) REFERENCES interface_files (id)
+        )
+    ''')
+    _add_column(cursor, 'interfaces', 'is_websocket', 'INTEGER DEFAULT 0')
+
+    # 参数表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interface_params (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            param_type TEXT NOT NULL,
+            required INTEGER DEFAULT 1,
+            description TEXT,
+            example TEXT,
+            interface_id INTEGER NOT NULL,
+            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
+        )
+    ''')
+
+    # 响应字段表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interface_responses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            response_type TEXT NOT NULL,
+            description TEXT,
+            example TEXT,
+            interface_id INTEGER NOT NULL,
+            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
+        )
+    ''')
+
+    # Mock配置表；seed用于生成确定性的Mock数据，total_count为分页Mock的虚拟总条数，
+    # fault_config保存延迟和故障注入配置（JSON）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mock_configs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            interface_id INTEGER NOT NULL,
+            enabled INTEGER DEFAULT 1,
+            default_count INTEGER DEFAULT 10,
+            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
+        )
+    ''')
+    _add_column(cursor, 'mock_configs', 'seed', 'INTEGER')
+    _add_column(cursor, 'mock_configs', 'total_count', 'INTEGER')
+    _add_column(cursor, 'mock_configs', 'fault_config', 'TEXT')
+
+    # 请求日志表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            interface_id INTEGER NOT NULL,
+            method TEXT NOT NULL,
+            path TEXT NOT NULL,
+            params TEXT,
+            headers TEXT,
+            response_status INTEGER NOT NULL,
+            response_body TEXT,
+            execution_time REAL,
+            request_time TEXT NOT NULL,
+            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
+        )
+    ''')
+
+    # 请求日志汇总表：按分钟、小时、天（resolution=60/3600/86400）汇总的请求数、状态码计数和耗时直方图
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_log_rollups (
+            resolution INTEGER NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            interface_id INTEGER NOT NULL,
+            request_count INTEGER NOT NULL,
+            total_ms REAL NOT NULL,
+            max_ms REAL NOT NULL,
+            status_counts TEXT NOT NULL,
+            histogram TEXT NOT NULL,
+            PRIMARY KEY (resolution, bucket_start, interface_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # 请求日志汇总进度表，记录已汇总到的request_logs.id
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_log_rollup_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_log_id INTEGER NOT NULL
+        )
+    ''')
+
+
+def _create_indexes(cursor):
+    """版本2：按路径、文件和接口查询的索引（删除文件时按interface_id删除日志和汇总也需要）"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interfaces_path_method ON interfaces (path, method)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interfaces_file_id ON interfaces (file_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interface_params_interface_id ON interface_params (interface_id)')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_interface_responses_interface_id ON interface_responses (interface_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_request_logs_interface_id ON request_logs (interface_id)')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_request_log_rollups_interface_id ON request_log_rollups (interface_id)')
+
+
+def _unique_mock_configs(cursor):
+    """版本3：每个接口只有一条Mock配置；重复的配置只保留id最小的一条（此前查询和路由表都只使用这一条）"""
+    cursor.execute('''
+        DELETE FROM mock_configs
+        WHERE id NOT IN (SELECT MIN(id) FROM mock_configs GROUP BY interface_id)
+    ''')
+    if cursor.rowcount:
+        logger.info(f"删除了 {cursor.rowcount} 条重复的Mock配置")
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_mock_configs_interface_id ON mock_configs (interface_id)')
+
+
+def _file_tombstones(cursor):
+    """版本4：删除文件时先记录删除时间（墓碑），由后台分批清理关联数据；部分索引只包含带墓碑的文件"""
+    _add_column(cursor, 'interface_files', 'deleted_at', 'TEXT')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interface_files_deleted_at ON interface_files (deleted_at)
+        WHERE deleted_at IS NOT NULL
+    ''')
+
+
+def _listing_indexes(cursor):
+    """版本5：接口列表按路径、名称、方法排序和键集分页的索引（索引隐含以rowid结尾，即按 (字段, id) 有序）"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interfaces_path ON interfaces (path)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interfaces_name ON interfaces (name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interfaces_method ON interfaces (method)')
+
+
+def _file_listing_indexes(cursor):
+    """
+    版本6：文件列表按上传时间、文件名排序和键集分页的索引；列表只返回未删除的文件，
+    使用同样条件的部分索引，带墓碑的文件不占用索引空间
+    """
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interface_files_uploaded_at ON interface_files (uploaded_at, id)
+        WHERE deleted_at IS NULL
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interface_files_filename ON interface_files (filename, id)
+        WHERE deleted_at IS NULL
+    ''')
+
+
+# (版本号, 说明, 迁移函数)，版本号从1开始连续递增，已发布的迁移不要修改，新的结构变化追加新版本
+MIGRATIONS = [
+    (1, '基础表结构', _create_tables),
+    (2, '查询索引', _create_indexes),
+    (3, 'mock_configs.interface_id 唯一', _unique_mock_configs),
+    (4, '文件删除墓碑', _file_tombstones),
+    (5, '接口列表分页索引', _listing_indexes),
+    (6, '文件列表分页索引', _file_listing_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """
+    把数据库升级到最新版本，返回 (升级前的版本, 升级后的版本)
+    每个迁移使用 BEGIN IMMEDIATE 事务，多个进程同时启动时只有一个执行迁移，其余等待后跳过
+    """
+    start_version = get_version(conn)
+    if start_version > SCHEMA_VERSION:
+        logger.warning(f"数据库结构版本 {start_version} 高于程序支持的版本 {SCHEMA_VERSION}，可能由更新的版本创建")
+        return start_version, start_version
+    for version, description, migration in MIGRATIONS:
+        if version <= start_version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 获取写锁后重新读取版本，其他进程可能已经执行过该迁移
+            if get_version(conn) >= version:
+                conn.rollback()
+                continue
+            migration(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.error(f"数据库迁移到版本 {version}（{description}）失败")
+            raise
+        logger.info(f"数据库已迁移到版本 {version}: {description}")
+    return start_version, get_version(conn)
+
+
+def _listing_pages(listing, queries):
+    """列表后续页的查询，queries为 [(参数, 排序字段, 排序方向)]，游标取任意值（只影响参数，不影响查询计划）"""
+    return [listing.build_query(dict(args, sort=sort, order=order, cursor=encode_cursor(sort, order, '', 0)),
+                                limit=100)[0]
+            for args, sort, order in queries]
+
+
+# 按条件查询的常用语句，都应当使用索引或主键，不能全表扫描；
+# 除接口详情的简单查询外，都由实际执行查询的模块生成，与运行时的语句保持一致
+HOT_QUERIES = [
+    # 接口详情、Mock配置和文件删除（simple_app）
+    'SELECT * FROM interfaces WHERE id = ?',
+    'SELECT * FROM interface_params WHERE interface_id = ?',
+    'SELECT * FROM interface_responses WHERE interface_id = ?',
+    'SELECT * FROM mock_configs WHERE interface_id = ?',
+    'SELECT filename, file_path FROM interface_files WHERE id = ? AND deleted_at IS NULL',
+    'UPDATE interface_files SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL',
+    # 已删除文件的后台分批清理
+    file_purge.PENDING_FILES_SQL,
+    file_purge.PENDING_COUNT_SQL,
+    file_purge.FILE_INTERFACES_SQL,
+    *[file_purge.delete_children_sql(table, 2) for table in file_purge.CHILD_TABLES],
+    *[file_purge.delete_interfaces_sql(table, 2) for table in ('request_log_rollups', 'interfaces')],
+    file_purge.DELETE_FILE_SQL,
+    # 路由表按文件、按接口重新加载（排除已删除文件下的接口）
+    *route_table.entry_queries(route_table.RELOAD_FILE_WHERE),
+    *route_table.entry_queries(route_table.RELOAD_INTERFACE_WHERE),
+    # 接口列表键集分页的后续页（第一页没有游标条件，按索引顺序读取到LIMIT即停止）
+    *_listing_pages(INTERFACE_LISTING, [
+        ({}, 'id', 'asc'),
+        ({}, 'path', 'asc'),
+        ({}, 'path', 'desc'),
+        ({}, 'name', 'asc'),
+        ({}, 'method', 'asc'),
+        ({'method': 'GET'}, 'id', 'asc'),
+        ({'file_id': 1}, 'id', 'asc'),
+        ({'path_prefix': '/api'}, 'path', 'asc'),
+    ]),
+    # 文件列表键集分页的后续页（只包含未删除的文件）
+    *_listing_pages(FILE_LISTING, [
+        ({}, 'id', 'asc'),
+        ({}, 'uploaded_at', 'asc'),
+        ({}, 'uploaded_at', 'desc'),
+        ({}, 'filename', 'asc'),
+        ({'parsed': 1}, 'uploaded_at', 'desc'),
+    ]),
+]
+
+
+def query_plan(conn, sql):
+    """返回语句的查询计划（EXPLAIN QUERY PLAN 每行的说明文字）"""
+    parameters = (None,) * sql.count('?')
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()]
+
+
+def scanned_queries(conn, queries=HOT_QUERIES):
+    """返回会全表扫描的语句及其查询计划 [(语句, 计划), ...]"""
+    result = []
+    for sql in queries:
+        plan = query_plan(conn, sql)
+        if any(detail.startswith('SCAN') for detail in plan):
+            result.append((sql, plan))
+    return result
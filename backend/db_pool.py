@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite连接池
+connect(database) 从连接池取出一个连接，close() 时回滚未提交的事务并放回连接池，
+不再每次请求都重新打开数据库文件、加载表结构；新连接使用WAL日志模式（写入时不阻塞读取）、
+synchronous=NORMAL、内存映射、页缓存和忙等待超时。
+连接在取出它的线程中使用，请求结束时（teardown_appcontext）归还该线程未关闭的连接，进程退出前关闭全部连接
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection(metrics.MeteredConnection):
+    """close() 时归还连接池的连接，真正关闭使用 close_connection()"""
+
+    def close(self):
+        pool = getattr(self, 'pool', None)
+        if pool is None:
+            self.close_connection()
+        else:
+            pool.release(self)
+
+    def close_connection(self):
+        sqlite3.Connection.close(self)
+
+
+class ConnectionPool:
+    """
+    单个数据库文件的连接池
+    size为最多保留的空闲连接数，为0时不复用连接（每次打开、关闭，与直接调用sqlite3.connect相同）；
+    journal_mode、synchronous等为None时保持SQLite的默认值
+    """
+
+    def __init__(self, database, size=16, journal_mode='WAL', synchronous='NORMAL', mmap_size=64 * 1024 * 1024,
+                 cache_size_kb=16384, busy_timeout=5.0):
+        self.database = database
+        self.size = size
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout = busy_timeout
+        # 空闲连接，后进先出，最近用过的连接页缓存更热
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self.opened = 0
+        self.reused = 0
+        self.leaked = 0
+
+    def _open(self):
+        conn = sqlite3.connect(self.database, timeout=self.busy_timeout, factory=PooledConnection,
+                               check_same_thread=False)
+        try:
+            if self.journal_mode:
+                conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+            if self.synchronous:
+                conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            if self.mmap_size is not None:
+                conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            if self.cache_size_kb:
+                # 负数表示以KB为单位
+                conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        except sqlite3.Error as e:
+            # 只读目录、网络文件系统等情况下可能无法切换日志模式，使用默认设置继续
+            logger.warning(f"设置SQLite连接参数失败: {self.database}: {e}")
+        conn.pool = self
+        conn.held_by = None
+        self.opened += 1
+        metrics.DB_CONNECTIONS_OPENED.inc()
+        return conn
+
+    def _held(self):
+        held = getattr(self._local, 'held', None)
+        if held is None:
+            held = self._local.held = []
+        return held
+
+    def connect(self):
+        """取出一个连接，用完后调用 close() 归还"""
+        if os.getpid() != self._pid:
+            # fork出的子进程不能使用父进程打开的连接，直接丢弃
+            self._idle = []
+            self._pid = os.getpid()
+        conn = None
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+        if conn is None:
+            conn = self._open()
+        else:
+            self.reused += 1
+        held = self._held()
+        held.append(conn)
+        conn.held_by = held
+        return conn
+
+    def release(self, conn):
+        """归还连接，重复归还时不做任何事"""
+        held = conn.held_by
+        if held is None:
+            return
+        conn.held_by = None
+        try:
+            held.remove(conn)
+        except ValueError:
+            pass
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            # 调用方可能修改过row_factory，归还时恢复默认值
+            conn.row_factory = None
+        except sqlite3.Error as e:
+            logger.warning(f"归还SQLite连接时回滚失败，关闭该连接: {e}")
+            conn.close_connection()
+            return
+        with self._lock:
+            if len(self._idle) < self.size and os.getpid() == self._pid:
+                self._idle.append(conn)
+                return
+        conn.close_connection()
+
+    def release_thread(self):
+        """归还当前线程取出后未关闭的连接（未提交的事务会回滚），返回归还的数量"""
+        held = getattr(self._local, 'held', None)
+        if not held:
+            return 0
+        count = len(held)
+        for conn in list(held):
+            self.release(conn)
+        self.leaked += count
+        logger.warning(f"请求结束时有 {count} 个数据库连接未关闭，已回滚并归还连接池: {self.database}")
+        return count
+
+    def close_all(self):
+        """关闭全部空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close_connection()
+            except sqlite3.Error:
+                pass
+
+    def stats(self):
+        return {
+            'database': self.database,
+            'idle': len(self._idle),
+            'size': self.size,
+            'opened': self.opened,
+            'reused': self.reused,
+            'leaked': self.leaked,
+            'journal_mode': self.journal_mode
+        }
+
+
+# 按数据库文件路径保存的连接池
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database):
+    """返回数据库文件对应的连接池，首次使用时按配置创建"""
+    pool = _pools.get(database)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(database)
+            if pool is None:
+                pool = _pools[database] = ConnectionPool(
+                    database,
+                    size=config.DB_POOL_SIZE,
+                    journal_mode=config.DB_JOURNAL_MODE,
+                    synchronous=config.DB_SYNCHRONOUS,
+                    mmap_size=config.DB_MMAP_SIZE,
+                    cache_size_kb=config.DB_CACHE_SIZE_KB,
+                    busy_timeout=config.DB_BUSY_TIMEOUT
+                )
+    return pool
+
+
+def connect(database):
+    """从连接池取出数据库连接，close() 时归还"""
+    return get_pool(database).connect()
+
+
+def release_thread():
+    """归还当前线程在各连接池中未关闭的连接，返回归还的数量"""
+    return sum(pool.release_thread() for pool in list(_pools.values()))
+
+
+def close_all():
+    """关闭各连接池中的空闲连接"""
+    for pool in list(_pools.values()):
+        pool.close_all()
+
+
+def stats():
+    return [pool.stats() for pool in list(_pools.values())]
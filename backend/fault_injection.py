@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mock接口的延迟和故障注入
+每个接口可以配置延迟分布（固定、均匀、正态、按分位数的长尾分布）、错误率和带宽限制，
+配置以JSON保存在 mock_configs.fault_config 中；注入的延迟和真实处理耗时分别统计
+"""
+
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 延迟分布类型
+LATENCY_FIXED = 'fixed'
+LATENCY_UNIFORM = 'uniform'
+LATENCY_NORMAL = 'normal'
+LATENCY_PERCENTILES = 'percentiles'
+
+# 单次注入延迟的上限（毫秒），防止配置错误导致请求长时间挂起
+MAX_DELAY_MS = 600000
+
+
+class FaultConfigError(ValueError):
+    """故障注入配置无效"""
+
+
+def _number(config, key, default=None, minimum=0.0):
+    value = config.get(key, default)
+    if value is None:
+        raise FaultConfigError(f'缺少参数: {key}')
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise FaultConfigError(f'参数 {key} 必须是数字')
+    if value < minimum:
+        raise FaultConfigError(f'参数 {key} 不能小于 {minimum}')
+    return value
+
+
+class FaultDecision:
+    """单次请求的注入结果"""
+
+    __slots__ = ('interface_id', 'delay', 'error_status', 'bytes_per_second')
+
+    def __init__(self, interface_id, delay, error_status, bytes_per_second):
+        self.interface_id = interface_id
+        # 注入的延迟（秒）
+        self.delay = delay
+        # 需要返回的错误状态码，为None时正常返回
+        self.error_status = error_status
+        # 带宽限制（字节/秒），为None时不限制
+        self.bytes_per_second = bytes_per_second
+
+    def error_payload(self):
+        return {
+            'code': self.error_status,
+            'message': '故障注入: 模拟接口错误',
+            'data': None
+        }
+
+
+class FaultProfile:
+    """
+    接口的故障注入配置
+    配置格式:
+        {
+            "latency": {"type": "fixed", "ms": 100}
+                     | {"type": "uniform", "min_ms": 50, "max_ms": 200}
+                     | {"type": "normal", "mean_ms": 100, "stddev_ms": 30}
+                     | {"type": "percentiles", "p50": 20, "p95": 200, "p99": 1500},
+            "error_rate": 0.05,       # 0~1
+            "error_status": 503,      # 默认500
+            "bandwidth_kbps": 64      # 响应带宽限制（KB/秒）
+        }
+    """
+
+    __slots__ = ('config', 'latency_type', 'params', 'quantiles', 'values',
+                 'error_rate', 'error_status', 'bytes_per_second')
+
+    def __init__(self, config):
+        if not isinstance(config, dict):
+            raise FaultConfigError('故障注入配置必须是JSON对象')
+        self.config = config
+        self.latency_type = None
+        self.params = {}
+        self.quantiles = []
+        self.values = []
+
+        latency = config.get('latency')
+        if latency:
+            self._parse_latency(latency)
+
+        self.error_rate = _number(config, 'error_rate', 0)
+        if self.error_rate > 1:
+            raise FaultConfigError('参数 error_rate 必须在0到1之间')
+        self.error_status = int(_number(config, 'error_status', 500, 100))
+        bandwidth = config.get('bandwidth_kbps')
+        self.bytes_per_second = _number(config, 'bandwidth_kbps', minimum=0.001) * 1024 if bandwidth else None
+
+    def _parse_latency(self, latency):
+        if not isinstance(latency, dict):
+            raise FaultConfigError('latency必须是JSON对象')
+        latency_type = latency.get('type', LATENCY_FIXED)
+        if latency_type == LATENCY_FIXED:
+            self.params = {'ms': _number(latency, 'ms')}
+        elif latency_type == LATENCY_UNIFORM:
+            low, high = _number(latency, 'min_ms'), _number(latency, 'max_ms')
+            if high < low:
+                raise FaultConfigError('max_ms不能小于min_ms')
+            self.params = {'min_ms': low, 'max_ms': high}
+        elif latency_type == LATENCY_NORMAL:
+            self.params = {'mean_ms': _number(latency, 'mean_ms'), 'stddev_ms': _number(latency, 'stddev_ms')}
+        elif latency_type == LATENCY_PERCENTILES:
+            # {"p50": 20, "p99": 500} -> 分位点和对应延迟，按分位点线性插值
+            points = []
+            for key, value in latency.items():
+                if key == 'type':
+                    continue
+                if not key.startswith('p'):
+                    raise FaultConfigError(f'无效的分位点: {key}')
+                quantile = _number({'q': key[1:]}, 'q') / 100
+                if quantile > 1:
+                    raise FaultConfigError(f'无效的分位点: {key}')
+                points.append((quantile, _number(latency, key)))
+            if not points:
+                raise FaultConfigError('percentiles至少需要一个分位点，例如 p50')
+            points.sort()
+            if any(b[1] < a[1] for a, b in zip(points, points[1:])):
+                raise FaultConfigError('分位点延迟必须随分位点递增')
+            self.quantiles = [q for q, _ in points]
+            self.values = [v for _, v in points]
+        else:
+            raise FaultConfigError(f'不支持的延迟分布: {latency_type}')
+        self.latency_type = latency_type
+
+    def sample_delay_ms(self, rng):
+        """按配置的分布抽取一次延迟（毫秒）"""
+        latency_type = self.latency_type
+        if latency_type is None:
+            return 0.0
+        params = self.params
+        if latency_type == LATENCY_FIXED:
+            delay = params['ms']
+        elif latency_type == LATENCY_UNIFORM:
+            delay = rng.uniform(params['min_ms'], params['max_ms'])
+        elif latency_type == LATENCY_NORMAL:
+            delay = rng.gauss(params['mean_ms'], params['stddev_ms'])
+        else:
+            delay = self._sample_percentiles(rng.random())
+        return min(max(delay, 0.0), MAX_DELAY_MS)
+
+    def _sample_percentiles(self, u):
+        # 逆分布函数：在相邻分位点之间线性插值，低于第一个分位点和高于最后一个分位点时取端点值
+        quantiles, values = self.quantiles, self.values
+        index = bisect.bisect_left(quantiles, u)
+        if index == 0:
+            return values[0]
+        if index == len(quantiles):
+            return values[-1]
+        q0, q1 = quantiles[index - 1], quantiles[index]
+        v0, v1 = values[index - 1], values[index]
+        return v0 + (v1 - v0) * (u - q0) / (q1 - q0)
+
+    def decide(self, interface_id, rng=random):
+        """为一次请求抽取延迟并决定是否注入错误"""
+        error_status = self.error_status if self.error_rate and rng.random() < self.error_rate else None
+        return FaultDecision(interface_id, self.sample_delay_ms(rng) / 1000, error_status, self.bytes_per_second)
+
+
+def parse_fault_config(value):
+    """
+    解析故障注入配置（JSON字符串或字典），未配置时返回None
+    配置无效时抛出 FaultConfigError
+    """
+    if value in (None, '', {}):
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError as e:
+            raise FaultConfigError(f'故障注入配置不是有效的JSON: {e}')
+        if not value:
+            return None
+    return FaultProfile(value)
+
+
+def iter_throttled(chunks, bytes_per_second, sleep=time.sleep, slice_seconds=0.1, max_seconds=None):
+    """
+    按带宽限制逐段输出响应内容（同步版本，chunks为str或bytes的可迭代对象）
+    每 slice_seconds 输出一段，段大小由带宽决定；max_seconds为等待的总时长上限，达到上限后其余内容不再限速
+    """
+    slice_bytes = max(int(bytes_per_second * slice_seconds), 1)
+    remaining = max_seconds
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        for start in range(0, len(chunk), slice_bytes):
+            if remaining is not None and remaining <= 0:
+                yield chunk[start:]
+                break
+            piece = chunk[start:start + slice_bytes]
+            yield piece
+            wait = len(piece) / bytes_per_second
+            if remaining is not None:
+                wait = min(wait, remaining)
+                remaining -= wait
+            sleep(wait)
+
+
+async def aiter_throttled(chunks, bytes_per_second, slice_seconds=0.1):
+    """按带宽限制逐段输出响应内容（asyncio版本），等待期间不占用线程；chunks可以是同步或异步可迭代对象"""
+    if not hasattr(chunks, '__aiter__'):
+        for piece in iter_throttled(chunks, bytes_per_second, sleep=lambda _: None, slice_seconds=slice_seconds):
+            yield piece
+            await asyncio.sleep(len(piece) / bytes_per_second)
+        return
+    async for chunk in chunks:
+        for piece in iter_throttled([chunk], bytes_per_second, sleep=lambda _: None, slice_seconds=slice_seconds):
+            yield piece
+            await asyncio.sleep(len(piece) / bytes_per_second)
+
+
+class DelayScheduler:
+    """
+    延迟任务调度器
+    单个后台线程按到期时间执行任务，大量被延迟的请求不会各自占用一个线程
+    """
+
+    def __init__(self, name='fault-delay'):
+        self.name = name
+        self._heap = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay, func, *args):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._counter += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._counter, func, args))
+            self._condition.notify()
+
+    def pending(self):
+        return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                due, _, func, args = self._heap[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f'执行延迟任务失败: {type(e).__name__}: {e}')
+
+
+class FaultStats:
+    """按接口统计注入的延迟、错误次数和真实处理耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # interface_id -> [请求数, 注入错误数, 注入延迟合计ms, 注入延迟最大ms, 真实耗时合计ms, 真实耗时最大ms]
+        self._items = {}
+
+    def record(self, interface_id, injected_ms, real_ms, error=False):
+        with self._lock:
+            item = self._items.get(interface_id)
+            if item is None:
+                item = self._items[interface_id] = [0, 0, 0.0, 0.0, 0.0, 0.0]
+            item[0] += 1
+            if error:
+                item[1] += 1
+            item[2] += injected_ms
+            item[3] = max(item[3], injected_ms)
+            item[4] += real_ms
+            item[5] = max(item[5], real_ms)
+
+    def stats(self):
+        with self._lock:
+            items = {interface_id: list(item) for interface_id, item in self._items.items()}
+        return {
+            interface_id: {
+                'requests': requests,
+                'errors': errors,
+                'injected_ms_avg': round(injected_total / requests, 3),
+                'injected_ms_max': round(injected_max, 3),
+                'real_ms_avg': round(real_total / requests, 3),
+                'real_ms_max': round(real_max, 3)
+            }
+            for interface_id, (requests, errors, injected_total, injected_max, real_total, real_max) in items.items()
+        }
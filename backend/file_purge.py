@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已删除文件的后台清理
+删除文件时只在 interface_files.deleted_at 中记录删除时间（墓碑），文件立即从列表中消失，接口立即从路由表中移除；
+后台线程随后分批删除该文件的接口、参数、响应字段、Mock配置和请求日志，每批最多 chunk_rows 行、一个短事务，
+批之间释放写锁，不会长时间阻塞Mock请求和请求日志的写入；全部删除后再移除上传的文件和文件记录。
+进程重启后会继续清理上次未完成的文件
+"""
+
+import logging
+import os
+import threading
+import time
+
+import db_pool
+
+logger = logging.getLogger(__name__)
+
+# 未删除的文件下的接口（查询接口列表、加载路由表时使用）
+LIVE_INTERFACE_CONDITION = 'file_id NOT IN (SELECT id FROM interface_files WHERE deleted_at IS NOT NULL)'
+
+# 按interface_id关联到接口的表，按顺序删除；request_log_rollups 为 WITHOUT ROWID 表，每个接口的行数很少，整批删除
+CHILD_TABLES = ('request_logs', 'mock_configs', 'interface_responses', 'interface_params')
+
+# 清理过程中的查询（db_migrations.HOT_QUERIES 使用相同的语句检查查询计划）
+PENDING_FILES_SQL = 'SELECT id, file_path FROM interface_files WHERE deleted_at IS NOT NULL'
+PENDING_COUNT_SQL = 'SELECT COUNT(*) FROM interface_files WHERE deleted_at IS NOT NULL'
+FILE_INTERFACES_SQL = 'SELECT id FROM interfaces WHERE file_id = ? LIMIT ?'
+DELETE_FILE_SQL = 'DELETE FROM interface_files WHERE id = ?'
+
+
+def delete_children_sql(table, count):
+    """删除count个接口在table中的一批记录（最后一个参数为本批最多删除的行数）"""
+    placeholders = ','.join(['?'] * count)
+    return f'DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE interface_id IN ({placeholders}) LIMIT ?)'
+
+
+def delete_interfaces_sql(table, count):
+    """按接口id删除count个接口在table中的全部记录（interfaces表按id删除）"""
+    column = 'id' if table == 'interfaces' else 'interface_id'
+    return f"DELETE FROM {table} WHERE {column} IN ({','.join(['?'] * count)})"
+
+
+class FilePurger:
+    """
+    分批清理带墓碑的文件
+    chunk_interfaces为每批处理的接口数，chunk_rows为单个事务最多删除的行数，pause为两批之间的间隔（秒）
+    """
+
+    def __init__(self, database, chunk_interfaces=200, chunk_rows=5000, pause=0.005, interval=60):
+        self.database = database
+        self.chunk_interfaces = chunk_interfaces
+        self.chunk_rows = chunk_rows
+        self.pause = pause
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.files_purged = 0
+        self.rows_deleted = 0
+        self.transactions = 0
+        self.failed = 0
+
+    def start(self):
+        """启动后台清理线程（启动后立即清理一次遗留的墓碑）"""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='file-purge', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """有新的墓碑时调用，立即开始清理"""
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"清理已删除的文件失败: {type(e).__name__}: {e}")
+            self._wake.wait(self.interval)
+
+    def pending(self):
+        """等待清理的文件数"""
+        conn = db_pool.connect(self.database)
+        try:
+            return conn.execute(PENDING_COUNT_SQL).fetchone()[0]
+        finally:
+            conn.close()
+
+    def run_once(self):
+        """清理全部带墓碑的文件，返回清理的文件数"""
+        with self._lock:
+            conn = db_pool.connect(self.database)
+            try:
+                files = conn.execute(PENDING_FILES_SQL).fetchall()
+                for file_id, file_path in files:
+                    if self._stop.is_set():
+                        break
+                    self._purge_file(conn, file_id, file_path)
+                return len(files)
+            finally:
+                conn.close()
+
+    def _purge_file(self, conn, file_id, file_path):
+        started = time.perf_counter()
+        deleted = 0
+        while not self._stop.is_set():
+            interface_ids = [row[0] for row in conn.execute(FILE_INTERFACES_SQL, (file_id, self.chunk_interfaces))]
+            if not interface_ids:
+                break
+            for table in CHILD_TABLES:
+                # 单个接口可能有大量参数或日志，按行数分多个事务删除
+                sql = delete_children_sql(table, len(interface_ids))
+                while True:
+                    with conn:
+                        count = conn.execute(sql, interface_ids + [self.chunk_rows]).rowcount
+                    self._committed(count)
+                    deleted += count
+                    if count < self.chunk_rows:
+                        break
+                    self._yield()
+            with conn:
+                count = 0
+                for table in ('request_log_rollups', 'interfaces'):
+                    count += conn.execute(delete_interfaces_sql(table, len(interface_ids)), interface_ids).rowcount
+            self._committed(count)
+            deleted += count
+            self._yield()
+        if self._stop.is_set():
+            return
+
+        # 接口全部删除后移除上传的文件，最后删除文件记录（中途退出时下次启动继续清理）
+        if file_path:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除上传文件失败: {file_path}: {e}")
+        with conn:
+            conn.execute(DELETE_FILE_SQL, (file_id,))
+        self._committed(1)
+        self.files_purged += 1
+        logger.info(f"已清理文件 {file_id}，删除 {deleted + 1} 行，耗时 {time.perf_counter() - started:.3f}s")
+
+    def _committed(self, rows):
+        self.transactions += 1
+        self.rows_deleted += rows
+
+    def _yield(self):
+        # 两批之间暂停，让其他线程和进程获取写锁
+        if self.pause:
+            time.sleep(self.pause)
+
+    def stats(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'files_purged': self.files_purged,
+            'rows_deleted': self.rows_deleted,
+            'transactions': self.transactions,
+            'failed': self.failed
+        }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON序列化
+安装了orjson时使用orjson序列化全部JSON响应，否则退回标准库json；
+两种实现都直接输出UTF-8（不转义中文）、不带多余空格，日期等类型的格式与Flask默认实现一致
+"""
+
+import json
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+from metrics import JSON_BYTES
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 可选的序列化实现
+ENCODER_AUTO = 'auto'
+ENCODER_ORJSON = 'orjson'
+ENCODER_JSON = 'json'
+
+
+def resolve_encoder(name):
+    """根据配置选择序列化实现，orjson未安装时退回json"""
+    name = (name or ENCODER_AUTO).lower()
+    if name == ENCODER_JSON:
+        return ENCODER_JSON
+    if orjson is None:
+        if name == ENCODER_ORJSON:
+            logger.warning('配置了orjson但未安装，JSON序列化使用标准库json')
+        return ENCODER_JSON
+    return ENCODER_ORJSON
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON Provider
+    jsonify、app.json.dumps 都经过这里；orjson无法处理的数据（如超过64位的整数）自动退回标准库json
+    """
+
+    # 与 app.config['JSON_AS_ASCII'] = False 保持一致，输出中文原文
+    ensure_ascii = False
+    encoder = ENCODER_JSON
+
+    def __init__(self, app, encoder=ENCODER_AUTO):
+        super().__init__(app)
+        self.encoder = resolve_encoder(encoder)
+
+    def _orjson_option(self):
+        # 日期、dataclass交给default处理，保持与Flask默认实现相同的输出格式
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj, **kwargs):
+        """序列化为UTF-8字节，避免 str -> bytes 的再次编码"""
+        body = None
+        if self.encoder == ENCODER_ORJSON and not kwargs:
+            try:
+                body = orjson.dumps(obj, default=self.default, option=self._orjson_option())
+            except (orjson.JSONEncodeError, TypeError):
+                pass
+        if body is None:
+            body = self._dumps(obj, **kwargs).encode('utf-8')
+        JSON_BYTES.inc((), len(body))
+        return body
+
+    def dumps(self, obj, **kwargs):
+        text = self._dumps(obj, **kwargs)
+        # 按字符数计入序列化字节数（不再为统计重新编码）
+        JSON_BYTES.inc((), len(text))
+        return text
+
+    def _dumps(self, obj, **kwargs):
+        if self.encoder == ENCODER_ORJSON and not kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_option()).decode('utf-8')
+            except (orjson.JSONEncodeError, TypeError):
+                pass
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if kwargs.get('indent') is None:
+            # 与Flask的紧凑输出和orjson一致，响应内容（以及据此计算的ETag）不随序列化实现变化
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # 调试模式下保留Flask的缩进输出
+        if self.compact is False or (self.compact is None and self._app.debug):
+            body = self.dumps(obj, indent=2, separators=(', ', ': ')).encode('utf-8') + b'\n'
+        else:
+            body = self.dumps_bytes(obj) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
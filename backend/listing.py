@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件和接口列表的分页查询
+按 (排序字段, id) 做键集分页：游标保存上一页最后一行的排序值和id，下一页用 (字段, id) > (?, ?) 从索引中继续读取，
+每页的开销只与页大小有关，与表的总行数和翻页深度无关；同时支持过滤条件、排序方向和 fields= 字段投影
+"""
+
+import base64
+import json
+
+import db_pool
+from file_purge import LIVE_INTERFACE_CONDITION
+
+# 路径前缀过滤的上界：前缀后接最大的Unicode字符，与 path >= 前缀 组成索引上的范围查询
+_PREFIX_END = '\U0010ffff'
+
+
+class ListQueryError(ValueError):
+    """列表查询参数无效"""
+
+
+def _present(args, name):
+    value = args.get(name)
+    return value is not None and value != ''
+
+
+def _parse_int(name, value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ListQueryError(f'{name} 必须是整数')
+
+
+def _parse_bool(name, value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes'):
+        return True
+    if text in ('0', 'false', 'no'):
+        return False
+    raise ListQueryError(f'{name} 必须是 true 或 false')
+
+
+def encode_cursor(sort, order, value, last_id):
+    data = json.dumps([sort, order, value, last_id], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort, order):
+    """解析游标，返回 (排序值, id)；游标必须由相同的排序字段和方向生成"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ListQueryError('cursor 无效')
+    if cursor_sort != sort or cursor_order != order or not isinstance(last_id, int):
+        raise ListQueryError('cursor 与当前的 sort、order 参数不一致')
+    return value, last_id
+
+
+class Listing:
+    """
+    一种记录列表的查询定义
+    columns为 [(字段名, 转换函数)]，字段名即列名，转换函数为None时原样返回；
+    sort_fields为可排序的字段，每个字段都需要按 (字段, id) 有序的索引：普通索引隐含以rowid结尾，
+    带condition时也可以是同样条件的部分索引（索引由 db_migrations 创建，HOT_QUERIES 检查各字段后续页的查询计划）；
+    filters为 {参数名: (SQL条件, 参数解析函数)}，解析函数返回条件中各占位符的值；
+    condition为始终附加的条件（如排除已删除的记录）
+    """
+
+    def __init__(self, table, columns, sort_fields, filters, condition=None):
+        self.table = table
+        self.columns = columns
+        self.column_names = [name for name, _ in columns]
+        self.sort_fields = sort_fields
+        self.filters = filters
+        self.condition = condition
+
+    def _fields(self, args):
+        value = args.get('fields')
+        if value is None or value == '':
+            return self.column_names
+        names = value if isinstance(value, (list, tuple)) else str(value).split(',')
+        requested = {name.strip() for name in names if name and name.strip()}
+        unknown = requested - set(self.column_names)
+        if unknown:
+            raise ListQueryError(f"fields 包含未知字段: {', '.join(sorted(unknown))}，可用字段: {', '.join(self.column_names)}")
+        # 按定义的顺序输出
+        return [name for name in self.column_names if name in requested] or self.column_names
+
+    def _sort(self, args):
+        sort = args.get('sort') or 'id'
+        if sort not in self.sort_fields:
+            raise ListQueryError(f"sort 只能是: {', '.join(self.sort_fields)}")
+        order = str(args.get('order') or 'asc').lower()
+        if order not in ('asc', 'desc'):
+            raise ListQueryError('order 只能是 asc 或 desc')
+        return sort, order
+
+    def parse_limit(self, args, name, default_limit, max_limit):
+        """解析每页条数，超出上限时按上限返回"""
+        if not _present(args, name):
+            return default_limit
+        limit = _parse_int(name, args.get(name))
+        if limit < 1:
+            raise ListQueryError(f'{name} 必须大于0')
+        return min(limit, max_limit)
+
+    def build_query(self, args, limit=None, cursor=None):
+        """
+        按参数生成一页记录的查询，返回 (SQL, 参数)；limit、cursor的含义与fetch相同
+        （db_migrations.HOT_QUERIES 用它检查分页查询是否使用索引）
+        """
+        sql, params, _ = self._build(args, self._fields(args), *self._sort(args), limit, cursor)
+        return sql, params
+
+    def _build(self, args, fields, sort, order, limit, cursor):
+        conditions = [self.condition] if self.condition else []
+        params = []
+        for name, (condition, parse) in self.filters.items():
+            if _present(args, name):
+                conditions.append(condition)
+                params.extend(parse(name, args.get(name)))
+
+        cursor = args.get('cursor') if cursor is None else cursor
+        operator = '>' if order == 'asc' else '<'
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort, order)
+            if sort == 'id':
+                conditions.append(f'id {operator} ?')
+                params.append(last_id)
+            else:
+                conditions.append(f'({sort}, id) {operator} (?, ?)')
+                params.extend((value, last_id))
+
+        # 游标需要id和排序字段，即使不在投影的字段中也要查询
+        select = list(dict.fromkeys(['id', sort] + fields))
+        sql = f"SELECT {', '.join(select)} FROM {self.table}"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        direction = order.upper()
+        sql += f' ORDER BY {sort} {direction}' if sort == 'id' else f' ORDER BY {sort} {direction}, id {direction}'
+        if limit is not None:
+            # 多取一行判断是否还有下一页
+            sql += ' LIMIT ?'
+            params.append(limit + 1)
+        return sql, params, select
+
+    def fetch(self, database, args, limit=None, cursor=None):
+        """
+        按参数查询一页记录，返回 (记录列表, 下一页游标)；limit为None时返回全部记录，下一页游标为None
+        cursor为None时使用参数中的cursor
+        """
+        fields = self._fields(args)
+        sort, order = self._sort(args)
+        sql, params, select = self._build(args, fields, sort, order, limit, cursor)
+
+        conn = db_pool.connect(database)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, order, last[select.index(sort)], last[0])
+
+        converters = dict(self.columns)
+        indexes = [(name, select.index(name), converters[name]) for name in fields]
+        items = []
+        for row in rows:
+            item = {}
+            for name, index, convert in indexes:
+                value = row[index]
+                item[name] = convert(value) if convert is not None else value
+            items.append(item)
+        return items, next_cursor
+
+    def query(self, database, args, default_limit=100, max_limit=1000):
+        """
+        列表查询：参数中有limit或cursor时分页返回 {'items': [...], 'next_cursor': 游标或None, 'limit': 每页条数}，
+        否则返回全部记录的数组（与不分页的旧接口兼容）；过滤、排序和字段投影两种方式都支持
+        """
+        if not (_present(args, 'limit') or _present(args, 'cursor')):
+            return self.fetch(database, args)[0]
+        limit = self.parse_limit(args, 'limit', default_limit, max_limit)
+        items, next_cursor = self.fetch(database, args, limit)
+        return {'items': items, 'next_cursor': next_cursor, 'limit': limit}
+
+    def pages(self, database, args, page_size):
+        """按页依次返回全部记录，每页单独查询（不会长时间占用数据库连接）"""
+        cursor = args.get('cursor') or None
+        while True:
+            items, cursor = self.fetch(database, args, page_size, cursor or '')
+            yield items, cursor
+            if cursor is None:
+                return
+
+
+def _int_param(name, value):
+    return [_parse_int(name, value)]
+
+
+def _bool_param(name, value):
+    return [1 if _parse_bool(name, value) else 0]
+
+
+def _text_param(name, value):
+    return [str(value)]
+
+
+def _method_param(name, value):
+    return [str(value).upper()]
+
+
+def _prefix_param(name, value):
+    value = str(value)
+    return [value, value + _PREFIX_END]
+
+
+# 文件列表：已删除（等待后台清理）的文件不返回
+FILE_LISTING = Listing(
+    'interface_files',
+    [('id', None), ('filename', None), ('file_path', None), ('file_type', None), ('size', None),
+     ('uploaded_at', None), ('parsed', bool), ('parsed_interfaces', None), ('parsed_params', None),
+     ('parsed_responses', None)],
+    ('id', 'uploaded_at', 'filename'),
+    {
+        'file_id': ('id = ?', _int_param),
+        'file_type': ('file_type = ?', _text_param),
+        'parsed': ('parsed = ?', _bool_param),
+    },
+    condition='deleted_at IS NULL'
+)
+
+# 接口列表：已删除文件下的接口不返回
+INTERFACE_LISTING = Listing(
+    'interfaces',
+    [('id', None), ('name', None), ('path', None), ('method', None), ('description', None), ('file_id', None),
+     ('is_websocket', bool)],
+    ('id', 'path', 'name', 'method'),
+    {
+        'file_id': ('file_id = ?', _int_param),
+        'method': ('method = ?', _method_param),
+        'is_websocket': ('is_websocket = ?', _bool_param),
+        'path_prefix': ('path >= ? AND path < ?', _prefix_param),
+    },
+    condition=LIVE_INTERFACE_CONDITION
+)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标
+进程内的计数器、仪表和直方图，按Prometheus文本格式从 /metrics 输出。
+计数时每个线程固定使用一个分片（按线程首次计数的顺序轮流分配），每个分片一把锁，
+请求线程之间几乎不会争用同一把锁；输出时再合并各分片
+"""
+
+import abc
+import bisect
+import itertools
+import sqlite3
+import threading
+import time
+
+import config
+
+# 是否启用指标统计，关闭后计数和观测调用直接返回
+enabled = getattr(config, 'METRICS_ENABLED', True)
+
+# 每个指标的分片数
+SHARDS = 16
+
+# 默认的耗时直方图桶（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 文件解析耗时的直方图桶（秒），OCR等操作可能需要数十秒
+PARSE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# 上传文件大小的直方图桶（字节）
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 5242880, 10485760, 52428800)
+
+_registry = []
+
+# 当前线程使用的分片序号
+_local = threading.local()
+_shard_counter = itertools.count()
+
+
+def _shard_index():
+    try:
+        return _local.shard
+    except AttributeError:
+        _local.shard = next(_shard_counter) % SHARDS
+        return _local.shard
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = [(threading.Lock(), {}) for _ in range(SHARDS)]
+        _registry.append(self)
+
+    def _shard(self):
+        return self._shards[_shard_index()]
+
+    @abc.abstractmethod
+    def _merged(self):
+        """合并各分片，返回 标签值 -> 数据"""
+
+    @abc.abstractmethod
+    def _render_samples(self):
+        """输出各组标签的样本行"""
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        if not enabled:
+            return
+        lock, values = self._shard()
+        with lock:
+            values[labels] = values.get(labels, 0) + amount
+
+    def _merged(self):
+        merged = {}
+        for lock, values in self._shards:
+            with lock:
+                items = list(values.items())
+            for labels, value in items:
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def value(self, labels=()):
+        return self._merged().get(labels, 0)
+
+    def _render_samples(self):
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+                for labels, value in sorted(self._merged().items())]
+
+
+class Gauge(_Metric):
+    """可增可减的仪表；指定callback时输出时调用callback()取值（无标签）"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def inc(self, labels=(), amount=1):
+        lock, values = self._shard()
+        with lock:
+            values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def _merged(self):
+        if self.callback is not None:
+            return {(): self.callback()}
+        return Counter._merged(self)
+
+    def _render_samples(self):
+        return Counter._render_samples(self)
+
+
+class Histogram(_Metric):
+    """直方图：每组标签记录各桶的计数、观测值合计和观测次数"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels, value):
+        if not enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        lock, values = self._shard()
+        with lock:
+            item = values.get(labels)
+            if item is None:
+                # [各桶计数..., 超出最大桶的计数, 合计, 次数]
+                item = values[labels] = [0] * (len(self.buckets) + 3)
+            item[index] += 1
+            item[-2] += value
+            item[-1] += 1
+
+    def _merged(self):
+        merged = {}
+        for lock, values in self._shards:
+            with lock:
+                items = [(labels, list(item)) for labels, item in values.items()]
+            for labels, item in items:
+                target = merged.get(labels)
+                if target is None:
+                    merged[labels] = item
+                else:
+                    for i, value in enumerate(item):
+                        target[i] += value
+        return merged
+
+    def _render_samples(self):
+        lines = []
+        for labels, item in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), item):
+                cumulative += count
+                bucket_label = f'le="{_format_value(float(bound))}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(round(item[-2], 6))}')
+            lines.append(f'{self.name}_count{label_text} {item[-1]}')
+        return lines
+
+
+class LabelLimiter:
+    """
+    限制标签值的个数：最先出现的limit个值原样使用，其余归为other，避免标签值无限增长；
+    limit为0时全部归为other
+    """
+
+    OTHER = 'other'
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._values = set()
+        self._lock = threading.Lock()
+
+    def label(self, value):
+        if value in self._values:
+            return value
+        with self._lock:
+            if value in self._values:
+                return value
+            if len(self._values) >= self.limit:
+                return self.OTHER
+            self._values.add(value)
+            return value
+
+
+def render():
+    """输出全部指标的Prometheus文本格式"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ---------- 指标定义 ----------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'HTTP请求处理耗时（到返回响应头为止）', ('method', 'endpoint', 'status'))
+MOCK_REQUEST_SECONDS = Histogram(
+    'mock_request_duration_seconds', 'Mock请求处理耗时（不含注入的延迟）', ('transport', 'interface_id'))
+DB_QUERIES = Counter('sqlite_queries_total', 'SQLite语句执行次数', ('operation',))
+DB_QUERY_SECONDS = Counter('sqlite_query_seconds_total', 'SQLite语句执行耗时合计', ('operation',))
+DB_CONNECTIONS_OPENED = Counter('sqlite_connections_opened_total', '打开的SQLite连接数（连接池复用的连接不计入）')
+MOCK_ROWS = Counter('mock_rows_generated_total', '生成的Mock数据行数', ('source',))
+JSON_BYTES = Counter('json_serialized_bytes_total', '序列化输出的JSON字节数')
+UPLOAD_BYTES = Histogram('file_upload_bytes', '上传文件大小', ('file_type',), buckets=SIZE_BUCKETS)
+PARSE_SECONDS = Histogram('file_parse_duration_seconds', '文件解析总耗时', ('file_type',), buckets=PARSE_BUCKETS)
+EXTRACT_SECONDS = Histogram(
+    'file_extract_duration_seconds', '从文件中提取文本的耗时（PDF、Office文档解析和图片OCR）', ('file_type',),
+    buckets=PARSE_BUCKETS)
+# Mock请求耗时按接口id区分的接口数上限
+MOCK_INTERFACE_LABELS = LabelLimiter(getattr(config, 'METRICS_MOCK_INTERFACE_LABELS', 100))
+SOCKETIO_CONNECTIONS = Gauge('socketio_connections', '当前Socket.IO连接数')
+SOCKETIO_EVENTS = Counter('socketio_events_total', '收到的Socket.IO事件数', ('event',))
+THREADS = Gauge('process_threads', '进程中的线程数', callback=threading.active_count)
+
+
+def file_type_label(file_name):
+    """文件扩展名作为标签值，不在支持列表中的归为other，避免标签值无限增长"""
+    ext = file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else ''
+    return ext if '.' + ext in config.SUPPORTED_FILE_TYPES else 'other'
+
+
+# ---------- SQLite ----------
+
+def _sql_operation(sql):
+    # 语句的第一个关键字作为标签值（SELECT、INSERT、UPDATE等）
+    head = sql.lstrip()[:10].split(None, 1)
+    return head[0].upper() if head else 'UNKNOWN'
+
+
+class MeteredCursor(sqlite3.Cursor):
+    """统计语句执行次数和耗时的游标（只统计execute本身，不含逐行fetch）"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            operation = _sql_operation(sql)
+            DB_QUERIES.inc((operation,))
+            DB_QUERY_SECONDS.inc((operation,), time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            operation = _sql_operation(sql)
+            DB_QUERIES.inc((operation,))
+            DB_QUERY_SECONDS.inc((operation,), time.perf_counter() - started)
+
+
+class MeteredConnection(sqlite3.Connection):
+    """cursor() 和 execute() 都使用 MeteredCursor 的连接"""
+
+    def cursor(self, factory=MeteredCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量Mock请求的并行生成
+批量请求中行数较多的项交给子进程生成并序列化为JSON，绕过GIL利用多核；
+子进程中只用到本模块和 mock_generator，生成结果以JSON字节返回，减少进程间传输的开销
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from mock_generator import MockPlan
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 子进程内按响应字段缓存的生成计划
+_plans = {}
+
+
+def generate_rows_json(response_fields, count, full_path, seed=None):
+    """在子进程中生成Mock数据行并序列化为JSON字节（键排序、紧凑格式，与FastJSONProvider的输出一致）"""
+    key = tuple(response_fields)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = MockPlan(response_fields)
+    rows = plan.generate_rows(count, full_path, seed=seed)
+    if orjson is not None:
+        try:
+            return orjson.dumps(rows, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+    return json.dumps(rows, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _mp_context():
+    """
+    子进程的启动方式：支持时使用forkserver，否则（Windows）使用spawn
+    不使用fork：服务进程中有后台线程和连接池，fork出的子进程会复制其中持有的锁
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+class BatchExecutor:
+    """
+    批量生成用的进程池，workers为1时不使用进程池，为None时使用CPU核数
+    首次使用时才创建；子进程启动时会重新导入一次主模块（只执行模块级的初始化，后台线程在 __main__ 中启动，不会运行）
+    """
+
+    def __init__(self, workers=1):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.workers > 1
+
+    def submit(self, response_fields, count, full_path, seed=None):
+        """提交一个生成任务，返回Future，结果为JSON数组的字节"""
+        return self._get_executor().submit(generate_rows_json, list(response_fields), count, full_path, seed)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                context = _mp_context()
+                logger.info(f"创建批量Mock生成进程池，进程数: {self.workers}，启动方式: {context.get_start_method()}")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
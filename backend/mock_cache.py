@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mock响应缓存
+缓存指定了seed的确定性Mock响应（序列化后的字节），按总字节数上限做LRU淘汰
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def make_etag(body):
+    """根据响应内容生成强ETag（不含引号）"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU响应缓存
+    键为 (接口id, 行数, seed, 配置版本)，值为 (响应字节, ETag)
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        # 单个响应超过该大小时不缓存，避免一个大响应把缓存清空
+        self.max_item_bytes = max_bytes // 8
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, body):
+        """缓存响应，返回 (响应字节, ETag)"""
+        item = (body, make_etag(body))
+        size = len(body)
+        if size > self.max_item_bytes:
+            self.rejected += 1
+            return item
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old[0])
+            self._items[key] = item
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._items:
+                _, (evicted, _) = self._items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+        return item
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._items),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'rejected': self.rejected
+            }
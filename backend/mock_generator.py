@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mock数据生成
+将接口的响应字段预先编译为生成计划（每个字段绑定一个按列取值的函数），
+避免每生成一个值都走一遍类型判断
+"""
+
+import json
+import random
+import re
+import string
+import struct
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import config
+from metrics import MOCK_ROWS
+from request_budget import budget_scope, charge_rows, check_budget
+
+# NumPy为可选依赖，未安装时大批量生成退回纯Python实现
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STRING_LENGTH = 10
+
+# 行数达到该值时使用NumPy按列批量生成
+BULK_THRESHOLD = getattr(config, 'MOCK_BULK_THRESHOLD', 10000)
+
+# 行拼装时每批转换的行数
+CHUNK_ROWS = 1000
+
+# 估算单行JSON大小时生成的样本行数
+SAMPLE_ROWS = 8
+
+# 嵌套数组的长度范围
+ARRAY_MIN_LENGTH = getattr(config, 'MOCK_ARRAY_MIN_LENGTH', 1)
+ARRAY_MAX_LENGTH = getattr(config, 'MOCK_ARRAY_MAX_LENGTH', 3)
+
+# 随机字节 -> 英文字母的映射表，一次translate即可把随机字节转换为字母；
+# 只使用 0~207（52的整数倍）的字节，208~255 在translate时丢弃（拒绝采样），保证52个字母的概率相同
+_LETTER_TABLE = bytes(string.ascii_letters.encode('ascii')[i % 52] for i in range(256))
+_LETTER_REJECT = bytes(range(52 * (256 // 52), 256))
+
+# 指定seed时日期类型字段的取值范围：固定起始日期之后的若干天，由随机数生成器选取，
+# 不依赖当天日期，相同seed每天生成的数据相同；未指定seed时仍为当天日期
+DATE_EPOCH = date(2020, 1, 1)
+DATE_DAYS = 366 * 5
+_DATES = [(DATE_EPOCH + timedelta(days=i)).isoformat() for i in range(DATE_DAYS)]
+
+# 默认结构中指定seed时时间戳的起点（UTC 2020-09-13 12:26:40，即Unix时间1600000000，与所在时区无关）
+TIMESTAMP_EPOCH = datetime(2020, 9, 13, 12, 26, 40)
+
+# 每个线程独立的随机数生成器，避免多线程争用全局random的锁
+_local = threading.local()
+
+
+def get_rng():
+    """获取当前线程的随机数生成器"""
+    rng = getattr(_local, 'rng', None)
+    if rng is None:
+        rng = _local.rng = random.Random()
+    return rng
+
+
+def get_numpy_rng():
+    """获取当前线程的NumPy随机数生成器"""
+    rng = getattr(_local, 'numpy_rng', None)
+    if rng is None:
+        rng = _local.numpy_rng = np.random.default_rng()
+    return rng
+
+
+def _is_unseeded(rng):
+    """rng是否为当前线程共用的生成器（未指定seed）；指定seed时RandomSource会创建独立的生成器"""
+    return rng is getattr(_local, 'rng', None) or rng is getattr(_local, 'numpy_rng', None)
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+# ---------- 各类型按列取值的函数：(随机数生成器, 行数) -> 值列表 ----------
+
+def _random_letters(rng, length):
+    """生成length个均匀分布的随机字母"""
+    letters = b''
+    while len(letters) < length:
+        # 约19%的字节被丢弃，多取一些，通常一次即可
+        need = length - len(letters)
+        letters += rng.randbytes(need + need // 4 + 8).translate(_LETTER_TABLE, _LETTER_REJECT)
+    return letters[:length].decode('ascii')
+
+
+def _mock_string(rng, count):
+    # 一次生成所有行的随机字母，再按固定长度切片
+    letters = _random_letters(rng, STRING_LENGTH * count)
+    return [letters[i:i + STRING_LENGTH] for i in range(0, STRING_LENGTH * count, STRING_LENGTH)]
+
+
+def _random_uints(rng, count):
+    """一次生成count个32位无符号整数；按固定的小端字节序解码，相同seed在任何平台上生成相同的数据"""
+    return struct.unpack(f'<{count}I', rng.randbytes(count * 4))
+
+
+def _mock_int(rng, count):
+    return [value % 1001 for value in _random_uints(rng, count)]
+
+
+def _mock_boolean(rng, count):
+    return [byte < 128 for byte in rng.randbytes(count)]
+
+
+def _mock_float(rng, count):
+    # 0~1000之间、保留两位小数
+    return [value % 100001 / 100 for value in _random_uints(rng, count)]
+
+
+def _mock_date(rng, count):
+    if _is_unseeded(rng):
+        return [_today()] * count
+    dates = _DATES
+    return [dates[value % DATE_DAYS] for value in _random_uints(rng, count)]
+
+
+def _mock_list(rng, count):
+    randint = rng.randint
+    return [_mock_string(rng, randint(1, 5)) for _ in range(count)]
+
+
+def _mock_map(rng, count):
+    randint = rng.randint
+    result = []
+    for _ in range(count):
+        size = randint(1, 3)
+        result.append(dict(zip(_mock_string(rng, size), _mock_string(rng, size))))
+    return result
+
+
+def _mock_default(rng, count):
+    return ['mock_value'] * count
+
+
+# 字段类型 -> 取值函数
+TYPE_PRODUCERS = {}
+for _names, _producer in (
+    (['java.lang.String', 'string', 'java.lang.Object'], _mock_string),
+    (['java.lang.Integer', 'int', 'java.lang.Long', 'long', 'integer'], _mock_int),
+    (['java.lang.Boolean', 'boolean'], _mock_boolean),
+    (['java.lang.Double', 'double', 'java.lang.Float', 'float', 'java.math.BigDecimal', 'decimal', 'number'], _mock_float),
+    (['java.util.Date', 'date', 'java.time.LocalDate'], _mock_date),
+    (['java.util.List', 'list', 'java.util.ArrayList'], _mock_list),
+    (['java.util.Map', 'map', 'java.util.HashMap'], _mock_map),
+):
+    for _name in _names:
+        TYPE_PRODUCERS[_name] = _producer
+
+
+def get_producer(field_type):
+    """根据字段类型获取取值函数"""
+    return TYPE_PRODUCERS.get(field_type, _mock_default)
+
+
+# ---------- NumPy按列批量取值的函数：(NumPy随机数生成器, 行数) -> ndarray ----------
+
+if np is not None:
+    _LETTER_ARRAY = np.frombuffer(string.ascii_letters.encode('ascii'), dtype=np.uint8)
+    _DATE_ARRAY = np.array(_DATES)
+
+    def _bulk_string(nrng, count):
+        # 从随机字节缓冲区中按固定长度切分出字符串
+        letters = _LETTER_ARRAY[nrng.integers(0, 52, size=count * STRING_LENGTH, dtype=np.uint8)]
+        return letters.view(f'S{STRING_LENGTH}').astype(f'U{STRING_LENGTH}')
+
+    def _bulk_int(nrng, count):
+        return nrng.integers(0, 1001, size=count)
+
+    def _bulk_boolean(nrng, count):
+        return nrng.integers(0, 2, size=count, dtype=np.uint8).astype(bool)
+
+    def _bulk_float(nrng, count):
+        return nrng.integers(0, 100001, size=count) / 100
+
+    def _bulk_date(nrng, count):
+        if _is_unseeded(nrng):
+            return np.full(count, _today())
+        return _DATE_ARRAY[nrng.integers(0, DATE_DAYS, size=count)]
+
+    BULK_PRODUCERS = {}
+    for _names, _producer in (
+        (['java.lang.String', 'string', 'java.lang.Object'], _bulk_string),
+        (['java.lang.Integer', 'int', 'java.lang.Long', 'long', 'integer'], _bulk_int),
+        (['java.lang.Boolean', 'boolean'], _bulk_boolean),
+        (['java.lang.Double', 'double', 'java.lang.Float', 'float', 'java.math.BigDecimal', 'decimal', 'number'], _bulk_float),
+        (['java.util.Date', 'date', 'java.time.LocalDate'], _bulk_date),
+    ):
+        for _name in _names:
+            BULK_PRODUCERS[_name] = _producer
+else:
+    BULK_PRODUCERS = {}
+
+
+# ---------- 嵌套结构：由扁平的响应字段名重建的结构树 ----------
+
+# 字段名中的分隔符：a.b 表示对象属性，a[b 表示对象数组中元素的属性（与async_parser的展开规则一致）
+_FIELD_NAME_SEPARATOR = re.compile(r'([.\[])')
+
+
+class _LeafNode:
+    __slots__ = ('producer',)
+
+    def __init__(self, producer):
+        self.producer = producer
+
+    def generate(self, source, count):
+        return self.producer(source.rng, count)
+
+
+class _ObjectNode:
+    __slots__ = ('children',)
+
+    def __init__(self):
+        # 属性名 -> 子节点，保持字段定义的顺序
+        self.children = {}
+
+    def generate(self, source, count):
+        names = list(self.children)
+        columns = [child.generate(source, count) for child in self.children.values()]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def container(self, key, is_array):
+        """获取（必要时创建）下一层的对象节点，is_array表示key是对象数组"""
+        child = self.children.get(key)
+        if is_array:
+            if not (isinstance(child, _ArrayNode) and isinstance(child.item, _ObjectNode)):
+                child = self.children[key] = _ArrayNode(_ObjectNode())
+            return child.item
+        if not isinstance(child, _ObjectNode):
+            child = self.children[key] = _ObjectNode()
+        return child
+
+    def set_leaf(self, key, node):
+        # 已经作为对象或数组展开的字段不再被叶子字段覆盖
+        if key not in self.children:
+            self.children[key] = node
+
+
+class _ArrayNode:
+    __slots__ = ('item',)
+
+    def __init__(self, item):
+        self.item = item
+
+    def generate(self, source, count):
+        # 先确定每行的数组长度，再一次性生成所有元素并切分，保证每个叶子值的开销与扁平字段相同
+        randint = source.rng.randint
+        lengths = [randint(ARRAY_MIN_LENGTH, ARRAY_MAX_LENGTH) for _ in range(count)]
+        items = iter(self.item.generate(source, sum(lengths)))
+        return [list(islice(items, length)) for length in lengths]
+
+
+def _leaf_for(field_type):
+    """array[xxx] 类型生成对应元素类型的数组，其余类型生成单个值"""
+    if field_type.startswith('array[') and field_type.endswith(']'):
+        return _ArrayNode(_LeafNode(get_producer(field_type[6:-1])))
+    return _LeafNode(get_producer(field_type))
+
+
+def is_nested(response_fields):
+    """响应字段中是否包含嵌套对象、对象数组或类型化数组"""
+    return any('.' in name or '[' in name or field_type.startswith('array[')
+               for name, field_type in response_fields)
+
+
+def build_schema_tree(response_fields):
+    """将 data.items[id 这类扁平字段名重建为结构树"""
+    root = _ObjectNode()
+    for name, field_type in response_fields:
+        parts = _FIELD_NAME_SEPARATOR.split(name)
+        node = root
+        # parts形如 ['data', '.', 'items', '[', 'id']，键与分隔符交替出现
+        for i in range(0, len(parts) - 1, 2):
+            node = node.container(parts[i], parts[i + 1] == '[')
+        node.set_leaf(parts[-1], _leaf_for(field_type))
+    return root
+
+
+class MockColumns:
+    """
+    按列存放的Mock数据
+    列可以是list或NumPy数组，迭代时才分批拼装为行（dict），避免一次性占用大量内存；
+    names为None时columns只有一列，存放的就是已拼装好的行
+    """
+
+    __slots__ = ('names', 'columns', 'count')
+
+    def __init__(self, names, columns, count):
+        self.names = names
+        self.columns = columns
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def iter_chunks(self, chunk_rows=CHUNK_ROWS):
+        """按批次返回行列表"""
+        names = self.names
+        for start in range(0, self.count, chunk_rows):
+            # 每批拼装前检查当前请求是否已超时
+            check_budget()
+            end = min(start + chunk_rows, self.count)
+            if names is None:
+                yield self.columns[0][start:end]
+                continue
+            # 按列填充各行的dict，比逐行 dict(zip(...)) 少创建每行的元组
+            rows = [{} for _ in range(end - start)]
+            for name, column in zip(names, self.columns):
+                part = column[start:end]
+                if hasattr(part, 'tolist'):
+                    part = part.tolist()
+                for row, value in zip(rows, part):
+                    row[name] = value
+            yield rows
+
+    def __iter__(self):
+        for rows in self.iter_chunks():
+            yield from rows
+
+
+def generate_mock_value(field_type):
+    """生成单个Mock值"""
+    return get_producer(field_type)(get_rng(), 1)[0]
+
+
+def row_seed(seed, index):
+    """由接口seed和行号派生出单行的seed"""
+    return (seed * 0x9E3779B97F4A7C15 + index) & 0xFFFFFFFFFFFFFFFF
+
+
+class RandomSource:
+    """
+    随机数来源
+    seed为None时使用当前线程的生成器；指定seed时创建独立的生成器，相同seed生成相同的数据
+    """
+
+    __slots__ = ('seed', 'rng', '_numpy_rng')
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.rng = get_rng() if seed is None else random.Random(seed)
+        self._numpy_rng = None
+
+    @property
+    def numpy_rng(self):
+        if self._numpy_rng is None:
+            if self.seed is None:
+                self._numpy_rng = get_numpy_rng()
+            else:
+                # NumPy的seed不能为负数
+                self._numpy_rng = np.random.default_rng(self.seed & 0xFFFFFFFFFFFFFFFF)
+        return self._numpy_rng
+
+
+class MockPlan:
+    """
+    接口的Mock生成计划
+    由响应字段编译而来，随路由表中的接口一起缓存，响应字段变化时重新编译
+    """
+
+    __slots__ = ('names', 'producers', 'bulk_producers', 'tree', '_row_bytes')
+
+    def __init__(self, response_fields):
+        self.names = [name for name, _ in response_fields]
+        self.producers = [get_producer(field_type) for _, field_type in response_fields]
+        # 没有NumPy实现的类型（list、map等）为None，批量生成时退回纯Python实现
+        self.bulk_producers = [BULK_PRODUCERS.get(field_type) for _, field_type in response_fields]
+        # 包含嵌套字段时预先重建结构树，生成时直接按树输出嵌套对象和数组
+        self.tree = build_schema_tree(response_fields) if is_nested(response_fields) else None
+        self._row_bytes = None
+
+    def generate_columns(self, count, full_path, bulk=None, seed=None, source=None):
+        """
+        按列生成Mock数据，返回MockColumns
+        bulk为None时，行数达到BULK_THRESHOLD且已安装NumPy则自动使用NumPy批量生成；
+        指定seed（或传入同一个source）时生成结果是确定的
+        """
+        count = max(count, 0)
+        # 生成前先向当前请求的预算登记行数，超出预算时不再生成
+        charge_rows(count)
+        MOCK_ROWS.inc(('generated',), count)
+        if source is None:
+            source = RandomSource(seed)
+        rng = source.rng
+        if not self.names:
+            rows = [self._default_row(source, full_path) for _ in range(count)]
+            return MockColumns(None, [rows], count)
+        if self.tree is not None:
+            return MockColumns(None, [self.tree.generate(source, count)], count)
+        if bulk is None:
+            bulk = np is not None and count >= BULK_THRESHOLD
+        columns = []
+        if bulk:
+            nrng = source.numpy_rng
+            for producer, bulk_producer in zip(self.producers, self.bulk_producers):
+                columns.append(bulk_producer(nrng, count) if bulk_producer else producer(rng, count))
+        else:
+            columns = [producer(rng, count) for producer in self.producers]
+        return MockColumns(self.names, columns, count)
+
+    def estimate_row_bytes(self, full_path=''):
+        """用固定seed生成少量样本行，估算单行序列化为JSON后的字节数（结果缓存在计划中）"""
+        if self._row_bytes is None:
+            # 样本行不计入当前请求的预算
+            with budget_scope(None):
+                rows = list(self.generate_columns(SAMPLE_ROWS, full_path, bulk=False, source=RandomSource(0)))
+            body = json.dumps(rows, ensure_ascii=False, separators=(',', ':'), default=str)
+            self._row_bytes = max(len(body.encode('utf-8')) // SAMPLE_ROWS, 1)
+        return self._row_bytes
+
+    def generate_rows(self, count, full_path, seed=None):
+        """生成Mock数据行列表"""
+        return list(self.generate_columns(count, full_path, seed=seed))
+
+    def generate_page(self, start, count, full_path, seed):
+        """
+        生成分页数据中的一段行：第i行只由 (seed, i) 决定，
+        与页大小无关，翻页时只生成当前页
+        """
+        rows = []
+        for index in range(start, start + count):
+            source = RandomSource(row_seed(seed, index))
+            rows.extend(self.generate_columns(1, full_path, bulk=False, source=source))
+        return rows
+
+    def iter_chunks(self, count, full_path, chunk_rows=CHUNK_ROWS, seed=None, bulk=None):
+        """
+        逐批生成Mock数据行，每批单独生成，内存占用与总行数无关
+        bulk为None时按总行数（而不是每批的行数）决定是否使用NumPy批量生成
+        """
+        if bulk is None:
+            bulk = np is not None and count >= BULK_THRESHOLD
+        source = RandomSource(seed)
+        for start in range(0, max(count, 0), chunk_rows):
+            rows = min(chunk_rows, count - start)
+            yield from self.generate_columns(rows, full_path, bulk=bulk, source=source).iter_chunks(rows)
+
+    @staticmethod
+    def _default_row(source, full_path):
+        # 如果没有响应字段，生成默认的mock数据
+        rng = source.rng
+        if source.seed is None:
+            row_id = uuid.uuid4()
+            timestamp = datetime.now()
+        else:
+            # 指定seed时id和时间戳也由随机数生成器产生，保证结果可重复
+            row_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+            timestamp = TIMESTAMP_EPOCH + timedelta(seconds=rng.randrange(200000000))
+        return {
+            'id': str(row_id),
+            'message': f'Success response from {full_path}',
+            'status': 'success',
+            'timestamp': timestamp.isoformat(),
+            'random_data': _mock_string(rng, 1)[0],
+            'random_number': _mock_int(rng, 1)[0],
+            'random_boolean': _mock_boolean(rng, 1)[0],
+        }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点接口的Mock数据预生成池
+后台线程统计各接口的请求频率，为请求频繁的接口维护一个预先生成好的数据行环形缓冲区，
+请求时直接从池中取一段连续的行，生成数据的开销不再计入请求耗时
+"""
+
+import logging
+import random
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class _RowPool:
+    """单个接口的数据行环形缓冲区"""
+
+    __slots__ = ('version', 'rows', 'cursor', 'target')
+
+    def __init__(self, version, rows, target):
+        # 生成时接口的配置版本，接口响应字段或Mock配置变化后版本号不同，整个池作废
+        self.version = version
+        self.rows = rows
+        # 下一次刷新的起始位置
+        self.cursor = 0
+        self.target = target
+
+
+class MockPoolManager:
+    """
+    预生成池管理器
+    请求只做计数和取数据，池的创建、扩容、刷新和回收都在后台线程中完成；
+    同时保留的池最多max_pools个，超出时回收最久未被取用的池
+    """
+
+    def __init__(self, route_table, interval=0.5, hot_rps=5, min_rows=100, max_rows=10000,
+                 window_seconds=2, refill_rows=1000, decay=0.5, max_pools=64):
+        self.route_table = route_table
+        self.interval = interval
+        # 请求频率（次/秒）达到该值时才为接口建池
+        self.hot_rps = hot_rps
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        # 池的目标行数 = 请求频率 * 平均每次的行数 * window_seconds
+        self.window_seconds = window_seconds
+        # 每个周期最多重新生成的行数，池中的数据会逐步被替换为新数据
+        self.refill_rows = refill_rows
+        # 请求频率滑动平均的衰减系数
+        self.decay = decay
+        self.max_pools = max_pools
+        # interface_id -> _RowPool，按最近取用的顺序排列（最久未取用的在前）
+        self._pools = OrderedDict()
+        # 当前周期的请求次数和请求行数：interface_id -> [次数, 行数]
+        self._hits = {}
+        # 请求频率和平均行数的滑动平均：interface_id -> [次/秒, 行/次]
+        self._rates = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        # 以下计数都在 _lock 中更新
+        self.served = 0
+        self.missed = 0
+        self.evictions = 0
+
+    # ---------- 请求路径 ----------
+
+    def take(self, entry, count):
+        """
+        记录一次请求，并尝试从池中取count行数据
+        池不存在、已过期或行数不足时返回None，由调用方自行生成
+        """
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            hits = self._hits.get(entry.interface_id)
+            if hits is None:
+                self._hits[entry.interface_id] = [1, count]
+            else:
+                hits[0] += 1
+                hits[1] += count
+
+            pool = self._pools.get(entry.interface_id)
+            if pool is None or pool.version != entry.version or count > len(pool.rows):
+                self.missed += 1
+                return None
+            self._pools.move_to_end(entry.interface_id)
+            self.served += 1
+            rows = pool.rows
+        size = len(rows)
+        start = random.randrange(size)
+        end = start + count
+        if end <= size:
+            return rows[start:end]
+        return rows[start:] + rows[:end - size]
+
+    # ---------- 后台线程 ----------
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='mock-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refill_once()
+            except Exception as e:
+                logger.error(f'刷新Mock预生成池失败: {type(e).__name__}: {e}')
+
+    def refill_once(self):
+        """更新请求频率，并按频率创建、调整、刷新或回收各接口的池"""
+        with self._lock:
+            hits, self._hits = self._hits, {}
+
+        for interface_id in set(self._rates) | set(hits):
+            requests, rows = hits.get(interface_id, (0, 0))
+            rate = self._rates.get(interface_id)
+            current_rps = requests / self.interval
+            if rate is None:
+                rate = self._rates[interface_id] = [current_rps, rows / requests if requests else 0]
+            else:
+                rate[0] = rate[0] * self.decay + current_rps * (1 - self.decay)
+                if requests:
+                    rate[1] = rate[1] * self.decay + rows / requests * (1 - self.decay)
+
+            entry = self.route_table.get(interface_id)
+            if entry is None or rate[0] < self.hot_rps or not self._poolable(entry):
+                with self._lock:
+                    self._pools.pop(interface_id, None)
+                if rate[0] < 0.01:
+                    del self._rates[interface_id]
+                continue
+
+            target = int(rate[0] * max(rate[1], 1) * self.window_seconds)
+            target = min(max(target, self.min_rows), self.max_rows)
+            self._refill(entry, target)
+
+    @staticmethod
+    def _poolable(entry):
+        # 只缓存与请求路径无关的数据：没有响应字段时默认数据包含请求路径，不能复用
+        return entry.mock_enabled and bool(entry.response_fields)
+
+    def _refill(self, entry, target):
+        pool = self._pools.get(entry.interface_id)
+        if pool is None or pool.version != entry.version:
+            rows = entry.plan.generate_rows(target, entry.path)
+            self._install(entry.interface_id, _RowPool(entry.version, rows, target))
+            return
+
+        pool.target = target
+        size = len(pool.rows)
+        if size < target:
+            # 扩容：生成新的列表后整体替换，请求线程始终看到完整的池
+            pool.rows = pool.rows + entry.plan.generate_rows(target - size, entry.path)
+            return
+        if size > target:
+            pool.rows = pool.rows[:target]
+            pool.cursor = 0
+            return
+
+        # 行数已满足时，从cursor开始替换一段旧数据，使池中的数据持续变化
+        count = min(self.refill_rows, size)
+        fresh = entry.plan.generate_rows(count, entry.path)
+        start = pool.cursor
+        end = start + count
+        if end <= size:
+            pool.rows[start:end] = fresh
+        else:
+            pool.rows[start:] = fresh[:size - start]
+            pool.rows[:end - size] = fresh[size - start:]
+        pool.cursor = end % size
+
+    def _install(self, interface_id, pool):
+        """加入新建的池，超过max_pools时回收最久未被取用的池"""
+        with self._lock:
+            self._pools[interface_id] = pool
+            self._pools.move_to_end(interface_id)
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+                self.evictions += 1
+
+    # ---------- 统计 ----------
+
+    def stats(self):
+        with self._lock:
+            pool_rows = {interface_id: len(pool.rows) for interface_id, pool in self._pools.items()}
+            served, missed, evictions = self.served, self.missed, self.evictions
+        lookups = served + missed
+        return {
+            'pools': len(pool_rows),
+            'max_pools': self.max_pools,
+            'rows': sum(pool_rows.values()),
+            'served': served,
+            'missed': missed,
+            'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            'evictions': evictions,
+            'interfaces': {
+                interface_id: {
+                    'requests_per_second': round(rate[0], 2),
+                    'rows_per_request': round(rate[1], 2),
+                    'pool_rows': pool_rows.get(interface_id, 0)
+                }
+                for interface_id, rate in list(self._rates.items())
+            }
+        }
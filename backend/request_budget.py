@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求的时间和资源预算
+每个请求创建一个RequestBudget，限定截止时间、生成的行数和输出的字节数；
+Mock生成和文件解析的循环中主动检查预算，超出时抛出BudgetExceeded，由调用方返回明确的错误。
+当前预算保存在contextvars中，线程和asyncio任务互不影响，也不依赖SIGALRM（Windows和非主线程同样可用）
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+# 超出的资源类型
+RESOURCE_TIME = 'time'
+RESOURCE_ROWS = 'rows'
+RESOURCE_BYTES = 'bytes'
+
+_current = contextvars.ContextVar('request_budget', default=None)
+
+
+class BudgetExceeded(Exception):
+    """请求超出时间或资源预算"""
+
+    def __init__(self, message, resource):
+        super().__init__(message)
+        self.resource = resource
+
+    @property
+    def status(self):
+        # 超时返回503，数据量超限返回413
+        return 503 if self.resource == RESOURCE_TIME else 413
+
+    def payload(self):
+        return {
+            'code': self.status,
+            'message': str(self),
+            'data': None
+        }
+
+
+class RequestBudget:
+    """
+    单个请求的预算
+    timeout、max_rows、max_bytes为None时对应的项不限制
+    """
+
+    __slots__ = ('timeout', 'deadline', 'max_rows', 'max_bytes', 'rows', 'bytes')
+
+    def __init__(self, timeout=None, max_rows=None, max_bytes=None):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+
+    def remaining(self):
+        """剩余时间（秒），不限时返回None"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def check(self):
+        """检查是否已超过截止时间"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded(f'请求处理超时（超过 {self.timeout:g} 秒）', RESOURCE_TIME)
+
+    def add_rows(self, count):
+        """登记将要生成的行数，超过上限时抛出BudgetExceeded"""
+        self.rows += count
+        if self.max_rows is not None and self.rows > self.max_rows:
+            raise BudgetExceeded(f'生成的数据行数超过上限 {self.max_rows}', RESOURCE_ROWS)
+        self.check()
+
+    def add_bytes(self, count):
+        """登记已输出的字节数，超过上限时抛出BudgetExceeded"""
+        self.bytes += count
+        if self.max_bytes is not None and self.bytes > self.max_bytes:
+            raise BudgetExceeded(f'响应数据量超过上限 {format_size(self.max_bytes)}', RESOURCE_BYTES)
+        self.check()
+
+
+def current_budget():
+    """返回当前请求的预算，没有时返回None"""
+    return _current.get()
+
+
+def activate_budget(budget):
+    """把budget设为当前预算，返回用于恢复的token"""
+    return _current.set(budget)
+
+
+def deactivate_budget(token):
+    """恢复为 activate_budget 之前的预算"""
+    _current.reset(token)
+
+
+@contextmanager
+def budget_scope(budget):
+    """在with块内把budget设为当前预算"""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def check_budget():
+    """检查当前预算是否超时，没有预算时不做任何事"""
+    budget = _current.get()
+    if budget is not None:
+        budget.check()
+
+
+def charge_rows(count):
+    """向当前预算登记生成的行数，没有预算时不做任何事"""
+    budget = _current.get()
+    if budget is not None:
+        budget.add_rows(count)
+
+
+def format_size(size):
+    """把字节数格式化为便于阅读的文本"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f}{unit}' if unit == 'B' else f'{size:.1f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GB'
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mock请求日志的异步批量写入
+请求处理中只把原始数据放入内存队列（不做序列化和数据库操作），
+后台线程每隔一段时间或积累到一定行数后用 executemany 在一个事务中写入 request_logs；
+队列已满时直接丢弃新记录，不拖慢请求
+"""
+
+import collections
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import db_pool
+
+logger = logging.getLogger(__name__)
+
+# 未匹配到接口的请求记录的interface_id
+UNKNOWN_INTERFACE_ID = 0
+
+# 不写入日志的请求头（小写）
+SECRET_HEADERS = ('x-profile-token',)
+
+# 响应内容为 {"data": [...]} 时，序列化前最多保留的行数（超出部分反正会被截断）
+PREVIEW_ROWS = 20
+
+INSERT_SQL = '''
+    INSERT INTO request_logs (interface_id, method, path, params, headers, response_status,
+                              response_body, execution_time, request_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _truncate(text, max_bytes):
+    """按UTF-8字节数截断文本，max_bytes为0时不保存"""
+    if text is None or max_bytes is None:
+        return text
+    if max_bytes <= 0:
+        return None
+    data = text.encode('utf-8')
+    if len(data) <= max_bytes:
+        return text
+    return data[:max_bytes].decode('utf-8', 'ignore') + '...'
+
+
+def _preview(payload):
+    """响应内容为 {"data": [...]} 且行数较多时只保留前 PREVIEW_ROWS 行"""
+    data = payload.get('data')
+    if isinstance(data, list) and len(data) > PREVIEW_ROWS:
+        return dict(payload, data=data[:PREVIEW_ROWS])
+    return payload
+
+
+def _strip_secrets(headers):
+    if not isinstance(headers, dict):
+        return headers
+    return {key: value for key, value in headers.items() if key.lower() not in SECRET_HEADERS}
+
+
+def _serialize(value, max_bytes):
+    """把请求参数、请求头或响应内容转换为截断后的文本"""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    elif not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    return _truncate(value, max_bytes)
+
+
+class RequestLogWriter:
+    """
+    请求日志写入器
+    record() 在请求线程中调用，只做采样判断和入队；写入线程在首次记录时启动
+    resolve_interface(method, path) 用于在写入线程中把请求路径解析为接口id
+    """
+
+    def __init__(self, database, resolve_interface=None, flush_interval=0.2, batch_rows=500, queue_size=10000,
+                 sample_rate=1.0, max_header_bytes=2048, max_body_bytes=4096):
+        self.database = database
+        self.resolve_interface = resolve_interface
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows
+        self.queue_size = queue_size
+        self.sample_rate = sample_rate
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        # deque的append和popleft是线程安全的，入队不需要加锁
+        self._queue = collections.deque()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def record(self, method, path, params=None, headers=None, status=200, body=None, execution_time=None,
+               interface_id=None):
+        """
+        记录一次请求，返回是否入队
+        execution_time 单位为毫秒；body可以是bytes、str或可序列化为JSON的对象，写入时再序列化和截断
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        queue = self._queue
+        if len(queue) >= self.queue_size:
+            # 写入跟不上时丢弃，不阻塞请求
+            self.dropped += 1
+            return False
+        # 大响应只保留需要的部分，避免在队列中长时间占用内存
+        if isinstance(body, bytes):
+            if self.max_body_bytes is not None and len(body) > self.max_body_bytes:
+                body = body[:self.max_body_bytes + 4]
+        elif isinstance(body, dict):
+            body = _preview(body)
+        queue.append((interface_id, method, path, params, headers, status, body, execution_time, time.time()))
+        if self._thread is None:
+            self._start()
+        if len(queue) >= self.batch_rows:
+            self._wakeup.set()
+        return True
+
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"写入请求日志失败: {type(e).__name__}: {e}")
+
+    def _to_row(self, item):
+        interface_id, method, path, params, headers, status, body, execution_time, request_time = item
+        if interface_id is None:
+            interface_id = UNKNOWN_INTERFACE_ID
+            if self.resolve_interface is not None:
+                interface_id = self.resolve_interface(method, path) or UNKNOWN_INTERFACE_ID
+        return (
+            interface_id, method, path,
+            _serialize(params, self.max_body_bytes),
+            _serialize(_strip_secrets(headers), self.max_header_bytes),
+            status,
+            _serialize(body, self.max_body_bytes),
+            round(execution_time, 3) if execution_time is not None else None,
+            datetime.fromtimestamp(request_time).isoformat()
+        )
+
+    def flush(self):
+        """把队列中的记录全部写入数据库，每批一个事务，返回写入的行数"""
+        total = 0
+        with self._flush_lock:
+            queue = self._queue
+            while queue:
+                items = []
+                while queue and len(items) < self.batch_rows:
+                    items.append(queue.popleft())
+                rows = [self._to_row(item) for item in items]
+                try:
+                    conn = db_pool.connect(self.database)
+                    try:
+                        with conn:
+                            conn.executemany(INSERT_SQL, rows)
+                    finally:
+                        conn.close()
+                except sqlite3.Error as e:
+                    self.failed += len(rows)
+                    logger.error(f"写入请求日志失败，丢弃 {len(rows)} 条记录: {e}")
+                    continue
+                self.written += len(rows)
+                self.flushes += 1
+                total += len(rows)
+        return total
+
+    def close(self):
+        """停止写入线程并写入剩余记录"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self):
+        return {
+            'queued': len(self._queue),
+            'written': self.written,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'sample_rate': self.sample_rate
+        }
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按需的单请求性能分析
+请求头 X-Profile（或查询参数 _profile、Socket.IO事件数据中的 _profile）指定分析方式，
+经管理令牌或配置允许后，只对这一个请求做 cProfile 或采样分析；
+结果以 <id>.prof（pstats格式）或 <id>.collapsed（火焰图折叠栈格式）保存到目录中，
+目录中的记录数和总大小有上限，超出时删除最早的记录
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 分析方式
+MODE_CPROFILE = 'cprofile'
+MODE_SAMPLE = 'sample'
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
+
+# 输出格式
+FORMAT_PSTATS = 'pstats'
+FORMAT_COLLAPSED = 'collapsed'
+FORMAT_TEXT = 'text'
+
+# 记录id: 时间 + 随机后缀，只允许这种形式，避免拼接出目录外的路径
+_ID_PATTERN = re.compile(r'^\d{14}-[0-9a-f]{8}$')
+
+# 由pstats推算折叠栈时的最大深度和最小耗时（微秒），避免递归调用图展开过大
+COLLAPSED_MAX_DEPTH = 64
+COLLAPSED_MIN_US = 1
+
+
+def _frame_label(name, filename, lineno):
+    # 折叠栈中的帧名，不能包含分号
+    return f'{name} ({os.path.basename(filename)}:{lineno})'.replace(';', ',')
+
+
+def _func_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        # 内置函数，例如 <built-in method builtins.len>
+        return name.replace(';', ',')
+    return _frame_label(name, filename, lineno)
+
+
+def collapsed_from_pstats(stats):
+    """
+    由pstats的调用关系推算火焰图折叠栈（单位为微秒）
+    cProfile只记录调用方和被调用方的关系，函数在不同调用路径上的耗时按各调用边的累计耗时比例分配
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, item in stats.items() if not item[4]]
+    lines = {}
+
+    def walk(func, share, stack):
+        cc, nc, tt, ct, _ = stats[func]
+        stack = stack + [_func_label(func)]
+        ratio = share / ct if ct else 0
+        self_us = int(tt * ratio * 1000000)
+        if self_us >= COLLAPSED_MIN_US:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + self_us
+        if len(stack) >= COLLAPSED_MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            child_share = edge_ct * ratio
+            if callee in path or child_share * 1000000 < COLLAPSED_MIN_US:
+                continue
+            path.add(callee)
+            walk(callee, child_share, stack)
+            path.discard(callee)
+
+    for root in roots:
+        path = {root}
+        walk(root, stats[root][3], [])
+    return ''.join(f'{stack} {value}\n' for stack, value in sorted(lines.items()))
+
+
+class _Sampler:
+    """在后台线程中定时采集目标线程的调用栈，按折叠栈计数"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame_label(code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.counts.items()))
+
+
+class Capture:
+    """一次进行中的分析，stop() 后保存并返回记录id"""
+
+    __slots__ = ('store', 'mode', 'target', 'started', '_profile', '_sampler')
+
+    def __init__(self, store, mode, target, sample_interval):
+        self.store = store
+        self.mode = mode
+        self.target = target
+        self._profile = None
+        self._sampler = None
+        if mode == MODE_CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._profile = profile
+            except ValueError:
+                # Python 3.12起同一时间只能有一个cProfile在运行，此时改用采样分析
+                self.mode = MODE_SAMPLE
+        if self._profile is None:
+            self._sampler = _Sampler(threading.get_ident(), sample_interval)
+            self._sampler.start()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        """结束分析并保存，保存失败时返回None（不影响请求本身）"""
+        duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.create_stats()
+            data = self._profile.stats
+        else:
+            self._sampler.stop()
+            data = self._sampler.collapsed()
+        try:
+            return self.store.save(self.mode, self.target, duration_ms, data)
+        except OSError as e:
+            logger.error(f"保存性能分析结果失败: {self.target}: {e}")
+            return None
+
+
+class ProfileStore:
+    """
+    分析结果的磁盘存储
+    每条记录为 <id>.json（元数据）加 <id>.prof 或 <id>.collapsed，记录数和总大小超过上限时删除最早的记录
+    """
+
+    def __init__(self, directory, max_captures=50, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_captures = max_captures
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, capture_id, suffix):
+        return os.path.join(self.directory, capture_id + suffix)
+
+    def save(self, mode, target, duration_ms, data):
+        """保存一次分析结果，data为cProfile的stats字典或折叠栈文本，返回记录id"""
+        os.makedirs(self.directory, exist_ok=True)
+        capture_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        if mode == MODE_CPROFILE:
+            data_path = self._path(capture_id, '.prof')
+            # 与 cProfile.Profile.dump_stats 的格式相同，可直接用 pstats / snakeviz 打开
+            with open(data_path, 'wb') as f:
+                marshal.dump(data, f)
+        else:
+            data_path = self._path(capture_id, '.collapsed')
+            with open(data_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        meta = {
+            'id': capture_id,
+            'mode': mode,
+            'target': target,
+            'created_at': datetime.now().isoformat(),
+            'duration_ms': duration_ms,
+            'bytes': os.path.getsize(data_path),
+            'formats': [FORMAT_PSTATS, FORMAT_COLLAPSED, FORMAT_TEXT] if mode == MODE_CPROFILE else [FORMAT_COLLAPSED]
+        }
+        with open(self._path(capture_id, '.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        logger.info(f"已保存性能分析结果: {capture_id} {mode} {target} {duration_ms}ms")
+        self._prune()
+        return capture_id
+
+    def _remove(self, capture_id):
+        for suffix in ('.json', '.prof', '.collapsed'):
+            try:
+                os.remove(self._path(capture_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _prune(self):
+        with self._lock:
+            captures = self.list()
+            total = sum(item['bytes'] for item in captures)
+            # list() 按时间从新到旧排序，从末尾开始删除
+            while captures and (len(captures) > self.max_captures or total > self.max_bytes):
+                item = captures.pop()
+                total -= item['bytes']
+                self._remove(item['id'])
+
+    def list(self, limit=None):
+        """返回记录的元数据，按时间从新到旧排序"""
+        if not os.path.isdir(self.directory):
+            return []
+        captures = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    captures.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        captures.sort(key=lambda item: (item['created_at'], item['id']), reverse=True)
+        return captures[:limit] if limit else captures
+
+    def get(self, capture_id):
+        """返回记录的元数据，不存在时返回None"""
+        if not _ID_PATTERN.match(capture_id or ''):
+            return None
+        try:
+            with open(self._path(capture_id, '.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def pstats_path(self, capture_id):
+        return self._path(capture_id, '.prof')
+
+    def render(self, capture_id, fmt):
+        """
+        按格式返回 (内容, Content-Type)，记录不存在时返回None，
+        记录不支持该格式时抛出ValueError
+        """
+        meta = self.get(capture_id)
+        if meta is None:
+            return None
+        if fmt not in meta['formats']:
+            raise ValueError(f"记录 {capture_id} 不支持 {fmt} 格式，可用格式: {', '.join(meta['formats'])}")
+        if fmt == FORMAT_PSTATS:
+            with open(self.pstats_path(capture_id), 'rb') as f:
+                return f.read(), 'application/octet-stream'
+        if meta['mode'] == MODE_SAMPLE:
+            with open(self._path(capture_id, '.collapsed'), encoding='utf-8') as f:
+                return f.read(), 'text/plain; charset=utf-8'
+        stats = pstats.Stats(self.pstats_path(capture_id))
+        if fmt == FORMAT_COLLAPSED:
+            return collapsed_from_pstats(stats.stats), 'text/plain; charset=utf-8'
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats('cumulative').print_stats(60)
+        return output.getvalue(), 'text/plain; charset=utf-8'
+
+
+class RequestProfiler:
+    """
+    判断请求是否要求分析并开始分析
+    配置了admin_token时必须提供相同的令牌；未配置令牌时只有enabled为True才允许分析
+    """
+
+    def __init__(self, store, enabled=False, admin_token=None, sample_interval=0.005):
+        self.store = store
+        self.enabled = enabled
+        self.admin_token = admin_token
+        self.sample_interval = sample_interval
+
+    def authorized(self, token):
+        """令牌是否允许分析和查看分析结果"""
+        if self.admin_token:
+            return bool(token) and hmac.compare_digest(str(token), str(self.admin_token))
+        return self.enabled
+
+    def requested_mode(self, flag, token):
+        """
+        由请求中的标记返回分析方式，不要求分析或未授权时返回None
+        标记为 sample 时采样分析，其余非空值（1、true、cprofile）使用cProfile
+        """
+        if not flag:
+            return None
+        flag = str(flag).lower()
+        if flag in ('0', 'false', 'off'):
+            return None
+        if not self.authorized(token):
+            logger.warning("收到未授权的性能分析请求，已忽略")
+            return None
+        return MODE_SAMPLE if flag == MODE_SAMPLE else MODE_CPROFILE
+
+    def start(self, mode, target):
+        """在当前线程开始分析"""
+        return Capture(self.store, mode, target, self.sample_interval)
+
+    def call(self, mode, target, func, *args):
+        """
+        分析一次函数调用，返回 (结果, 记录id)；mode为None时直接调用
+        调用抛出异常时同样保存分析结果，记录id附加在异常的profile_id属性上
+        """
+        if mode is None:
+            return func(*args), None
+        capture = self.start(mode, target)
+        try:
+            result = func(*args)
+        except Exception as e:
+            e.profile_id = capture.stop()
+            raise
+        return result, capture.stop()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求日志汇总
+后台任务把 request_logs 中的原始记录按接口汇总为每分钟、每小时和每天的统计（请求数、状态码计数、耗时直方图），
+保存在 request_log_rollups 表中；已汇总且超过保留时长的原始记录随后删除。
+查询时把时间范围拆分为整天、整小时和首尾的零散分钟，30天的范围每个接口最多合并约200行汇总
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+import db_pool
+
+logger = logging.getLogger(__name__)
+
+# 汇总粒度（秒），从细到粗
+RESOLUTION_MINUTE = 60
+RESOLUTION_HOUR = 3600
+RESOLUTION_DAY = 86400
+RESOLUTIONS = (RESOLUTION_MINUTE, RESOLUTION_HOUR, RESOLUTION_DAY)
+
+# 直方图每个2的幂区间细分的桶数（2的SUB_BUCKET_BITS次方），相对误差不超过 1/2^(SUB_BUCKET_BITS-1)
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+# 默认查询的分位数
+PERCENTILES = (50, 95, 99)
+
+
+def bucket_index(ms):
+    """
+    耗时（毫秒）所在的直方图桶，与HdrHistogram相同的对数-线性分桶：
+    以微秒为单位，小于SUB_BUCKET_COUNT的值每个值一个桶，更大的值在每个2的幂区间内均分为SUB_BUCKET_HALF个桶
+    """
+    value = max(int(ms * 1000), 0)
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def bucket_value(index):
+    """直方图桶的代表值（桶区间中点，毫秒）"""
+    if index < SUB_BUCKET_COUNT:
+        return index / 1000
+    shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    mantissa = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((mantissa << shift) + (1 << (shift - 1))) / 1000
+
+
+def percentiles_from_histogram(histogram, percentiles):
+    """由直方图（桶序号 -> 次数，桶序号为字符串）计算各分位数（毫秒），没有数据时为None"""
+    total = sum(histogram.values())
+    if not total:
+        return {percentile: None for percentile in percentiles}
+    buckets = sorted((int(index), count) for index, count in histogram.items())
+    result = {}
+    for percentile in percentiles:
+        rank = max(percentile / 100 * total, 1)
+        seen = 0
+        for index, count in buckets:
+            seen += count
+            if seen >= rank:
+                break
+        result[percentile] = bucket_value(index)
+    return result
+
+
+def split_range(start, end):
+    """把 [start, end) 拆分为 (粒度, 起, 止) 列表：能用整天的用天汇总，其余依次用小时、分钟汇总"""
+    ranges = []
+
+    def split(range_start, range_end, level):
+        resolution = RESOLUTIONS[level]
+        if level == 0:
+            ranges.append((resolution, range_start, range_end))
+            return
+        inner_start = -(-range_start // resolution) * resolution
+        inner_end = range_end - range_end % resolution
+        if inner_end <= inner_start:
+            split(range_start, range_end, level - 1)
+            return
+        split(range_start, inner_start, level - 1)
+        ranges.append((resolution, inner_start, inner_end))
+        split(inner_end, range_end, level - 1)
+
+    split(start, end, len(RESOLUTIONS) - 1)
+    return [item for item in ranges if item[2] > item[1]]
+
+
+def parse_time(value, default=None):
+    """解析查询的时间参数：Unix时间戳（秒）或ISO格式时间，无效时返回default"""
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return default
+
+
+class _Aggregate:
+    """一个汇总行：请求数、耗时合计和最大值、状态码计数、耗时直方图（键均为字符串，与保存的JSON一致）"""
+
+    __slots__ = ('count', 'total_ms', 'max_ms', 'statuses', 'histogram')
+
+    def __init__(self, count=0, total_ms=0.0, max_ms=0.0, statuses=None, histogram=None):
+        self.count = count
+        self.total_ms = total_ms
+        self.max_ms = max_ms
+        self.statuses = statuses if statuses is not None else {}
+        self.histogram = histogram if histogram is not None else {}
+
+    @classmethod
+    def from_row(cls, count, total_ms, max_ms, statuses, histogram):
+        return cls(count, total_ms, max_ms, json.loads(statuses), json.loads(histogram))
+
+    def add(self, status, execution_time):
+        self.count += 1
+        status = str(status)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if execution_time is not None:
+            self.total_ms += execution_time
+            self.max_ms = max(self.max_ms, execution_time)
+            index = str(bucket_index(execution_time))
+            self.histogram[index] = self.histogram.get(index, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        for target, source in ((self.statuses, other.statuses), (self.histogram, other.histogram)):
+            for key, value in source.items():
+                target[key] = target.get(key, 0) + value
+
+    def copy(self):
+        return _Aggregate(self.count, self.total_ms, self.max_ms, dict(self.statuses), dict(self.histogram))
+
+    def to_row(self):
+        return (self.count, round(self.total_ms, 3), round(self.max_ms, 3),
+                json.dumps(self.statuses, separators=(',', ':')),
+                json.dumps(self.histogram, separators=(',', ':')))
+
+
+class RequestLogRollup:
+    """
+    请求日志汇总任务
+    已汇总到的 request_logs.id 保存在 request_log_rollup_state 中，每次只处理新增的记录
+    """
+
+    def __init__(self, database, interval=60, chunk_rows=50000, raw_retention_hours=72, rollup_retention_days=90):
+        self.database = database
+        self.interval = interval
+        self.chunk_rows = chunk_rows
+        self.raw_retention_hours = raw_retention_hours
+        self.rollup_retention_days = rollup_retention_days
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """启动后台汇总线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='request-log-rollup', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"汇总请求日志失败: {type(e).__name__}: {e}")
+
+    def run_once(self, now=None):
+        """汇总新增的请求日志并清理过期数据，返回本次汇总的记录数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = db_pool.connect(self.database)
+            try:
+                total = 0
+                while True:
+                    rolled = self._rollup_chunk(conn)
+                    total += rolled
+                    if rolled < self.chunk_rows:
+                        break
+                self._prune(conn, now)
+                return total
+            finally:
+                conn.close()
+
+    def _rollup_chunk(self, conn):
+        cursor = conn.cursor()
+        row = cursor.execute('SELECT last_log_id FROM request_log_rollup_state WHERE id = 1').fetchone()
+        last_id = row[0] if row else 0
+        cursor.execute('''
+            SELECT id, interface_id, response_status, execution_time, request_time FROM request_logs
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''', (last_id, self.chunk_rows))
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+
+        # 先按 (接口, 分钟) 聚合本批记录，再由分钟汇总合并出小时和天的汇总
+        minutes = {}
+        parse = datetime.fromisoformat
+        for _, interface_id, status, execution_time, request_time in rows:
+            try:
+                timestamp = int(parse(request_time).timestamp())
+            except (TypeError, ValueError):
+                continue
+            key = (interface_id, timestamp - timestamp % RESOLUTION_MINUTE)
+            aggregate = minutes.get(key)
+            if aggregate is None:
+                aggregate = minutes[key] = _Aggregate()
+            aggregate.add(status, execution_time)
+
+        levels = {RESOLUTION_MINUTE: minutes}
+        for resolution in RESOLUTIONS[1:]:
+            level = levels[resolution] = {}
+            for (interface_id, minute), aggregate in minutes.items():
+                key = (interface_id, minute - minute % resolution)
+                if key in level:
+                    level[key].merge(aggregate)
+                else:
+                    level[key] = aggregate.copy()
+
+        # 与已有的汇总行合并后整体写回，汇总行和进度在同一个事务中更新
+        with conn:
+            for resolution, level in levels.items():
+                buckets = [bucket for _, bucket in level]
+                cursor.execute('''
+                    SELECT interface_id, bucket_start, request_count, total_ms, max_ms, status_counts, histogram
+                    FROM request_log_rollups WHERE resolution = ? AND bucket_start BETWEEN ? AND ?
+                ''', (resolution, min(buckets), max(buckets)))
+                for existing in cursor.fetchall():
+                    aggregate = level.get(existing[:2])
+                    if aggregate is not None:
+                        aggregate.merge(_Aggregate.from_row(*existing[2:]))
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO request_log_rollups
+                        (resolution, interface_id, bucket_start, request_count, total_ms, max_ms, status_counts, histogram)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(resolution,) + key + aggregate.to_row() for key, aggregate in level.items()])
+            cursor.execute('INSERT OR REPLACE INTO request_log_rollup_state (id, last_log_id) VALUES (1, ?)',
+                           (rows[-1][0],))
+        return len(rows)
+
+    def _prune(self, conn, now):
+        # 只删除已经汇总过的原始记录
+        raw_cutoff = datetime.fromtimestamp(now - self.raw_retention_hours * 3600).isoformat()
+        rollup_cutoff = int(now - self.rollup_retention_days * 86400)
+        with conn:
+            row = conn.execute('SELECT last_log_id FROM request_log_rollup_state WHERE id = 1').fetchone()
+            if row:
+                deleted = conn.execute('DELETE FROM request_logs WHERE id <= ? AND request_time < ?',
+                                       (row[0], raw_cutoff)).rowcount
+                if deleted:
+                    logger.info(f"已清理 {deleted} 条过期的请求日志")
+            for resolution in RESOLUTIONS:
+                conn.execute('DELETE FROM request_log_rollups WHERE resolution = ? AND bucket_start < ?',
+                             (resolution, rollup_cutoff))
+
+    def query(self, start, end, interface_id=None, percentiles=PERCENTILES):
+        """
+        查询 [start, end) 时间范围（Unix时间戳，秒）内各接口的请求数、吞吐量、耗时分位数和状态码计数
+        范围向外对齐到整分钟，包含end所在的分钟
+        """
+        start = int(start) - int(start) % RESOLUTION_MINUTE
+        # end取整后恰好在整分钟上时也要包含该分钟（不能向上取整）
+        end = int(end) - int(end) % RESOLUTION_MINUTE + RESOLUTION_MINUTE
+        if end <= start:
+            return []
+
+        aggregates = {}
+        conn = db_pool.connect(self.database)
+        try:
+            for resolution, range_start, range_end in split_range(start, end):
+                sql = '''
+                    SELECT interface_id, request_count, total_ms, max_ms, status_counts, histogram
+                    FROM request_log_rollups WHERE resolution = ? AND bucket_start >= ? AND bucket_start < ?
+                '''
+                args = [resolution, range_start, range_end]
+                if interface_id is not None:
+                    sql += ' AND interface_id = ?'
+                    args.append(interface_id)
+                for row in conn.execute(sql, args):
+                    aggregate = _Aggregate.from_row(*row[1:])
+                    if row[0] in aggregates:
+                        aggregates[row[0]].merge(aggregate)
+                    else:
+                        aggregates[row[0]] = aggregate
+        finally:
+            conn.close()
+
+        seconds = end - start
+        result = []
+        for iface_id, aggregate in sorted(aggregates.items()):
+            timed = sum(aggregate.histogram.values())
+            item = {
+                'interface_id': iface_id,
+                'count': aggregate.count,
+                'throughput_rps': round(aggregate.count / seconds, 6),
+                'avg_ms': round(aggregate.total_ms / timed, 3) if timed else None,
+                'max_ms': aggregate.max_ms if timed else None,
+                'status_counts': aggregate.statuses
+            }
+            for percentile, value in percentiles_from_histogram(aggregate.histogram, percentiles).items():
+                if value is not None:
+                    # 桶的代表值可能略大于实际最大值
+                    value = round(min(value, aggregate.max_ms), 3)
+                item[f'p{percentile:g}_ms'] = value
+            result.append(item)
+        return result
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+动态接口路由表
+进程内缓存 (method, path) -> 接口信息、Mock配置和响应字段，
+避免Mock请求每次都访问SQLite；支持 {id}、:id 路径参数和通配符
+"""
+
+import itertools
+import logging
+import threading
+
+import db_pool
+from fault_injection import FaultConfigError, parse_fault_config
+from file_purge import LIVE_INTERFACE_CONDITION
+from mock_generator import MockPlan
+
+logger = logging.getLogger(__name__)
+
+# 路径片段类型
+SEGMENT_STATIC = 0
+SEGMENT_PARAM = 1
+SEGMENT_WILDCARD = 2
+
+# 接口配置版本号，接口重新加载或Mock配置变化时递增，用于让响应缓存失效
+_versions = itertools.count(1)
+
+
+def normalize_path(path):
+    """规范化路径：补全开头的/，合并重复的/，去掉末尾的/"""
+    segments = [seg for seg in path.split('/') if seg]
+    return '/' + '/'.join(segments)
+
+
+def parse_segment(segment, is_last):
+    """
+    解析路径模板中的一个片段，返回 (类型, 值)
+    支持 OpenAPI 的 {id}、Express 的 :id，以及 *、**、{path*}、*path 通配符（仅限最后一段）
+    """
+    if segment in ('*', '**') or (segment.startswith('{') and segment.endswith('*}')):
+        name = segment.strip('{}*') or 'wildcard'
+        if is_last:
+            return SEGMENT_WILDCARD, name
+        return SEGMENT_PARAM, name
+    if segment.startswith('*') and len(segment) > 1 and is_last:
+        return SEGMENT_WILDCARD, segment[1:]
+    if segment.startswith('{') and segment.endswith('}') and len(segment) > 2:
+        return SEGMENT_PARAM, segment[1:-1].strip()
+    if segment.startswith(':') and len(segment) > 1:
+        return SEGMENT_PARAM, segment[1:]
+    return SEGMENT_STATIC, segment
+
+
+def compile_path(path):
+    """将路径模板编译为片段列表，返回 (片段列表, 是否包含参数或通配符)"""
+    parts = [seg for seg in path.split('/') if seg]
+    segments = [parse_segment(seg, i == len(parts) - 1) for i, seg in enumerate(parts)]
+    is_template = any(kind != SEGMENT_STATIC for kind, _ in segments)
+    return segments, is_template
+
+
+class _TrieNode:
+    __slots__ = ('static', 'param', 'wildcard', 'entries')
+
+    def __init__(self):
+        # 静态片段 -> 子节点
+        self.static = {}
+        # 参数片段子节点（不同参数名共享同一个节点）
+        self.param = None
+        # 通配符匹配到的接口列表（匹配剩余的全部片段）
+        self.wildcard = None
+        # 路径在此结束的接口列表
+        self.entries = None
+
+    def is_empty(self):
+        return not (self.static or self.param is not None or self.wildcard or self.entries)
+
+
+class PathRouter:
+    """
+    路径模板前缀树
+    每一层的匹配优先级：静态片段 > 参数片段 > 通配符；同一模板被多个文件定义时按接口id升序，
+    匹配开销只与路径深度有关，与接口总数无关
+    """
+
+    def __init__(self):
+        self._roots = {}
+
+    def _node_for(self, method, segments, create):
+        node = self._roots.get(method)
+        if node is None:
+            if not create:
+                return None, None
+            node = self._roots[method] = _TrieNode()
+        for kind, value in segments:
+            if kind == SEGMENT_WILDCARD:
+                return node, kind
+            if kind == SEGMENT_PARAM:
+                if node.param is None:
+                    if not create:
+                        return None, None
+                    node.param = _TrieNode()
+                node = node.param
+            else:
+                child = node.static.get(value)
+                if child is None:
+                    if not create:
+                        return None, None
+                    child = node.static[value] = _TrieNode()
+                node = child
+        return node, SEGMENT_STATIC
+
+    def add(self, entry):
+        node, kind = self._node_for(entry.method, entry.segments, True)
+        attr = 'wildcard' if kind == SEGMENT_WILDCARD else 'entries'
+        entries = [e for e in (getattr(node, attr) or []) if e.interface_id != entry.interface_id]
+        entries.append(entry)
+        entries.sort(key=lambda e: e.interface_id)
+        setattr(node, attr, entries)
+
+    def remove(self, entry):
+        """移除接口，并自下而上删除不再有接口的空节点（反复上传、删除文件时前缀树不会持续增长）"""
+        root = self._roots.get(entry.method)
+        if root is None:
+            return
+        # 记录经过的 (父节点, 片段类型, 片段值)，用于回溯删除空节点
+        path = []
+        node, kind = root, SEGMENT_STATIC
+        for kind, value in entry.segments:
+            if kind == SEGMENT_WILDCARD:
+                break
+            child = node.param if kind == SEGMENT_PARAM else node.static.get(value)
+            if child is None:
+                return
+            path.append((node, kind, value))
+            node = child
+        attr = 'wildcard' if kind == SEGMENT_WILDCARD else 'entries'
+        entries = [e for e in (getattr(node, attr) or []) if e.interface_id != entry.interface_id]
+        setattr(node, attr, entries or None)
+
+        for parent, kind, value in reversed(path):
+            if not node.is_empty():
+                return
+            if kind == SEGMENT_PARAM:
+                parent.param = None
+            else:
+                parent.static.pop(value, None)
+            node = parent
+        if node.is_empty():
+            self._roots.pop(entry.method, None)
+
+    def node_count(self):
+        """前缀树的节点总数"""
+        count = 0
+        stack = list(self._roots.values())
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.static.values())
+            if node.param is not None:
+                stack.append(node.param)
+        return count
+
+    def match(self, method, parts):
+        """按片段列表匹配，返回 (接口, 参数值列表)，未匹配返回 (None, None)"""
+        root = self._roots.get(method)
+        if root is None:
+            return None, None
+        return self._match(root, parts, 0, [])
+
+    def _match(self, node, parts, index, values):
+        if index == len(parts):
+            if node.entries:
+                return node.entries[0], values
+            if node.wildcard:
+                return node.wildcard[0], values + ['']
+            return None, None
+        child = node.static.get(parts[index])
+        if child is not None:
+            entry, found = self._match(child, parts, index + 1, values)
+            if entry is not None:
+                return entry, found
+        if node.param is not None:
+            entry, found = self._match(node.param, parts, index + 1, values + [parts[index]])
+            if entry is not None:
+                return entry, found
+        if node.wildcard:
+            return node.wildcard[0], values + ['/'.join(parts[index:])]
+        return None, None
+
+
+class RouteEntry:
+    """路由表中的一个接口"""
+
+    __slots__ = ('interface_id', 'name', 'path', 'method', 'file_id', 'is_websocket',
+                 'mock_enabled', 'default_count', 'seed', 'total_count', 'fault', 'version', 'has_mock_config',
+                 'response_fields',
+                 'route_path', 'segments', 'is_template', 'param_names', '_plan')
+
+    def __init__(self, interface_id, name, path, method, file_id, is_websocket=False):
+        self.interface_id = interface_id
+        self.name = name
+        self.path = path
+        self.method = method
+        self.file_id = file_id
+        self.is_websocket = bool(is_websocket)
+        # Mock配置，没有配置记录时视为未启用
+        self.has_mock_config = False
+        self.mock_enabled = False
+        self.default_count = 10
+        # 固定的随机数种子，为None时每次生成不同的数据
+        self.seed = None
+        # 分页Mock的虚拟总条数，为None时不分页
+        self.total_count = None
+        # 延迟和故障注入配置（FaultProfile），为None时不注入
+        self.fault = None
+        self.version = next(_versions)
+        # 响应字段列表: [(name, response_type), ...]，按id排序
+        self.response_fields = []
+        # 编译后的路径模板
+        self.route_path = normalize_path(path)
+        self.segments, self.is_template = compile_path(path)
+        self.param_names = [value for kind, value in self.segments if kind != SEGMENT_STATIC]
+        self._plan = None
+
+    @property
+    def plan(self):
+        """Mock生成计划，首次使用时编译；响应字段变化时路由表会重建接口，计划随之重建"""
+        plan = self._plan
+        if plan is None:
+            plan = self._plan = MockPlan(self.response_fields)
+        return plan
+
+    def set_mock_config(self, enabled, default_count, seed=None, total_count=None, fault=None):
+        self.has_mock_config = True
+        self.mock_enabled = bool(enabled)
+        self.default_count = default_count
+        self.seed = seed
+        self.total_count = total_count
+        self.fault = fault
+        self.version = next(_versions)
+
+
+# 重新加载时按文件、按接口的查询条件
+RELOAD_FILE_WHERE = 'WHERE file_id = ?'
+RELOAD_INTERFACE_WHERE = 'WHERE id = ?'
+
+
+def entry_queries(where=''):
+    """
+    加载路由表的三条查询：接口、Mock配置和响应字段，后两条按同样的条件关联接口；
+    已删除、等待清理的文件下的接口除外
+    """
+    where = f'{where} AND {LIVE_INTERFACE_CONDITION}' if where else f'WHERE {LIVE_INTERFACE_CONDITION}'
+    sub_query = f'SELECT id FROM interfaces {where}'
+    return (
+        f'SELECT id, name, path, method, file_id, is_websocket FROM interfaces {where}',
+        'SELECT interface_id, enabled, default_count, seed, total_count, fault_config FROM mock_configs '
+        f'WHERE interface_id IN ({sub_query}) ORDER BY id',
+        'SELECT interface_id, name, response_type FROM interface_responses '
+        f'WHERE interface_id IN ({sub_query}) ORDER BY id'
+    )
+
+
+class RouteTable:
+    """
+    进程级路由表
+    启动时一次性加载，之后由写接口的路由调用 reload_interface / reload_file / remove_file 更新
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._lock = threading.RLock()
+        # (method, path) -> [RouteEntry, ...]，只包含静态路径，同一路由按接口id升序，首个即命中的接口
+        self._routes = {}
+        # 含参数或通配符的路径模板
+        self._router = PathRouter()
+        # interface_id -> RouteEntry
+        self._by_id = {}
+        self.loaded = False
+
+    # ---------- 查询 ----------
+
+    def match(self, method, path):
+        """
+        根据请求方法和路径查找接口，返回 (接口, 路径参数字典)，未找到返回 (None, None)
+        静态路径直接查字典，其余再走路径模板前缀树
+        """
+        route_path = normalize_path(path)
+        entries = self._routes.get((method, route_path))
+        if entries:
+            return entries[0], {}
+        entry, values = self._router.match(method, route_path.split('/')[1:] if route_path != '/' else [])
+        if entry is None:
+            return None, None
+        return entry, dict(zip(entry.param_names, values))
+
+    def lookup(self, method, path):
+        """根据请求方法和路径查找接口，未找到返回None"""
+        return self.match(method, path)[0]
+
+    def get(self, interface_id):
+        return self._by_id.get(interface_id)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    # ---------- 加载 ----------
+
+    def _fetch_entries(self, conn, where='', args=()):
+        """从数据库读取接口及其Mock配置、响应字段（已删除、等待清理的文件下的接口除外）"""
+        interfaces_sql, mock_configs_sql, responses_sql = entry_queries(where)
+        cursor = conn.cursor()
+        cursor.execute(interfaces_sql, args)
+        entries = {}
+        for row in cursor.fetchall():
+            entries[row[0]] = RouteEntry(row[0], row[1], row[2], row[3], row[4], row[5])
+        if not entries:
+            return entries
+
+        # 按同样的条件关联查询Mock配置和响应字段
+        cursor.execute(mock_configs_sql, args)
+        for interface_id, enabled, default_count, seed, total_count, fault_config in cursor.fetchall():
+            entry = entries.get(interface_id)
+            # 与原先 fetchone 的行为保持一致：只取第一条配置
+            if entry is not None and not entry.has_mock_config:
+                try:
+                    fault = parse_fault_config(fault_config)
+                except FaultConfigError as e:
+                    logger.error(f"接口 {interface_id} 的故障注入配置无效，已忽略: {e}")
+                    fault = None
+                entry.set_mock_config(enabled, default_count, seed, total_count, fault)
+
+        cursor.execute(responses_sql, args)
+        for interface_id, name, response_type in cursor.fetchall():
+            entry = entries.get(interface_id)
+            if entry is not None:
+                entry.response_fields.append((name, response_type))
+        return entries
+
+    def load(self):
+        """全量加载路由表"""
+        conn = db_pool.connect(self.database)
+        try:
+            entries = self._fetch_entries(conn)
+        finally:
+            conn.close()
+
+        routes = {}
+        router = PathRouter()
+        for interface_id in sorted(entries):
+            entry = entries[interface_id]
+            if entry.is_template:
+                router.add(entry)
+            else:
+                routes.setdefault((entry.method, entry.route_path), []).append(entry)
+
+        with self._lock:
+            self._routes = routes
+            self._router = router
+            self._by_id = entries
+            self.loaded = True
+        return len(entries)
+
+    # ---------- 增量更新 ----------
+
+    def _add(self, entry):
+        self._by_id[entry.interface_id] = entry
+        if entry.is_template:
+            self._router.add(entry)
+            return
+        key = (entry.method, entry.route_path)
+        entries = [e for e in self._routes.get(key, []) if e.interface_id != entry.interface_id]
+        entries.append(entry)
+        entries.sort(key=lambda e: e.interface_id)
+        # 替换整个列表，读线程不会看到排序中的中间状态
+        self._routes[key] = entries
+
+    def _remove(self, interface_id):
+        entry = self._by_id.pop(interface_id, None)
+        if entry is None:
+            return
+        if entry.is_template:
+            self._router.remove(entry)
+            return
+        key = (entry.method, entry.route_path)
+        entries = [e for e in self._routes.get(key, []) if e.interface_id != interface_id]
+        if entries:
+            self._routes[key] = entries
+        else:
+            self._routes.pop(key, None)
+
+    def _reload(self, where, args, stale_ids):
+        conn = db_pool.connect(self.database)
+        try:
+            entries = self._fetch_entries(conn, where, args)
+        finally:
+            conn.close()
+
+        with self._lock:
+            for interface_id in stale_ids:
+                self._remove(interface_id)
+            for interface_id in sorted(entries):
+                self._add(entries[interface_id])
+        return len(entries)
+
+    def reload_interface(self, interface_id):
+        """重新加载单个接口（方法、类型、Mock配置或响应字段发生变化后调用）"""
+        return self._reload(RELOAD_INTERFACE_WHERE, (interface_id,), [interface_id])
+
+    def reload_file(self, file_id):
+        """重新加载某个文件下的全部接口（上传解析完成后调用）"""
+        with self._lock:
+            stale_ids = [i for i, e in self._by_id.items() if e.file_id == file_id]
+        return self._reload(RELOAD_FILE_WHERE, (file_id,), stale_ids)
+
+    def remove_file(self, file_id):
+        """移除某个文件下的全部接口（删除文件后调用）"""
+        with self._lock:
+            for interface_id in [i for i, e in self._by_id.items() if e.file_id == file_id]:
+                self._remove(interface_id)
+
+    def update_mock_config(self, interface_id, enabled, default_count, seed=None, total_count=None, fault=None):
+        """直接修改缓存中的Mock配置，无需重新查询数据库"""
+        with self._lock:
+            entry = self._by_id.get(interface_id)
+            if entry is not None:
+                entry.set_mock_config(enabled, default_count, seed, total_count, fault)
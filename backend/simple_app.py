@@ -5,11 +5,12 @@ import logging
 import webbrowser
 import threading
 import argparse
+import atexit
 
 # 导入配置
 import config
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 # 移除对flask_executor的依赖
@@ -19,7 +20,6 @@ import uuid
 import re
 from datetime import datetime
 import json
-import signal
 
 # 配置日志 - 添加日志轮转
 import logging.handlers
@@ -61,6 +61,24 @@ logger.info("日志系统初始化完成")
 
 # 导入异步解析函数
 from async_parser import parse_file_async
+# 导入动态接口路由表
+from route_table import RouteTable
+# 导入Mock响应缓存
+from mock_cache import ResponseCache
+from mock_pool import MockPoolManager
+from json_provider import FastJSONProvider
+from mock_batch import BatchExecutor
+from fault_injection import DelayScheduler, FaultConfigError, FaultStats, iter_throttled, parse_fault_config
+import db_migrations
+import db_pool
+import metrics
+from file_purge import FilePurger
+from listing import FILE_LISTING, INTERFACE_LISTING, ListQueryError
+from request_log import UNKNOWN_INTERFACE_ID, RequestLogWriter
+from request_rollup import RequestLogRollup, parse_time
+from request_profiler import FORMAT_COLLAPSED, FORMAT_PSTATS, ProfileStore, RequestProfiler
+from request_budget import (BudgetExceeded, RequestBudget, activate_budget, budget_scope, charge_rows,
+                            deactivate_budget, format_size)
 
 app = Flask(__name__)
 # 配置CORS，支持跨域请求，包括OPTIONS预检请求
@@ -108,6 +126,9 @@ except Exception as e:
 
 # 确保JSON响应使用UTF-8编码
 app.config['JSON_AS_ASCII'] = False
+# 使用可替换的JSON序列化实现（安装orjson时使用orjson）
+app.json = FastJSONProvider(app, config.JSON_ENCODER)
+logger.info(f"JSON序列化实现: {app.json.encoder}")
 
 # 确保响应头包含正确的编码信息
 from flask import make_response
@@ -121,30 +142,52 @@ def add_encoding_header(response):
 DATABASE = config.DATABASE_PATH
 UPLOAD_DIR = config.UPLOAD_FOLDER
 
+# 数据库连接使用连接池（db_pool.connect），conn.close() 时归还；
+# 请求和Socket.IO事件结束时归还该线程未关闭的连接，进程退出前关闭空闲连接
+# （先注册，在其他退出处理函数写完数据之后才执行）
+atexit.register(db_pool.close_all)
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    db_pool.release_thread()
+
 # 添加配置
 app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH  # 文件大小限制
 app.config['UPLOAD_FOLDER'] = UPLOAD_DIR
 
-# 请求超时处理
-class RequestTimeout(Exception):
-    pass
-
-# 请求超时处理 - 仅在支持signal.SIGALRM的系统上启用
-if hasattr(signal, 'SIGALRM') and hasattr(signal, 'alarm'):
-    def timeout_handler(signum, frame):
-        raise RequestTimeout("请求处理超时")
-
-    @app.before_request
-    def before_request():
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(30)  # 30秒超时
-    @app.after_request
-    def after_request(response):
-        signal.alarm(0)  # 取消超时
-        return response
-else:
-    # Windows系统不支持SIGALRM，跳过超时设置
-    pass
+# 请求超时处理：每个请求创建一个时间和资源预算，Mock生成和文件解析过程中主动检查，
+# 超出时抛出BudgetExceeded并返回明确的错误（所有系统和线程中都可用，不再依赖SIGALRM）
+def new_request_budget(timeout=None):
+    return RequestBudget(timeout or config.REQUEST_TIMEOUT, config.MOCK_MAX_ROWS, config.MOCK_MAX_RESPONSE_BYTES)
+
+@app.before_request
+def install_request_budget():
+    g.request_budget_token = activate_budget(new_request_budget())
+
+@app.teardown_request
+def remove_request_budget(exc):
+    token = g.pop('request_budget_token', None)
+    if token is not None:
+        deactivate_budget(token)
+
+@app.errorhandler(BudgetExceeded)
+def handle_budget_exceeded(e):
+    logger.warning(f"请求超出预算: {request.method} {request.path}: {e}")
+    return jsonify(e.payload()), e.status
+
+# 运行指标：按路由规则统计请求耗时（流式响应统计到返回响应头为止）
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.HTTP_REQUEST_SECONDS.observe((request.method, endpoint, str(response.status_code)),
+                                             time.perf_counter() - started)
+    return response
 
 # 硬编码前端资源目录路径，确保使用恢复的v1.0.0版本
 import os
@@ -189,108 +232,18 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # 初始化数据库
 def init_db():
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    # 创建文件表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS interface_files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename TEXT NOT NULL,
-            file_path TEXT NOT NULL,
-            file_type TEXT NOT NULL,
-            size INTEGER NOT NULL,
-            uploaded_at TEXT NOT NULL,
-            parsed INTEGER DEFAULT 0
-        )
-    ''')
-    
-    # 添加新字段（如果不存在）
+    # 表结构和索引由 db_migrations 按 PRAGMA user_version 逐版本创建、升级
+    conn = db_pool.connect(DATABASE)
     try:
-        cursor.execute('ALTER TABLE interface_files ADD COLUMN parsed_interfaces INTEGER DEFAULT 0')
-        cursor.execute('ALTER TABLE interface_files ADD COLUMN parsed_params INTEGER DEFAULT 0')
-        cursor.execute('ALTER TABLE interface_files ADD COLUMN parsed_responses INTEGER DEFAULT 0')
-    except sqlite3.OperationalError:
-        # 字段已经存在，跳过
-        pass
-    
-    # 创建接口表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS interfaces (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            path TEXT NOT NULL,
-            method TEXT NOT NULL,
-            description TEXT,
-            file_id INTEGER NOT NULL,
-            FOREIGN KEY (file_id) REFERENCES interface_files (id)
-        )
-    ''')
-    
-    # 添加is_websocket字段到interfaces表（如果不存在）
-    try:
-        cursor.execute('ALTER TABLE interfaces ADD COLUMN is_websocket INTEGER DEFAULT 0')
-    except sqlite3.OperationalError:
-        # 字段已经存在，跳过
-        pass
-    
-    # 创建参数表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS interface_params (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            param_type TEXT NOT NULL,
-            required INTEGER DEFAULT 1,
-            description TEXT,
-            example TEXT,
-            interface_id INTEGER NOT NULL,
-            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
-        )
-    ''')
-    
-    # 创建响应字段表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS interface_responses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            response_type TEXT NOT NULL,
-            description TEXT,
-            example TEXT,
-            interface_id INTEGER NOT NULL,
-            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
-        )
-    ''')
-    
-    # 创建Mock配置表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS mock_configs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            interface_id INTEGER NOT NULL,
-            enabled INTEGER DEFAULT 1,
-            default_count INTEGER DEFAULT 10,
-            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
-        )
-    ''')
-    
-    # 创建请求日志表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS request_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            interface_id INTEGER NOT NULL,
-            method TEXT NOT NULL,
-            path TEXT NOT NULL,
-            params TEXT,
-            headers TEXT,
-            response_status INTEGER NOT NULL,
-            response_body TEXT,
-            execution_time REAL,
-            request_time TEXT NOT NULL,
-            FOREIGN KEY (interface_id) REFERENCES interfaces (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+        old_version, new_version = db_migrations.migrate(conn)
+        if old_version != new_version:
+            logger.info(f"数据库结构版本 {old_version} -> {new_version}")
+        
+        # 常用查询应当使用索引，出现全表扫描时记录警告
+        for sql, plan in db_migrations.scanned_queries(conn):
+            logger.warning(f"查询未使用索引: {sql}: {plan}")
+    finally:
+        conn.close()
 
 # 初始化数据库
 logger.info("初始化数据库...")
@@ -301,27 +254,197 @@ except Exception as e:
     logger.error(f"数据库初始化失败: {e}")
     sys.exit(1)
 
-# 辅助函数：生成随机数据
-def generate_mock_value(field_type):
-    import random
-    import string
+# 加载动态接口路由表，Mock请求直接查内存，不再访问数据库
+route_table = RouteTable(DATABASE)
+try:
+    route_count = route_table.load()
+    logger.info(f"动态接口路由表加载完成，共 {route_count} 个接口")
+except Exception as e:
+    logger.error(f"动态接口路由表加载失败: {e}")
+
+# 确定性Mock响应缓存
+response_cache = ResponseCache(config.MOCK_CACHE_MAX_BYTES)
+
+# 热点接口的Mock数据预生成池（首次使用时启动后台线程）
+mock_pool = None
+if config.MOCK_POOL_ENABLED:
+    mock_pool = MockPoolManager(
+        route_table,
+        interval=config.MOCK_POOL_REFILL_INTERVAL,
+        hot_rps=config.MOCK_POOL_HOT_RPS,
+        min_rows=config.MOCK_POOL_MIN_ROWS,
+        max_rows=config.MOCK_POOL_MAX_ROWS,
+        window_seconds=config.MOCK_POOL_WINDOW_SECONDS,
+        refill_rows=config.MOCK_POOL_REFILL_ROWS,
+        max_pools=config.MOCK_POOL_MAX_POOLS
+    )
+
+# 延迟和故障注入：按接口统计注入延迟与真实耗时；WebSocket的延迟响应由调度线程统一发送
+fault_stats = FaultStats()
+fault_scheduler = DelayScheduler()
+
+# 批量Mock请求中行数较多的项使用进程池并行生成
+batch_executor = BatchExecutor(config.MOCK_BATCH_WORKERS)
+
+# Mock请求日志：请求中只入队，由后台线程批量写入request_logs，进程退出前写入剩余记录
+request_logger = None
+if config.REQUEST_LOG_ENABLED:
+    request_logger = RequestLogWriter(
+        DATABASE,
+        flush_interval=config.REQUEST_LOG_FLUSH_INTERVAL,
+        batch_rows=config.REQUEST_LOG_BATCH_ROWS,
+        queue_size=config.REQUEST_LOG_QUEUE_SIZE,
+        sample_rate=config.REQUEST_LOG_SAMPLE_RATE,
+        max_header_bytes=config.REQUEST_LOG_MAX_HEADER_BYTES,
+        max_body_bytes=config.REQUEST_LOG_MAX_BODY_BYTES
+    )
+    atexit.register(request_logger.close)
+
+# 请求日志汇总：后台定期把原始日志汇总为分钟和小时统计，并清理过期的原始日志（在启动服务时开始运行）
+request_rollup = RequestLogRollup(
+    DATABASE,
+    interval=config.REQUEST_LOG_ROLLUP_INTERVAL,
+    raw_retention_hours=config.REQUEST_LOG_RETENTION_HOURS,
+    rollup_retention_days=config.REQUEST_LOG_ROLLUP_RETENTION_DAYS
+)
+
+# 已删除文件的后台清理：删除文件时只写入墓碑，关联数据由后台线程分批删除，上传的文件也在后台移除
+file_purger = FilePurger(
+    DATABASE,
+    chunk_interfaces=config.FILE_PURGE_CHUNK_INTERFACES,
+    chunk_rows=config.FILE_PURGE_CHUNK_ROWS,
+    pause=config.FILE_PURGE_PAUSE
+)
+atexit.register(file_purger.stop)
+
+# 按需性能分析：请求头 X-Profile（或参数 _profile）为 cprofile / sample 时只分析这一个请求，
+# 需要管理令牌（请求头 X-Profile-Token）或配置允许；分析结果的id在响应头 X-Profile-Id 中返回
+request_profiler = RequestProfiler(
+    ProfileStore(config.PROFILE_FOLDER, config.PROFILE_MAX_CAPTURES, config.PROFILE_MAX_BYTES),
+    enabled=config.PROFILE_ENABLED,
+    admin_token=config.PROFILE_ADMIN_TOKEN,
+    sample_interval=config.PROFILE_SAMPLE_INTERVAL
+)
+
+# 在最后注册，分析范围覆盖请求处理的全部过程（流式响应只分析到返回响应头为止）
+@app.before_request
+def start_request_profile():
+    flag = request.headers.get('X-Profile') or request.args.get('_profile')
+    if flag:
+        mode = request_profiler.requested_mode(flag, request.headers.get('X-Profile-Token'))
+        if mode:
+            g.profile_capture = request_profiler.start(mode, f'{request.method} {request.path}')
+
+@app.after_request
+def finish_request_profile(response):
+    capture = g.pop('profile_capture', None)
+    if capture is not None:
+        capture_id = capture.stop()
+        if capture_id:
+            response.headers['X-Profile-Id'] = capture_id
+    return response
+
+@app.teardown_request
+def discard_request_profile(exc):
+    # 未经过after_request（例如处理中断）时也要停止分析
+    capture = g.pop('profile_capture', None)
+    if capture is not None:
+        capture.stop()
+
+# Socket.IO事件数据中的 _profile、_profile_token 要求性能分析时返回 (分析方式, 分析对象)，
+# 不要求或未授权时分析方式为None；这两个字段会从data中移除，不写入请求日志
+def socket_profile_request(event, data):
+    if not isinstance(data, dict) or '_profile' not in data:
+        return None, None
+    mode = request_profiler.requested_mode(data.pop('_profile'), data.pop('_profile_token', None))
+    return mode, f"socketio {event} {data.get('method', 'GET')} {data.get('path', '')}"
+
+# 读取性能分析记录，返回 (状态码, 内容, Content-Type)（HTTP和ASGI两种服务方式共用）
+def load_profile_report(capture_id, fmt):
+    try:
+        result = request_profiler.store.render(capture_id, fmt)
+    except ValueError as e:
+        return 400, app.json.dumps_bytes({'code': 400, 'message': str(e), 'data': None}), 'application/json'
+    if result is None:
+        payload = {'code': 404, 'message': f'性能分析记录 {capture_id} 不存在', 'data': None}
+        return 404, app.json.dumps_bytes(payload), 'application/json'
+    return (200,) + result
+
+# 记录一次Mock请求的日志和按接口统计的耗时指标（HTTP、Socket.IO和批量请求共用），
+# entry为处理请求时已从路由表查到的接口（未匹配时为None），不再重复查找；
+# 耗时从started开始计算，不含注入的延迟；transport为 http / socketio / batch
+def record_mock_request(transport, method, full_path, params, headers, status, body, started=None, entry=None):
+    execution_time = (time.perf_counter() - started) * 1000 if started is not None else None
+    if execution_time is not None and metrics.enabled:
+        label = metrics.MOCK_INTERFACE_LABELS.label(str(entry.interface_id)) if entry else 'unmatched'
+        metrics.MOCK_REQUEST_SECONDS.observe((transport, label), execution_time / 1000)
+    if request_logger is not None:
+        request_logger.record(method, full_path, params, headers, status, body, execution_time,
+                              entry.interface_id if entry else UNKNOWN_INTERFACE_ID)
+
+# 记录已保存的上传文件并同步解析，返回文件信息（HTTP和ASGI两种服务方式共用）
+def register_uploaded_file(filename, file_path, file_type):
+    # 创建文件记录
+    uploaded_at = datetime.now().isoformat()
     
-    if field_type in ['java.lang.String', 'string', 'java.lang.Object']:
-        return ''.join(random.choices(string.ascii_letters, k=10))
-    elif field_type in ['java.lang.Integer', 'int', 'java.lang.Long', 'long']:
-        return random.randint(0, 1000)
-    elif field_type in ['java.lang.Boolean', 'boolean']:
-        return random.choice([True, False])
-    elif field_type in ['java.lang.Double', 'double', 'java.lang.Float', 'float', 'java.math.BigDecimal', 'decimal']:
-        return round(random.uniform(0, 1000), 2)
-    elif field_type in ['java.util.Date', 'date', 'java.time.LocalDate']:
-        return datetime.now().strftime('%Y-%m-%d')
-    elif field_type in ['java.util.List', 'list', 'java.util.ArrayList']:
-        return [generate_mock_value('string') for _ in range(random.randint(1, 5))]
-    elif field_type in ['java.util.Map', 'map', 'java.util.HashMap']:
-        return {generate_mock_value('string'): generate_mock_value('string') for _ in range(random.randint(1, 3))}
-    else:
-        return 'mock_value'
+    # 根据文件类型设置解析状态
+    file_ext = os.path.splitext(filename)[1].lower()
+    supported_types = ['.json', '.md', '.txt', '.docx', '.xlsx', '.pdf', '.png', '.jpg', '.jpeg']
+    parsed_status = 1 if file_ext in supported_types else 0
+    
+    logger.info(f"准备插入数据库，文件信息: filename={filename}, file_path={file_path}, file_type={file_type}, size={os.path.getsize(file_path)}, uploaded_at={uploaded_at}, parsed={parsed_status}")
+    
+    # 创建文件记录到数据库
+    conn = db_pool.connect(DATABASE)
+    try:
+        cursor = conn.cursor()
+        
+        # 先检查表结构
+        cursor.execute("PRAGMA table_info(interface_files)")
+        table_info = cursor.fetchall()
+        logger.info(f"表结构: {table_info}")
+        
+        # 简化插入语句，只插入必要字段
+        cursor.execute('''
+            INSERT INTO interface_files (filename, file_path, file_type, size, uploaded_at, parsed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (filename, file_path, file_type, 
+              os.path.getsize(file_path), uploaded_at, parsed_status))
+        file_id = cursor.lastrowid
+        
+        conn.commit()
+    finally:
+        # 插入失败时未提交的数据随连接关闭一起丢弃
+        conn.close()
+    
+    logger.info(f"文件记录已添加到数据库，文件ID: {file_id}")
+    
+    # 同步执行文件解析
+    logger.info(f"准备执行文件解析，文件ID: {file_id}")
+    # 执行文件解析，解析使用单独的时限，超时后文件标记为解析失败
+    file_type_label = metrics.file_type_label(filename)
+    metrics.UPLOAD_BYTES.observe((file_type_label,), os.path.getsize(file_path))
+    parse_started = time.perf_counter()
+    with budget_scope(RequestBudget(config.PARSE_TIMEOUT)):
+        parse_file_async(file_id, file_path, filename, file_type)
+    metrics.PARSE_SECONDS.observe((file_type_label,), time.perf_counter() - parse_started)
+    logger.info(f"文件解析任务已执行，文件ID: {file_id}")
+    # 将新解析的接口加入路由表
+    route_table.reload_file(file_id)
+    
+    return {
+        'id': file_id,
+        'filename': filename,
+        'file_path': file_path,
+        'file_type': file_type, 
+        'size': os.path.getsize(file_path),
+        'uploaded_at': uploaded_at,
+        'parsed': parsed_status,
+        'parsed_interfaces': 0,
+        'parsed_params': 0,
+        'parsed_responses': 0,
+        'message': f'文件上传成功，正在后台解析...'
+    }
 
 # API路由：文件上传
 @app.route('/files/upload', methods=['POST'])
@@ -348,70 +471,14 @@ def upload_file():
         file.save(file_path)
         logger.info(f"文件保存成功: {file_path}")
         
-        # 创建文件记录到数据库
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
-        # 创建文件记录
-        uploaded_at = datetime.now().isoformat()
-        
-        # 根据文件类型设置解析状态
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        supported_types = ['.json', '.md', '.txt', '.docx', '.xlsx', '.pdf', '.png', '.jpg', '.jpeg']
-        parsed_status = 1 if file_ext in supported_types else 0
-        
-        logger.info(f"准备插入数据库，文件信息: filename={file.filename}, file_path={file_path}, file_type={file.content_type or 'application/octet-stream'}, size={os.path.getsize(file_path)}, uploaded_at={uploaded_at}, parsed={parsed_status}")
-        
-        # 先检查表结构
-        cursor.execute("PRAGMA table_info(interface_files)")
-        table_info = cursor.fetchall()
-        logger.info(f"表结构: {table_info}")
-        
-        # 简化插入语句，只插入必要字段
-        cursor.execute('''
-            INSERT INTO interface_files (filename, file_path, file_type, size, uploaded_at, parsed)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (file.filename, file_path, file.content_type or 'application/octet-stream', 
-              os.path.getsize(file_path), uploaded_at, parsed_status))
-        file_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"文件记录已添加到数据库，文件ID: {file_id}")
-        
-        # 同步执行文件解析
-        logger.info(f"准备执行文件解析，文件ID: {file_id}")
-        # 执行文件解析
-        parse_file_async(file_id, file_path, file.filename, file.content_type or 'application/octet-stream')
-        logger.info(f"文件解析任务已执行，文件ID: {file_id}")
-        
-        # 立即返回成功响应，告知用户文件已上传，正在后台解析
-        return jsonify({
-            'id': file_id,
-            'filename': file.filename,
-            'file_path': file_path,
-            'file_type': file.content_type or 'application/octet-stream', 
-            'size': os.path.getsize(file_path),
-            'uploaded_at': uploaded_at,
-            'parsed': parsed_status,
-            'parsed_interfaces': 0,
-            'parsed_params': 0,
-            'parsed_responses': 0,
-            'message': f'文件上传成功，正在后台解析...'
-        })
+        # 记录文件、解析并更新路由表
+        result = register_uploaded_file(file.filename, file_path, file.content_type or 'application/octet-stream')
+        return jsonify(result)
     except Exception as e:
         logger.error(f"文件上传处理失败: {str(e)}")
         logger.error(f"错误类型: {type(e).__name__}")
         import traceback
         logger.error(f"错误堆栈: {traceback.format_exc()}")
-        # 清理资源
-        try:
-            if 'conn' in locals() and conn:
-                conn.rollback()
-                conn.close()
-        except Exception as close_error:
-            logger.error(f"关闭数据库连接失败: {close_error}")
-        
         # 获取文件扩展名
         file_ext = os.path.splitext(file.filename)[1].lower()
         
@@ -441,47 +508,19 @@ def upload_file():
             'parsed': 0
         }), 500
 
+# 文件、接口列表查询（HTTP、Socket.IO和ASGI共用）：参数中有limit或cursor时按键集分页返回
+# {'items': [...], 'next_cursor': ..., 'limit': ...}，否则返回全部记录的数组；支持过滤、sort/order排序和fields字段投影，
+# 参数无效时抛出ListQueryError
+def list_records(listing, args):
+    return listing.query(DATABASE, args, config.LIST_DEFAULT_PAGE_SIZE, config.LIST_MAX_PAGE_SIZE)
+
 # API路由：获取文件列表
 @app.route('/files', methods=['GET'])
 def get_files():
-    file_id = request.args.get('file_id')
     try:
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
-        # 检查表是否存在
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='interface_files';")
-        table_exists = cursor.fetchone()
-        
-        if not table_exists:
-            conn.close()
-            logger.error("interface_files表不存在")
-            return jsonify([])
-        
-        if file_id:
-            cursor.execute('SELECT * FROM interface_files WHERE id = ?', (file_id,))
-        else:
-            cursor.execute('SELECT * FROM interface_files')
-        
-        files = cursor.fetchall()
-        conn.close()
-        
-        result = []
-        for file in files:
-            result.append({
-                'id': file[0],
-                'filename': file[1],
-                'file_path': file[2],
-                'file_type': file[3],
-                'size': file[4],
-                'uploaded_at': file[5],
-                'parsed': bool(file[6]),
-                'parsed_interfaces': file[7],
-                'parsed_params': file[8],
-                'parsed_responses': file[9]
-            })
-        
-        return jsonify(result)
+        return jsonify(list_records(FILE_LISTING, request.args))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         # 记录错误日志
         logger.error(f"获取文件列表失败: {e}")
@@ -491,65 +530,34 @@ def get_files():
 # API路由：删除文件
 @app.route('/files/<int:file_id>', methods=['DELETE'])
 def delete_file(file_id):
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    # 开始事务
-    conn.execute('BEGIN TRANSACTION')
-    
+    # 只写入墓碑，文件立即从列表和路由表中消失；接口等关联数据和上传的文件由后台分批清理
+    conn = db_pool.connect(DATABASE)
     try:
-        # 获取文件路径，用于后续删除实际文件
-        cursor.execute('SELECT file_path FROM interface_files WHERE id = ?', (file_id,))
-        file = cursor.fetchone()
-        if not file:
-            conn.rollback()
-            conn.close()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE interface_files SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL',
+                       (datetime.now().isoformat(), file_id))
+        if cursor.rowcount == 0:
             return jsonify({'error': 'File not found'}), 404
-        
-        file_path = file[0]
-        
-        # 获取该文件关联的所有接口ID
-        cursor.execute('SELECT id FROM interfaces WHERE file_id = ?', (file_id,))
-        interface_ids = [row[0] for row in cursor.fetchall()]
-        
-        # 删除接口关联的数据
-        if interface_ids:
-            # 删除请求日志
-            cursor.execute('DELETE FROM request_logs WHERE interface_id IN ({})'.format(','.join(['?'] * len(interface_ids))), interface_ids)
-            # 删除Mock配置
-            cursor.execute('DELETE FROM mock_configs WHERE interface_id IN ({})'.format(','.join(['?'] * len(interface_ids))), interface_ids)
-            # 删除响应字段
-            cursor.execute('DELETE FROM interface_responses WHERE interface_id IN ({})'.format(','.join(['?'] * len(interface_ids))), interface_ids)
-            # 删除请求参数
-            cursor.execute('DELETE FROM interface_params WHERE interface_id IN ({})'.format(','.join(['?'] * len(interface_ids))), interface_ids)
-            # 删除接口
-            cursor.execute('DELETE FROM interfaces WHERE file_id = ?', (file_id,))
-        
-        # 删除文件记录
-        cursor.execute('DELETE FROM interface_files WHERE id = ?', (file_id,))
-        
-        # 提交事务
         conn.commit()
-        conn.close()
-        
-        # 删除实际文件
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
-        return jsonify({'message': 'File deleted successfully', 'file_id': file_id})
     except Exception as e:
-        conn.rollback()
-        conn.close()
         return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+    
+    # 从路由表中移除该文件的接口，通知后台清理
+    route_table.remove_file(file_id)
+    file_purger.wake()
+    
+    return jsonify({'message': 'File deleted successfully', 'file_id': file_id})
 
 # API路由：下载文件
 @app.route('/files/download/<int:file_id>', methods=['GET'])
 def download_file(file_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     # 获取文件信息
-    cursor.execute('SELECT filename, file_path FROM interface_files WHERE id = ?', (file_id,))
+    cursor.execute('SELECT filename, file_path FROM interface_files WHERE id = ? AND deleted_at IS NULL', (file_id,))
     file = cursor.fetchone()
     conn.close()
     
@@ -575,56 +583,47 @@ def get_uploaded_file(filename):
 # API路由：获取接口列表
 @app.route('/interfaces', methods=['GET'])
 def get_interfaces():
-    file_id = request.args.get('file_id')
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
     try:
-        # 检查文件是否存在
-        if file_id:
-            cursor.execute('SELECT id FROM interface_files WHERE id = ?', (file_id,))
-            file_exists = cursor.fetchone()
-            if not file_exists:
-                return jsonify([])
-            
-            # 调试信息
-            print(f"获取文件 {file_id} 的接口列表")
-            cursor.execute('SELECT * FROM interfaces WHERE file_id = ?', (file_id,))
-        else:
-            # 调试信息
-            print("获取所有接口列表")
-            cursor.execute('SELECT * FROM interfaces')
-        
-        interfaces = cursor.fetchall()
-        
-        # 调试信息
-        print(f"查询到 {len(interfaces)} 个接口")
-        
-        result = []
-        for interface in interfaces:
-            # 检查接口字段数量，确保is_websocket字段存在
-            is_websocket = bool(interface[6]) if len(interface) > 6 else False
-            result.append({
-                'id': interface[0],
-                'name': interface[1],
-                'path': interface[2],
-                'method': interface[3],
-                'description': interface[4],
-                'file_id': interface[5],
-                'is_websocket': is_websocket
-            })
-        
-        return jsonify(result)
+        return jsonify(list_records(INTERFACE_LISTING, request.args))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"获取接口列表失败: {e}")
         return jsonify([])
-    finally:
-        conn.close()
+
+# Socket.IO获取接口列表事件的处理（Flask-SocketIO和ASGI两种服务方式共用），依次返回要发送的 (事件名, 数据)
+# 参数与 GET /interfaces 相同；带chunk_size时按该大小分批返回 interfaces_chunk 事件（最后一批done为true），
+# 每批单独查询，大量接口不会一次性占用内存和连接
+def iter_interface_events(data):
+    try:
+        if data.get('chunk_size'):
+            chunk_size = INTERFACE_LISTING.parse_limit(data, 'chunk_size', config.LIST_DEFAULT_PAGE_SIZE,
+                                                       config.LIST_MAX_PAGE_SIZE)
+            seq = 0
+            for items, next_cursor in INTERFACE_LISTING.pages(DATABASE, data, chunk_size):
+                yield 'interfaces_chunk', {
+                    'request_id': data.get('request_id'),
+                    'seq': seq,
+                    'interfaces': items,
+                    'next_cursor': next_cursor,
+                    'done': next_cursor is None
+                }
+                seq += 1
+            return
+        
+        result = list_records(INTERFACE_LISTING, data)
+        if isinstance(result, dict):
+            # 分页查询：interfaces为当前页，next_cursor为下一页游标
+            yield 'interfaces_response', {'interfaces': result['items'], 'next_cursor': result['next_cursor']}
+        else:
+            yield 'interfaces_response', {'interfaces': result}
+    except ListQueryError as e:
+        yield 'error', {'message': f'获取接口列表失败: {str(e)}'}
 
 # API路由：获取接口参数
 @app.route('/interfaces/<int:interface_id>/params', methods=['GET'])
 def get_interface_params(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM interface_params WHERE interface_id = ?', (interface_id,))
     params = cursor.fetchall()
@@ -655,7 +654,7 @@ def get_interface_params(interface_id):
 # API路由：获取接口响应字段
 @app.route('/interfaces/<int:interface_id>/responses', methods=['GET'])
 def get_interface_responses(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM interface_responses WHERE interface_id = ?', (interface_id,))
     responses = cursor.fetchall()
@@ -686,7 +685,7 @@ def get_interface_responses(interface_id):
 # API路由：获取Mock配置
 @app.route('/interfaces/<int:interface_id>/mock-config', methods=['GET'])
 def get_mock_config(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     # 查询Mock配置
@@ -698,53 +697,86 @@ def get_mock_config(interface_id):
     if mock_config:
         return jsonify({
             'enabled': bool(mock_config[2]),
-            'default_count': mock_config[3]
+            'default_count': mock_config[3],
+            'seed': mock_config[4] if len(mock_config) > 4 else None,
+            'total_count': mock_config[5] if len(mock_config) > 5 else None,
+            'fault': json.loads(mock_config[6]) if len(mock_config) > 6 and mock_config[6] else None
         })
     else:
         # 返回默认配置
         return jsonify({
             'enabled': True,
-            'default_count': 10
+            'default_count': 10,
+            'seed': None,
+            'total_count': None,
+            'fault': None
         })
 
 # API路由：保存Mock配置
 @app.route('/interfaces/<int:interface_id>/mock', methods=['POST'])
 def save_mock_config(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     try:
         data = request.get_json()
         enabled = 1 if data.get('enabled', True) else 0
         default_count = int(data.get('default_count', 10))
-        
+
         # 检查Mock配置是否存在
         cursor.execute('SELECT * FROM mock_configs WHERE interface_id = ?', (interface_id,))
         mock_config = cursor.fetchone()
+
+        # 未传seed/total_count时保留原有的值；传null表示取消
+        if 'seed' in data:
+            seed = int(data['seed']) if data['seed'] not in (None, '') else None
+        else:
+            seed = mock_config[4] if mock_config and len(mock_config) > 4 else None
+        if 'total_count' in data:
+            total_count = int(data['total_count']) if data['total_count'] not in (None, '') else None
+        else:
+            total_count = mock_config[5] if mock_config and len(mock_config) > 5 else None
+        if 'fault' in data:
+            fault_config = json.dumps(data['fault'], ensure_ascii=False) if data['fault'] else None
+        else:
+            fault_config = mock_config[6] if mock_config and len(mock_config) > 6 else None
         
+        # 校验故障注入配置
+        try:
+            fault = parse_fault_config(fault_config)
+        except FaultConfigError as e:
+            conn.close()
+            return jsonify({'error': f'故障注入配置无效: {e}'}), 400
+
         if mock_config:
             # 更新现有配置
             cursor.execute('''
-                UPDATE mock_configs 
-                SET enabled = ?, default_count = ? 
+                UPDATE mock_configs
+                SET enabled = ?, default_count = ?, seed = ?, total_count = ?, fault_config = ?
                 WHERE interface_id = ?
-            ''', (enabled, default_count, interface_id))
+            ''', (enabled, default_count, seed, total_count, fault_config, interface_id))
         else:
             # 创建新配置
             cursor.execute('''
-                INSERT INTO mock_configs (interface_id, enabled, default_count)
-                VALUES (?, ?, ?)
-            ''', (interface_id, enabled, default_count))
-        
+                INSERT INTO mock_configs (interface_id, enabled, default_count, seed, total_count, fault_config)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (interface_id, enabled, default_count, seed, total_count, fault_config))
+
         conn.commit()
         conn.close()
-        
+
+        # 同步更新路由表中的Mock配置
+        route_table.update_mock_config(interface_id, enabled, default_count, seed, total_count, fault)
+
         return jsonify({
             'status': 'success',
             'message': 'Mock配置保存成功',
             'mock_config': {
                 'enabled': bool(enabled),
-                'default_count': default_count
+                'default_count': default_count,
+                'seed': seed,
+                'total_count': total_count,
+                'fault': json.loads(fault_config) if fault_config else None
             }
         })
     except Exception as e:
@@ -761,7 +793,7 @@ def update_mock_config(interface_id):
 # API路由：生成接口服务
 @app.route('/interfaces/generate/<int:interface_id>', methods=['POST'])
 def generate_interface(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     # 检查是否已经生成过Mock配置
@@ -778,7 +810,9 @@ def generate_interface(interface_id):
         # 重新查询获取刚刚插入的记录
         cursor.execute('SELECT * FROM mock_configs WHERE interface_id = ?', (interface_id,))
         mock_config = cursor.fetchone()
-    
+        # 同步更新路由表中的Mock配置
+        route_table.update_mock_config(interface_id, mock_config[2], mock_config[3])
+
     # 获取接口信息
     cursor.execute('SELECT * FROM interfaces WHERE id = ?', (interface_id,))
     interface = cursor.fetchone()
@@ -803,7 +837,7 @@ def generate_interface(interface_id):
 # API路由：生成WebSocket接口服务
 @app.route('/interfaces/generate-websocket/<int:interface_id>', methods=['POST'])
 def generate_websocket_interface(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     try:
@@ -834,7 +868,10 @@ def generate_websocket_interface(interface_id):
         interface = cursor.fetchone()
         
         conn.commit()
-        
+
+        # 刷新路由表中的接口信息
+        route_table.reload_interface(interface_id)
+
         return jsonify({
             'status': 'success',
             'message': 'WebSocket接口服务生成成功',
@@ -859,7 +896,7 @@ def generate_websocket_interface(interface_id):
 # API路由：切换接口为HTTP类型
 @app.route('/interfaces/switch-to-http/<int:interface_id>', methods=['POST'])
 def switch_to_http_interface(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     try:
@@ -887,7 +924,10 @@ def switch_to_http_interface(interface_id):
         mock_config = cursor.fetchone()
         
         conn.commit()
-        
+
+        # 刷新路由表中的接口信息
+        route_table.reload_interface(interface_id)
+
         return jsonify({
             'status': 'success',
             'message': '接口已切换为HTTP类型',
@@ -912,7 +952,7 @@ def switch_to_http_interface(interface_id):
 # API路由：更新接口调用方式（GET/POST）
 @app.route('/interfaces/update-method/<int:interface_id>', methods=['POST'])
 def update_interface_method(interface_id):
-    conn = sqlite3.connect(DATABASE)
+    conn = db_pool.connect(DATABASE)
     cursor = conn.cursor()
     
     try:
@@ -946,7 +986,10 @@ def update_interface_method(interface_id):
         ''', (method, interface_id))
         
         conn.commit()
-        
+
+        # 接口方法变化后路由键随之变化，刷新路由表
+        route_table.reload_interface(interface_id)
+
         # 返回更新后的接口信息
         return jsonify({
             'status': 'success',
@@ -972,6 +1015,8 @@ if socketio is not None:
     # 连接事件
     @socketio.on('connect')
     def handle_connect():
+        metrics.SOCKETIO_CONNECTIONS.inc()
+        metrics.SOCKETIO_EVENTS.inc(('connect',))
         try:
             logger.info('Client connected via WebSocket, sid: %s', request.sid)
             # 检查request对象是否有transport属性
@@ -991,6 +1036,8 @@ if socketio is not None:
     # 断开连接事件
     @socketio.on('disconnect')
     def handle_disconnect():
+        metrics.SOCKETIO_CONNECTIONS.dec()
+        metrics.SOCKETIO_EVENTS.inc(('disconnect',))
         try:
             logger.info('Client disconnected from WebSocket, sid: %s', request.sid)
             # 检查request对象是否有transport属性
@@ -1004,120 +1051,75 @@ if socketio is not None:
     # 获取接口列表事件
     @socketio.on('get_interfaces')
     def handle_get_interfaces(data):
-        conn = None
+        metrics.SOCKETIO_EVENTS.inc(('get_interfaces',))
         try:
             logger.info('Handling get_interfaces request from sid: %s, data: %s', request.sid, data)
-            file_id = data.get('file_id')
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            if file_id:
-                cursor.execute('SELECT * FROM interfaces WHERE file_id = ?', (file_id,))
-            else:
-                cursor.execute('SELECT * FROM interfaces')
-            
-            interfaces = cursor.fetchall()
-            logger.debug('Found %d interfaces for file_id %s', len(interfaces), file_id)
-            
-            result = []
-            for interface in interfaces:
-                result.append({
-                    'id': interface[0],
-                    'name': interface[1],
-                    'path': interface[2],
-                    'method': interface[3],
-                    'description': interface[4],
-                    'file_id': interface[5],
-                    'is_websocket': interface[6] if len(interface) > 6 else False
-                })
-            
-            emit('interfaces_response', {'interfaces': result})
+            for event, payload in iter_interface_events(data or {}):
+                emit(event, payload)
             logger.info('Successfully handled get_interfaces request for sid: %s', request.sid)
         except Exception as e:
             logger.error(f'Error getting interfaces via WebSocket: {type(e).__name__}: {e}')
             import traceback
             traceback.print_exc()
             emit('error', {'message': f'获取接口列表失败: {str(e)}'})
-        finally:
-            if conn:
-                conn.close()
+
+    # 批量动态接口请求事件（WebSocket版本）
+    @socketio.on('dynamic_batch')
+    def handle_dynamic_batch(data):
+        metrics.SOCKETIO_EVENTS.inc(('dynamic_batch',))
+        try:
+            mode, target = socket_profile_request('dynamic_batch', data)
+            items, error = parse_mock_batch(data)
+            if error:
+                emit('dynamic_batch_response', {'code': 400, 'message': error, 'data': None})
+                return
+            with budget_scope(new_request_budget()):
+                body, profile_id = request_profiler.call(mode, target, run_mock_batch, items)
+            payload = app.json.loads(body)
+            if profile_id:
+                payload['profile_id'] = profile_id
+            emit('dynamic_batch_response', payload)
+        except Exception as e:
+            logger.error(f'Error handling dynamic batch via WebSocket for sid: {request.sid}: {type(e).__name__}: {e}')
+            emit('dynamic_batch_response', {'code': 500, 'message': f'处理批量请求失败: {str(e)}', 'data': None})
 
     # 动态接口请求事件（WebSocket版本）
     @socketio.on('dynamic_interface')
     def handle_dynamic_interface(data):
-        conn = None
+        metrics.SOCKETIO_EVENTS.inc(('dynamic_interface',))
         try:
             logger.info('Handling dynamic_interface request from sid: %s, data: %s', request.sid, data)
             full_path = data.get('path', '')
             method = data.get('method', 'GET')
-            params = data.get('params', {})
-            
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # 查找匹配的接口
-            cursor.execute('''
-                SELECT * FROM interfaces WHERE path = ? AND method = ?
-            ''', (full_path, method))
-            interface = cursor.fetchone()
-            
-            if not interface:
-                logger.warning(f'Interface {method} {full_path} not found for sid: {request.sid}')
-                emit('dynamic_response', {
-                    'code': 404,
-                    'message': f'接口 {method} {full_path} 不存在',
-                    'data': None
-                })
-                return
-            
-            # 获取Mock配置
-            cursor.execute('SELECT * FROM mock_configs WHERE interface_id = ?', (interface[0],))
-            mock_config = cursor.fetchone()
-            
-            if not mock_config or not mock_config[2]:
-                logger.warning(f'Mock service not enabled for interface {method} {full_path}, sid: {request.sid}')
-                emit('dynamic_response', {
-                    'code': 500,
-                    'message': '该接口的Mock服务未启用',
-                    'data': None
-                })
-                return
             
-            # 优先使用请求中的mock_count，否则使用数据库默认值
-            request_mock_count = data.get('mock_count')
-            mock_count = int(request_mock_count) if request_mock_count else mock_config[3]
-            logger.debug('Using mock_count: %d for interface %s %s', mock_count, method, full_path)
-            
-            # 获取响应字段
-            cursor.execute('SELECT * FROM interface_responses WHERE interface_id = ?', (interface[0],))
-            response_fields = cursor.fetchall()
-            logger.debug('Found %d response fields for interface %s %s', len(response_fields), method, full_path)
-            
-            # 生成Mock数据
-            mock_data = []
-            for _ in range(mock_count):
-                data_item = {}
-                if response_fields:
-                    for field in response_fields:
-                        data_item[field[1]] = generate_mock_value(field[2])
-                else:
-                    # 如果没有响应字段，生成默认的mock数据
-                    data_item['id'] = str(uuid.uuid4())
-                    data_item['message'] = f'Success response from {full_path}'
-                    data_item['status'] = 'success'
-                    data_item['timestamp'] = datetime.now().isoformat()
-                    data_item['random_data'] = generate_mock_value('string')
-                    data_item['random_number'] = generate_mock_value('int')
-                    data_item['random_boolean'] = generate_mock_value('boolean')
-                mock_data.append(data_item)
+            # 查找接口并生成Mock数据
+            mode, target = socket_profile_request('dynamic_interface', data)
+            started = time.perf_counter()
+            try:
+                with budget_scope(new_request_budget()):
+                    (payload, fault, entry), profile_id = request_profiler.call(
+                        mode, target, build_socket_mock_payload, data)
+            except BudgetExceeded as e:
+                payload, fault, profile_id = e.payload(), None, getattr(e, 'profile_id', None)
+                entry = route_table.lookup(method, full_path)
+            if profile_id:
+                payload = dict(payload, profile_id=profile_id)
+            record_mock_request('socketio', method, full_path, data, None,
+                                200 if payload['code'] == 0 else payload['code'], payload, started, entry)
             
-            # 发送响应
-            emit('dynamic_response', {
-                'code': 0,
-                'message': 'success',
-                'data': mock_data
-            })
-            logger.info('Successfully handled dynamic_interface request: %s %s for sid: %s', method, full_path, request.sid)
+            # 发送响应；注入了延迟时交给调度线程到期后发送，不占用当前处理线程
+            if fault is not None:
+                fault_stats.record(fault.interface_id, fault.delay * 1000, (time.perf_counter() - started) * 1000,
+                                   fault.error_status is not None)
+            if fault is not None and fault.delay:
+                sid = request.sid
+                fault_scheduler.call_later(fault.delay, lambda: socketio.emit('dynamic_response', payload, to=sid))
+            else:
+                emit('dynamic_response', payload)
+            if payload['code'] == 0:
+                logger.info('Successfully handled dynamic_interface request: %s %s for sid: %s', method, full_path, request.sid)
+            else:
+                logger.warning(f"dynamic_interface request failed for sid: {request.sid}: {payload['message']}")
         except Exception as e:
             logger.error(f'Error handling dynamic interface via WebSocket for sid: {request.sid}: {type(e).__name__}: {e}')
             import traceback
@@ -1131,9 +1133,14 @@ if socketio is not None:
                 })
             except Exception as emit_error:
                 logger.error(f'Error emitting dynamic response for sid: {request.sid}: {emit_error}')
-        finally:
-            if conn:
-                conn.close()
+
+# API路由：批量Mock请求
+@app.route('/mock-batch', methods=['POST'])
+def mock_batch():
+    items, error = parse_mock_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({'code': 400, 'message': error, 'data': None}), 400
+    return Response(run_mock_batch(items), mimetype='application/json')
 
 # API路由：动态接口请求（带/dynamic前缀）
 @app.route('/dynamic/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'])
@@ -1152,6 +1159,88 @@ def health_check():
         'version': '1.0.0'
     })
 
+# Mock响应缓存统计路由
+@app.route('/mock-cache/stats', methods=['GET'])
+def mock_cache_stats():
+    return jsonify(response_cache.stats())
+
+# API路由：Mock预生成池统计
+@app.route('/mock-pool/stats', methods=['GET'])
+def mock_pool_stats():
+    if mock_pool is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(mock_pool.stats(), enabled=True))
+
+# API路由：Prometheus文本格式的运行指标
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# API路由：最近的性能分析记录（需管理令牌或配置允许）
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    if not request_profiler.authorized(request.headers.get('X-Profile-Token') or request.args.get('token')):
+        return jsonify({'code': 403, 'message': '没有查看性能分析记录的权限', 'data': None}), 403
+    return jsonify({
+        'code': 0,
+        'message': 'success',
+        'data': request_profiler.store.list(request.args.get('limit', type=int))
+    })
+
+# API路由：下载性能分析记录，format为 pstats（cProfile原始数据）、collapsed（火焰图折叠栈）或 text
+@app.route('/profiles/<capture_id>', methods=['GET'])
+def get_profile(capture_id):
+    if not request_profiler.authorized(request.headers.get('X-Profile-Token') or request.args.get('token')):
+        return jsonify({'code': 403, 'message': '没有查看性能分析记录的权限', 'data': None}), 403
+    status, body, content_type = load_profile_report(capture_id, request.args.get('format', FORMAT_COLLAPSED))
+    response = Response(body, status=status, content_type=content_type)
+    if status == 200 and request.args.get('format') == FORMAT_PSTATS:
+        response.headers['Content-Disposition'] = f'attachment; filename={capture_id}.prof'
+    return response
+
+# API路由：数据库连接池统计
+@app.route('/db-pool/stats', methods=['GET'])
+def db_pool_stats():
+    return jsonify({'pools': db_pool.stats()})
+
+# API路由：已删除文件的后台清理统计
+@app.route('/file-purge/stats', methods=['GET'])
+def file_purge_stats():
+    return jsonify(dict(file_purger.stats(), pending_files=file_purger.pending()))
+
+# API路由：请求日志写入统计
+@app.route('/request-logs/stats', methods=['GET'])
+def request_log_stats():
+    if request_logger is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(request_logger.stats(), enabled=True))
+
+# API路由：按时间范围查询各接口的请求数、吞吐量和耗时分位数（来自请求日志汇总）
+# 参数 start、end 为Unix时间戳或ISO格式时间，默认最近1小时；refresh=1 时先汇总尚未汇总的日志
+@app.route('/request-logs/latency', methods=['GET'])
+def request_log_latency():
+    now = time.time()
+    end = parse_time(request.args.get('end'), now)
+    start = parse_time(request.args.get('start'), end - 3600)
+    interface_id = request.args.get('interface_id', type=int)
+    if request.args.get('refresh') in ('1', 'true'):
+        if request_logger is not None:
+            request_logger.flush()
+        request_rollup.run_once()
+    return jsonify({
+        'start': int(start),
+        'end': int(end),
+        'interfaces': request_rollup.query(start, end, interface_id)
+    })
+
+# Mock延迟和故障注入统计路由
+@app.route('/mock-faults/stats', methods=['GET'])
+def mock_fault_stats():
+    return jsonify({
+        'interfaces': fault_stats.stats(),
+        'pending_delayed_responses': fault_scheduler.pending()
+    })
+
 # WebSocket状态检查路由
 @app.route('/websocket-status', methods=['GET'])
 def websocket_status():
@@ -1221,48 +1310,299 @@ def static_files(filename):
         'version': '1.0.0'
     }), 404
 
-# 处理动态请求的通用函数
-def handle_dynamic_request(path):
-    full_path = f"/{path}"
-    method = request.method
-    
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    # 查找匹配的接口
-    cursor.execute('''
-        SELECT * FROM interfaces WHERE path = ? AND method = ?
-    ''', (full_path, method))
-    interface = cursor.fetchone()
+# Mock请求的处理方式（与Web框架无关，HTTP和ASGI两种服务方式共用）
+MOCK_RESULT_JSON = 'json'  # 数据为响应内容
+MOCK_RESULT_CACHED = 'cached'  # 数据为 (缓存key, 生成响应内容的函数)
+MOCK_RESULT_STREAM = 'stream'  # 数据为 stream_mock_response / iter_mock_stream 的参数
+MOCK_RESULT_ERROR = 'error'  # 数据为 (HTTP状态码, 响应内容)，由故障注入或数据量检查产生
+MOCK_RESULT_ROWS = 'rows'  # 数据为 generate_mock_rows 的参数，尚未生成
+
+# 逐段输出流式Mock响应：先输出响应外层结构，再逐批输出序列化后的数据行
+# 流式输出在请求处理函数返回之后进行，使用单独的预算限制输出时间和数据量；
+# 超出预算时结束数组并在响应末尾附上错误信息，保证输出的仍是完整的JSON
+def iter_mock_stream(plan, mock_count, full_path, seed=None, budget=None):
+    if budget is None:
+        budget = new_request_budget(config.MOCK_STREAM_TIMEOUT)
+    yield '{"code": 0, "message": "success", "data": ['
+    first = True
+    try:
+        for rows in plan.iter_chunks(mock_count, full_path, config.MOCK_STREAM_CHUNK_ROWS, seed=seed):
+            # 整批序列化后去掉外层的[]
+            body = app.json.dumps(rows)[1:-1]
+            if not body:
+                continue
+            budget.add_bytes(len(body))
+            yield body if first else ', ' + body
+            first = False
+    except BudgetExceeded as e:
+        logger.warning(f"流式Mock响应超出预算，已结束输出: {full_path}: {e}")
+        yield '], "truncated": true, "error": ' + json.dumps(str(e), ensure_ascii=False) + '}'
+        return
+    yield ']}'
+
+# 流式返回Mock数据
+def stream_mock_response(plan, mock_count, full_path, seed=None):
+    return Response(iter_mock_stream(plan, mock_count, full_path, seed), mimetype='application/json')
+
+# 解析seed参数，无效时返回None
+def parse_seed(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# 获取确定性Mock响应的 (响应字节, ETag)，序列化结果按key缓存
+def get_cached_mock_body(key, build_payload):
+    item = response_cache.get(key)
+    if item is None:
+        body = app.json.dumps_bytes(build_payload())
+        item = response_cache.put(key, body)
+    return item
+
+# 返回确定性的Mock数据，并支持ETag/304
+def cached_mock_response(key, build_payload):
+    body, etag = get_cached_mock_body(key, build_payload)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+# 解析正整数参数，无效时返回默认值
+def parse_positive_int(value, default):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+# 解析分页参数，返回 (页码, 每页条数)；每页条数默认取mock_count，并受 MOCK_MAX_PAGE_SIZE 限制
+def resolve_page(options, mock_count):
+    page = parse_positive_int(options.get('page'), 1)
+    page_size = parse_positive_int(options.get('page_size'), mock_count)
+    return page, min(page_size, config.MOCK_MAX_PAGE_SIZE)
+
+# 生成分页Mock数据：只生成当前页的行，第i行由 (seed, i) 决定，翻页结果稳定
+def build_mock_page(entry, page, page_size, full_path, seed):
+    total = entry.total_count
+    start = (page - 1) * page_size
+    count = max(0, min(page_size, total - start))
+    return {
+        'code': 0,
+        'message': 'success',
+        'data': entry.plan.generate_page(start, count, full_path, seed),
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'total_pages': (total + page_size - 1) // page_size
+    }
+
+# 按样本行估算响应大小，在生成之前检查请求的数据量，返回 (行数, 错误响应)
+# 超过上限时按 MOCK_OVERSIZE_POLICY 拒绝（413）或截断为上限内的行数
+def check_mock_size(entry, mock_count, full_path):
+    row_bytes = entry.plan.estimate_row_bytes(full_path)
+    limit = min(config.MOCK_MAX_ROWS, config.MOCK_MAX_RESPONSE_BYTES // row_bytes)
+    if mock_count <= limit:
+        return mock_count, None
+    if config.MOCK_OVERSIZE_POLICY == 'truncate':
+        logger.warning(f"Mock请求行数 {mock_count} 超过上限，已截断为 {limit} 行: {full_path}")
+        return limit, None
+    return mock_count, {
+        'code': 413,
+        'message': f'请求的数据量过大: {mock_count} 行，预计约 {format_size(mock_count * row_bytes)}，单次最多 {limit} 行',
+        'data': None
+    }
+
+# 根据路由表和请求参数决定Mock请求的处理方式，返回 (处理方式, 数据, 故障注入结果, 接口)，此时还未生成数据行；
+# 未匹配到接口时接口为None
+# allow_stream为False时（批量请求）大数据量也返回 MOCK_RESULT_ROWS，由调用方决定如何生成
+def prepare_mock_request(method, full_path, request_options, allow_stream=True):
+    # 从路由表查找匹配的接口
+    entry = route_table.lookup(method, full_path)
     
-    if not interface:
-        conn.close()
-        return jsonify({
+    if not entry:
+        return MOCK_RESULT_JSON, {
             'code': 404,
             'message': f'接口 {method} {full_path} 不存在',
             'data': None
-        })
-    
-    # 获取Mock配置
-    cursor.execute('SELECT * FROM mock_configs WHERE interface_id = ?', (interface[0],))
-    mock_config = cursor.fetchone()
+        }, None, None
     
-    if not mock_config or not mock_config[2]:
-        conn.close()
-        return jsonify({
+    if not entry.mock_enabled:
+        return MOCK_RESULT_JSON, {
             'code': 500,
             'message': '该接口的Mock服务未启用',
             'data': None
-        })
+        }, None, entry
+    
+    # 按接口的故障注入配置抽取本次请求的延迟，并决定是否返回错误
+    fault = entry.fault.decide(entry.interface_id) if entry.fault is not None else None
+    if fault is not None and fault.error_status:
+        return MOCK_RESULT_ERROR, (fault.error_status, fault.error_payload()), fault, entry
+    
+    # 优先使用请求中的mock_count，否则使用数据库默认值
+    mock_count = entry.default_count
+    request_mock_count = request_options.get('mock_count')
+    if request_mock_count:
+        try:
+            mock_count = int(request_mock_count)
+        except (TypeError, ValueError):
+            pass
+    
+    # 请求中的seed优先，否则使用Mock配置中的seed
+    seed = parse_seed(request_options.get('seed'))
+    if seed is None:
+        seed = entry.seed
+    
+    # 配置了虚拟总条数时按分页返回，未指定seed时以接口id作为seed，保证翻页数据一致
+    if entry.total_count is not None:
+        page, page_size = resolve_page(request_options, mock_count)
+        if seed is None:
+            seed = entry.interface_id
+        key = (entry.interface_id, full_path, 'page', page, page_size, seed, entry.version)
+        return MOCK_RESULT_CACHED, (key, lambda: build_mock_page(entry, page, page_size, full_path, seed)), fault, entry
+    
+    mock_count, error = check_mock_size(entry, mock_count, full_path)
+    if error:
+        return MOCK_RESULT_ERROR, (413, error), fault, entry
+    
+    # 数据量较大或请求指定stream时，使用流式响应
+    if mock_count >= config.MOCK_STREAM_THRESHOLD or str(request_options.get('stream', '')).lower() in ('1', 'true'):
+        if not allow_stream:
+            return MOCK_RESULT_ROWS, (entry, mock_count, full_path, seed), fault, entry
+        return MOCK_RESULT_STREAM, (entry.plan, mock_count, full_path, seed), fault, entry
+    
+    # 指定了seed时数据是确定的，走响应缓存
+    if seed is not None:
+        key = (entry.interface_id, full_path, mock_count, seed, entry.version)
+        return MOCK_RESULT_CACHED, (key, lambda: {
+            'code': 0,
+            'message': 'success',
+            'data': entry.plan.generate_rows(mock_count, full_path, seed=seed)
+        }), fault, entry
+    
+    return MOCK_RESULT_ROWS, (entry, mock_count, full_path, None), fault, entry
+
+# 生成Mock数据行：未指定seed时优先从预生成池中取
+def generate_mock_rows(entry, mock_count, full_path, seed=None):
+    mock_data = None
+    if seed is None and mock_pool is not None:
+        mock_data = mock_pool.take(entry, mock_count)
+        if mock_data is not None:
+            metrics.MOCK_ROWS.inc(('pool',), len(mock_data))
+    if mock_data is None:
+        mock_data = entry.plan.generate_rows(mock_count, full_path, seed=seed)
+    return mock_data
+
+# 根据路由表和请求参数处理Mock请求，返回 (处理方式, 数据, 故障注入结果, 接口)
+def resolve_mock_request(method, full_path, request_options):
+    kind, result, fault, entry = prepare_mock_request(method, full_path, request_options)
+    if kind == MOCK_RESULT_ROWS:
+        return MOCK_RESULT_JSON, {
+            'code': 0,
+            'message': 'success',
+            'data': generate_mock_rows(*result)
+        }, fault, entry
+    return kind, result, fault, entry
+
+# 解析批量Mock请求，支持 {"requests": [...]} 或直接传数组，返回 (请求列表, 错误信息)
+def parse_mock_batch(data):
+    items = data.get('requests') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return None, '请求体必须是数组，或包含requests数组的对象'
+    if len(items) > config.MOCK_BATCH_MAX_ITEMS:
+        return None, f'单次批量请求最多 {config.MOCK_BATCH_MAX_ITEMS} 项'
+    return items, None
+
+# 批量处理Mock请求：一次遍历路由表解析全部请求，行数较多的项交给进程池并行生成，
+# 返回整个响应的JSON字节，每项包含序号、状态码和与单个请求相同的响应内容
+# 注意：批量请求只注入错误，不注入延迟和带宽限制
+def run_mock_batch(items):
+    dumps_bytes = app.json.dumps_bytes
+    results = [None] * len(items)
+    # 每项的 (方法, 路径, 接口)，用于记录请求日志
+    targets = [None] * len(items)
+    futures = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = (400, dumps_bytes({'code': 400, 'message': '批量请求项必须是对象', 'data': None}))
+            continue
+        method = str(item.get('method', 'GET')).upper()
+        full_path = '/' + str(item.get('path', '')).lstrip('/')
+        targets[index] = (method, full_path, None)
+        try:
+            kind, result, fault, entry = prepare_mock_request(method, full_path, item, allow_stream=False)
+            targets[index] = (method, full_path, entry)
+            if kind == MOCK_RESULT_ROWS:
+                _, mock_count, full_path, seed = result
+                if batch_executor.enabled and mock_count >= config.MOCK_BATCH_PARALLEL_ROWS:
+                    # 子进程中没有请求预算，提交前先登记行数
+                    charge_rows(mock_count)
+                    metrics.MOCK_ROWS.inc(('process',), mock_count)
+                    futures.append((index, batch_executor.submit(entry.response_fields, mock_count, full_path, seed)))
+                    continue
+                payload = {'code': 0, 'message': 'success', 'data': generate_mock_rows(*result)}
+                results[index] = (200, dumps_bytes(payload))
+            elif kind == MOCK_RESULT_CACHED:
+                results[index] = (200, get_cached_mock_body(*result)[0])
+            elif kind == MOCK_RESULT_ERROR:
+                results[index] = (result[0], dumps_bytes(result[1]))
+            else:
+                results[index] = (200 if result['code'] == 0 else result['code'], dumps_bytes(result))
+        except BudgetExceeded as e:
+            # 预算是整个批量请求共用的，超出后其余项同样返回错误
+            results[index] = (e.status, dumps_bytes(e.payload()))
+        except Exception as e:
+            logger.error(f"批量Mock请求第 {index} 项处理失败: {type(e).__name__}: {e}")
+            results[index] = (500, dumps_bytes({'code': 500, 'message': f'处理动态接口失败: {str(e)}', 'data': None}))
+    
+    # 等待子进程生成的数据，直接拼接已序列化的JSON
+    for index, future in futures:
+        try:
+            results[index] = (200, b'{"code":0,"data":' + future.result() + b',"message":"success"}')
+        except Exception as e:
+            logger.error(f"批量Mock请求第 {index} 项生成失败: {type(e).__name__}: {e}")
+            results[index] = (500, dumps_bytes({'code': 500, 'message': f'处理动态接口失败: {str(e)}', 'data': None}))
+    
+    # 批量请求的各项分别记录日志，不记录单项耗时
+    for index, target in enumerate(targets):
+        if target is not None:
+            record_mock_request('batch', target[0], target[1], items[index], None, results[index][0],
+                                results[index][1], entry=target[2])
+    
+    parts = [b'{"index":%d,"response":%s,"status":%d}' % (index, body, status)
+             for index, (status, body) in enumerate(results)]
+    return b'{"code":0,"data":[' + b','.join(parts) + b'],"message":"success"}'
+
+# 生成Socket.IO动态接口请求的响应内容，返回 (响应内容, 故障注入结果, 接口)（Flask-SocketIO和ASGI两种服务方式共用）
+# 与HTTP请求一样由 prepare_mock_request 决定处理方式；Socket.IO不流式发送，大数据量也一次生成
+def build_socket_mock_payload(data):
+    kind, result, fault, entry = prepare_mock_request(data.get('method', 'GET'), data.get('path', ''), data,
+                                                      allow_stream=False)
+    if kind == MOCK_RESULT_ROWS:
+        payload = {'code': 0, 'message': 'success', 'data': generate_mock_rows(*result)}
+    elif kind == MOCK_RESULT_CACHED:
+        # 缓存的是序列化后的响应，发送前还原为对象
+        payload = app.json.loads(get_cached_mock_body(*result)[0])
+    elif kind == MOCK_RESULT_ERROR:
+        payload = result[1]
+    else:
+        payload = result
+    return payload, fault, entry
+
+# 处理动态请求的通用函数
+def handle_dynamic_request(path):
+    full_path = f"/{path}"
+    method = request.method
     
     # 获取请求参数
     params = {}
-    mock_count = mock_config[3]
     
     # 解析请求参数
+    request_options = {}
     if method == 'GET':
         # 处理GET请求参数
         get_params = request.args.to_dict()
+        request_options = get_params
         
         # 提取并解析params
         if 'params' in get_params:
@@ -1275,38 +1615,49 @@ def handle_dynamic_request(path):
         try:
             request_data = request.get_json() or {}
             params = request_data.get('params', {})
+            request_options = request_data
         except:
             params = {}
     
-    # 获取响应字段
-    cursor.execute('SELECT * FROM interface_responses WHERE interface_id = ?', (interface[0],))
-    response_fields = cursor.fetchall()
-    
-    conn.close()
-    
-    # 生成Mock数据
-    mock_data = []
-    for _ in range(mock_count):
-        data = {}
-        if response_fields:
-            for field in response_fields:
-                data[field[1]] = generate_mock_value(field[2])
-        else:
-            # 如果没有响应字段，生成默认的mock数据
-            data['id'] = str(uuid.uuid4())
-            data['message'] = f'Success response from {full_path}'
-            data['status'] = 'success'
-            data['timestamp'] = datetime.now().isoformat()
-            data['random_data'] = generate_mock_value('string')
-            data['random_number'] = generate_mock_value('int')
-            data['random_boolean'] = generate_mock_value('boolean')
-        mock_data.append(data)
+    started = time.perf_counter()
+    kind, result, fault, entry = resolve_mock_request(method, full_path, request_options)
+    if kind == MOCK_RESULT_STREAM:
+        response = stream_mock_response(*result)
+    elif kind == MOCK_RESULT_CACHED:
+        response = cached_mock_response(*result)
+    elif kind == MOCK_RESULT_ERROR:
+        response = jsonify(result[1])
+        response.status_code = result[0]
+    else:
+        response = jsonify(result)
     
-    return jsonify({
-        'code': 0,
-        'message': 'success',
-        'data': mock_data
-    })
+    record_mock_request('http', method, full_path, request_options, dict(request.headers), response.status_code,
+                        None if response.is_streamed else response.get_data(), started, entry)
+    if fault is not None:
+        response = apply_fault(response, fault, started)
+    return response
+
+# 在Flask线程模式下注入延迟和带宽限制
+# 注意：WSGI的处理线程要一直持有连接直到响应发送完毕，延迟和限速传输期间都会占用该线程，
+# 因此两者合计不超过 MOCK_FAULT_THREADING_MAX_DELAY_MS：先截短延迟，剩余的时间用于限速传输，用完后其余内容不再限速；
+# 被截短时在响应头 X-Fault-Delay-Capped 中给出配置的延迟加上按带宽传输整个响应的时长（毫秒），
+# 流式响应的长度事先未知，限速同样在上限处截止，但不给出该响应头；
+# 需要更长的延迟、完整的带宽限制或大量并发慢请求时请使用ASGI模式（--server asgi），等待期间不占用线程
+def apply_fault(response, fault, started):
+    limit = config.MOCK_FAULT_THREADING_MAX_DELAY_MS / 1000
+    delay = min(fault.delay, limit)
+    fault_stats.record(fault.interface_id, delay * 1000, (time.perf_counter() - started) * 1000,
+                       fault.error_status is not None)
+    throttle = 0
+    if fault.bytes_per_second and not response.is_streamed:
+        throttle = len(response.get_data()) / fault.bytes_per_second
+    if delay < fault.delay or delay + throttle > limit:
+        response.headers['X-Fault-Delay-Capped'] = str(round((fault.delay + throttle) * 1000))
+    if delay:
+        time.sleep(delay)
+    if fault.bytes_per_second:
+        response.response = iter_throttled(response.response, fault.bytes_per_second, max_seconds=limit - delay)
+    return response
 
 # API路由：动态接口请求（直接路径，无前缀） - 放在静态文件路由之后
 @app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'])
@@ -1356,10 +1707,16 @@ def is_port_available(port, host='0.0.0.0'):
         return False
 
 if __name__ == '__main__':
+    # 打包为exe后，批量Mock生成的子进程需要先执行freeze_support
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
     parser = argparse.ArgumentParser(description='动态接口生成工具')
     parser.add_argument('--port', type=int, default=config.MOCK_SERVER_PORT, help='服务器端口，默认8000')
     parser.add_argument('--host', type=str, default=config.MOCK_SERVER_HOST, help='服务器主机，默认0.0.0.0')
     parser.add_argument('--no-browser', action='store_true', help='不自动打开浏览器')
+    parser.add_argument('--server', choices=['threading', 'asgi'], default=config.SERVER_MODE,
+                        help='服务方式：threading（默认）或 asgi（asyncio事件循环，适合大量并发长连接）')
     args = parser.parse_args()
     
     # 检测指定端口是否可用，如果不可用，自动寻找下一个可用端口
@@ -1406,10 +1763,23 @@ if __name__ == '__main__':
         print(f"应用正在运行中...")
         print(f"访问地址: http://{args.host}:{args.port}")
         print(f"按 Ctrl+C 停止应用\n")
-        # 根据SocketIO初始化情况选择启动方式
-        if socketio is not None:
-            # 使用socketio.run()替代app.run()以支持WebSocket
-            socketio.run(app, host=args.host, port=args.port, debug=False, use_reloader=False)
+        # 启动请求日志的后台汇总
+        request_rollup.start()
+        # 启动已删除文件的后台清理（继续清理上次退出前未完成的文件）
+        file_purger.start()
+        # 根据服务方式和SocketIO初始化情况选择启动方式
+        if args.server == 'asgi':
+            # asgi_app 通过 import simple_app 共用本模块的数据库、路由表等状态，
+            # 以脚本方式运行时本模块名为__main__，先注册为simple_app避免重复初始化
+            sys.modules.setdefault('simple_app', sys.modules[__name__])
+            import asgi_app
+            print("使用ASGI（asyncio）服务方式")
+            asgi_app.run(args.host, args.port)
+        elif socketio is not None:
+            # 使用socketio.run()替代app.run()以支持WebSocket；
+            # 没有终端时（作为后台服务或由压力测试脚本启动）Flask-SocketIO默认拒绝使用Werkzeug，需要明确允许
+            socketio.run(app, host=args.host, port=args.port, debug=False, use_reloader=False,
+                         allow_unsafe_werkzeug=True)
         else:
             # 如果SocketIO初始化失败，使用app.run()启动应用
             app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
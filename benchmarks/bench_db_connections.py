@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据库连接方式对比：混合读写吞吐量
+多个线程通过Flask测试客户端读取接口列表、接口参数和Mock配置，同时一个线程不断上传并删除文件；
+分别在“每次新建连接 + 默认日志模式”和“连接池 + WAL及调优参数”两种配置下运行（各自使用独立的子进程和临时数据库）
+
+用法: python benchmarks/bench_db_connections.py [--duration 5] [--readers 4]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+TEST_FILES_DIR = os.path.join(ROOT_DIR, 'test_files')
+
+from bench_suite import percentile
+
+# 两种配置：before 相当于每次 sqlite3.connect() 且不设置任何参数
+MODES = {
+    'before': {'DB_POOL_SIZE': 0, 'DB_JOURNAL_MODE': None, 'DB_SYNCHRONOUS': None, 'DB_MMAP_SIZE': None,
+               'DB_CACHE_SIZE_KB': None},
+    'after': {},
+}
+
+
+def run_mode(mode, duration, readers):
+    """在当前进程中按mode配置运行，返回结果字典"""
+    sys.path.insert(0, BACKEND_DIR)
+    import config
+    temp_dir = tempfile.mkdtemp(prefix='bench_db_')
+    config.DATABASE_PATH = os.path.join(temp_dir, 'bench.db')
+    config.UPLOAD_FOLDER = temp_dir
+    config.LOG_FILE = os.path.join(temp_dir, 'app.log')
+    config.MOCK_POOL_ENABLED = False
+    config.REQUEST_LOG_ENABLED = False
+    for key, value in MODES[mode].items():
+        setattr(config, key, value)
+
+    import logging
+    import simple_app
+    from listing import INTERFACE_LISTING
+    logging.getLogger().setLevel(logging.ERROR)
+
+    def upload(name):
+        path = os.path.join(temp_dir, f'{time.perf_counter_ns()}_{name}')
+        shutil.copy(os.path.join(TEST_FILES_DIR, name), path)
+        return simple_app.register_uploaded_file(name, path, 'application/json')['id']
+
+    for name in sorted(os.listdir(TEST_FILES_DIR)):
+        upload(name)
+    # 已上传文件的全部接口id（已删除文件下的接口不返回）
+    interface_ids = [item['id'] for item in INTERFACE_LISTING.fetch(simple_app.DATABASE, {'fields': 'id'})[0]]
+
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = [0]
+    writes = [0]
+    lock = threading.Lock()
+
+    def reader(index):
+        client = simple_app.app.test_client()
+        local = []
+        i = index
+        while time.perf_counter() < deadline:
+            interface_id = interface_ids[i % len(interface_ids)]
+            i += 1
+            for url in ('/interfaces', f'/interfaces/{interface_id}/params',
+                        f'/interfaces/{interface_id}/mock-config'):
+                t = time.perf_counter()
+                status = client.get(url).status_code
+                local.append(time.perf_counter() - t)
+                if status != 200:
+                    with lock:
+                        errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        client = simple_app.app.test_client()
+        while time.perf_counter() < deadline:
+            file_id = upload('test_openapi3.json')
+            client.delete(f'/files/{file_id}')
+            writes[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'mode': mode,
+        'reads_per_sec': round(len(latencies) / elapsed, 1),
+        'read_p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'read_p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'read_errors': errors[0],
+        'upload_delete_per_sec': round(writes[0] / elapsed, 2),
+        'pool': simple_app.db_pool.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库连接方式的混合读写吞吐量对比')
+    parser.add_argument('--duration', type=float, default=5, help='每种配置的运行时长（秒）')
+    parser.add_argument('--readers', type=int, default=4, help='读取线程数')
+    parser.add_argument('--run-mode', choices=list(MODES), default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        # 子进程：输出一行JSON结果
+        print('RESULT ' + json.dumps(run_mode(args.run_mode, args.duration, args.readers)))
+        return
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run([sys.executable, __file__, '--run-mode', mode, '--duration', str(args.duration),
+                                 '--readers', str(args.readers)], capture_output=True, text=True, cwd=ROOT_DIR)
+        lines = [line for line in output.stdout.splitlines() if line.startswith('RESULT ')]
+        if not lines:
+            print(output.stdout[-2000:], output.stderr[-2000:])
+            raise RuntimeError(f'{mode} 运行失败')
+        results.append(json.loads(lines[-1][len('RESULT '):]))
+
+    print(f"{'配置':>8} {'读/秒':>10} {'读p50(ms)':>10} {'读p99(ms)':>10} {'读错误':>8} {'上传+删除/秒':>12}")
+    for item in results:
+        print(f"{item['mode']:>8} {item['reads_per_sec']:>10.1f} {item['read_p50_ms']:>10.3f}"
+              f" {item['read_p99_ms']:>10.3f} {item['read_errors']:>8} {item['upload_delete_per_sec']:>12.2f}")
+    for item in results:
+        for pool in item['pool']:
+            print(f"  {item['mode']}: 打开连接 {pool['opened']} 次，复用 {pool['reused']} 次")
+
+
+if __name__ == '__main__':
+    main()
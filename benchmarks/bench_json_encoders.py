@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON序列化性能对比
+在典型的Mock响应和接口列表数据上比较标准库json与orjson的序列化耗时
+
+用法: python benchmarks/bench_json_encoders.py [--rows 10 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from flask import Flask
+
+import json_provider
+from json_provider import FastJSONProvider, ENCODER_JSON, ENCODER_ORJSON
+from mock_generator import MockPlan
+
+FLAT_FIELDS = [(f'field_{i}', t) for i, t in enumerate(['string', 'int', 'boolean', 'double', 'date'] * 4)]
+NESTED_FIELDS = [
+    ('code', 'int'), ('data.id', 'string'), ('data.name', 'string'), ('data.price', 'double'),
+    ('data.tags', 'array[string]'), ('data.items[id', 'int'), ('data.items[title', 'string')
+]
+
+
+def interface_rows(count):
+    """模拟 /interfaces 返回的接口列表"""
+    return [{
+        'id': i,
+        'name': f'查询用户信息接口{i}',
+        'path': f'/api/v1/users/{i}/detail',
+        'method': 'GET',
+        'file_id': i % 50,
+        'description': '根据用户ID查询用户的基本信息和账户状态',
+        'is_websocket': False,
+        'created_at': '2024-01-01 12:00:00'
+    } for i in range(count)]
+
+
+def payloads(rows):
+    return {
+        'mock_flat': {'code': 0, 'message': 'success', 'data': MockPlan(FLAT_FIELDS).generate_rows(rows, '/bench')},
+        'mock_nested': {'code': 0, 'message': 'success', 'data': MockPlan(NESTED_FIELDS).generate_rows(rows, '/bench')},
+        'interfaces': interface_rows(rows)
+    }
+
+
+def measure(provider, payload, repeat):
+    """返回 (最快一次耗时秒, 输出字节数)"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = provider.dumps_bytes(payload)
+        elapsed = time.perf_counter() - start
+        size = len(body)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON序列化性能对比')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 1000, 100000], help='数据行数')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数，取最快一次')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    encoders = [ENCODER_JSON]
+    if json_provider.orjson is not None:
+        encoders.append(ENCODER_ORJSON)
+    else:
+        print('未安装orjson，只测试标准库json')
+    providers = {name: FastJSONProvider(app, name) for name in encoders}
+
+    print(f"{'数据':>12} {'行数':>8} {'实现':>8} {'耗时(ms)':>10} {'MB/秒':>10} {'加速比':>8}")
+    for rows in args.rows:
+        for kind, payload in payloads(rows).items():
+            baseline = None
+            for name, provider in providers.items():
+                elapsed, size = measure(provider, payload, args.repeat)
+                baseline = baseline or elapsed
+                print(f"{kind:>12} {rows:>8} {name:>8} {elapsed * 1000:>10.2f} "
+                      f"{size / elapsed / 1024 / 1024:>10.1f} {baseline / elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+接口列表分页查询的耗时与接口总数的关系
+在临时数据库中分别写入不同数量的接口，统计第一页、深度翻页（从中间的游标继续）、路径前缀过滤和按路径排序
+每次查询的平均耗时；键集分页下各项耗时应与接口总数基本无关
+
+用法: python benchmarks/bench_listing.py [--sizes 200,200000] [--limit 100] [--rounds 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+import db_migrations
+import db_pool
+from listing import INTERFACE_LISTING
+
+METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+
+
+def build_database(path, size):
+    """写入size个接口，平均分布在10个文件中"""
+    conn = db_pool.connect(path)
+    db_migrations.migrate(conn)
+    with conn:
+        conn.executemany('''
+            INSERT INTO interface_files (id, filename, file_path, file_type, size, uploaded_at, parsed)
+            VALUES (?, ?, '', 'application/json', 0, '', 1)
+        ''', [(i, f'file{i}.json') for i in range(1, 11)])
+        conn.executemany('''
+            INSERT INTO interfaces (name, path, method, description, file_id, is_websocket)
+            VALUES (?, ?, ?, '', ?, 0)
+        ''', [(f'接口{i}', f'/api/module{i % 50}/resource{i}', METHODS[i % 4], i % 10 + 1) for i in range(size)])
+    conn.close()
+
+
+def measure(database, args, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        INTERFACE_LISTING.fetch(database, args, args.get('limit'))
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='接口列表分页查询的耗时')
+    parser.add_argument('--sizes', default='200,200000', help='接口总数，逗号分隔')
+    parser.add_argument('--limit', type=int, default=100, help='每页条数')
+    parser.add_argument('--rounds', type=int, default=200, help='每项查询的次数')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='bench_listing_')
+    print(f"{'接口数':>8} {'第一页':>10} {'深度翻页':>10} {'前缀过滤':>10} {'按路径排序':>10}  (ms/次)")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        database = os.path.join(temp_dir, f'listing_{size}.db')
+        build_database(database, size)
+        # 取中间位置的游标，模拟翻到很深的页
+        middle = INTERFACE_LISTING.fetch(database, {'fields': 'id'}, size // 2)[1]
+        results = [
+            measure(database, {'limit': args.limit}, args.rounds),
+            measure(database, {'limit': args.limit, 'cursor': middle}, args.rounds),
+            measure(database, {'limit': args.limit, 'path_prefix': '/api/module7/'}, args.rounds),
+            measure(database, {'limit': args.limit, 'sort': 'path', 'fields': 'id,path,method'}, args.rounds),
+        ]
+        print(f"{size:>8} " + ' '.join(f'{value:>10.3f}' for value in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量Mock请求与逐个请求的吞吐量对比
+在临时数据库中创建接口，通过Flask测试客户端分别逐个请求 /dynamic/<path> 和一次请求 /mock-batch
+
+用法: python benchmarks/bench_mock_batch.py [--interfaces 50] [--small-rows 10] [--large-rows 50000] [--large-items 8]
+      [--workers 4]（批量生成进程数，默认CPU核数，用于测量开启 MOCK_BATCH_WORKERS 的效果）
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+
+# 使用临时数据库，避免修改真实数据
+TEMP_DIR = tempfile.mkdtemp(prefix='bench_mock_batch_')
+config.DATABASE_PATH = os.path.join(TEMP_DIR, 'bench.db')
+config.UPLOAD_FOLDER = TEMP_DIR
+config.MOCK_POOL_ENABLED = False
+
+import simple_app
+
+FIELD_TYPES = ['string', 'int', 'boolean', 'double', 'date']
+
+
+def create_interfaces(count, fields):
+    """创建count个接口，每个接口fields个响应字段，返回接口路径列表"""
+    conn = simple_app.sqlite3.connect(config.DATABASE_PATH)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO interface_files (filename, file_path, file_type, size, uploaded_at, parsed)
+        VALUES ('bench.json', 'bench.json', 'application/json', 0, '', 1)
+    ''')
+    file_id = cursor.lastrowid
+    paths = []
+    for i in range(count):
+        path = f'/bench/items{i}'
+        cursor.execute('INSERT INTO interfaces (name, path, method, description, file_id) VALUES (?, ?, ?, ?, ?)',
+                       (f'bench{i}', path, 'POST', '', file_id))
+        interface_id = cursor.lastrowid
+        cursor.execute('INSERT INTO mock_configs (interface_id, enabled, default_count) VALUES (?, 1, 10)',
+                       (interface_id,))
+        for j in range(fields):
+            cursor.execute('INSERT INTO interface_responses (interface_id, name, response_type) VALUES (?, ?, ?)',
+                           (interface_id, f'field_{j}', FIELD_TYPES[j % len(FIELD_TYPES)]))
+        paths.append(path)
+    conn.commit()
+    conn.close()
+    simple_app.route_table.load()
+    return paths
+
+
+def one_by_one(client, paths, rows):
+    start = time.perf_counter()
+    for path in paths:
+        response = client.post(f'/dynamic{path}', json={'mock_count': rows, 'stream': False})
+        response.get_data()
+    return time.perf_counter() - start
+
+
+def batched(client, paths, rows):
+    start = time.perf_counter()
+    response = client.post('/mock-batch', json={'requests': [
+        {'method': 'POST', 'path': path, 'mock_count': rows} for path in paths
+    ]})
+    response.get_data()
+    return time.perf_counter() - start
+
+
+def report(name, paths, rows, client):
+    # 逐个请求时数据量超过流式阈值会走流式响应，这里统一按普通响应比较
+    single = one_by_one(client, paths, rows) if rows < config.MOCK_STREAM_THRESHOLD else None
+    batch = batched(client, paths, rows)
+    single_text = f'{single:>10.3f}' if single is not None else f"{'(流式)':>10}"
+    speedup = f'{single / batch:>8.1f}' if single is not None else f"{'-':>8}"
+    print(f"{name:>8} {len(paths):>6} {rows:>8} {single_text} {batch:>10.3f} {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量Mock请求与逐个请求的吞吐量对比')
+    parser.add_argument('--interfaces', type=int, default=50, help='小请求的接口数')
+    parser.add_argument('--fields', type=int, default=10, help='每个接口的响应字段数')
+    parser.add_argument('--small-rows', type=int, default=10, help='小请求的行数')
+    parser.add_argument('--large-rows', type=int, default=50000, help='大请求的行数')
+    parser.add_argument('--large-items', type=int, default=8, help='大请求的项数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='批量生成进程数，默认CPU核数')
+    args = parser.parse_args()
+    simple_app.batch_executor.workers = args.workers
+
+    paths = create_interfaces(max(args.interfaces, args.large_items), args.fields)
+    client = simple_app.app.test_client()
+    print(f"批量生成进程数: {simple_app.batch_executor.workers}（为1时不使用进程池）")
+
+    print(f"{'场景':>8} {'项数':>6} {'行数':>8} {'逐个(s)':>10} {'批量(s)':>10} {'加速比':>8}")
+    report('small', paths[:args.interfaces], args.small_rows, client)
+
+    # 先预热进程池，避免把子进程启动时间计入结果
+    batched(client, paths[:1], config.MOCK_BATCH_PARALLEL_ROWS)
+    report('large', paths[:args.large_items], args.large_rows, client)
+
+    # 关闭进程池后再测一次大请求，对比单进程生成
+    workers = simple_app.batch_executor.workers
+    simple_app.batch_executor.workers = 1
+    start = time.perf_counter()
+    batched(client, paths[:args.large_items], args.large_rows)
+    serial = time.perf_counter() - start
+    simple_app.batch_executor.workers = workers
+    print(f"{'serial':>8} {args.large_items:>6} {args.large_rows:>8} {'':>10} {serial:>10.3f} {'':>8}  (批量，单进程生成)")
+    simple_app.batch_executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
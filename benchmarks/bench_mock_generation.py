@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mock数据生成性能对比
+比较逐行纯Python生成与NumPy按列批量生成在不同行数下的耗时；
+--legacy 时再与原先逐个值调用 generate_mock_value（每次走一遍类型判断）的实现对比单行耗时
+
+用法: python benchmarks/bench_mock_generation.py [--rows 1000 100000 1000000] [--fields 20] [--legacy]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import mock_generator
+from mock_generator import MockPlan
+
+FIELD_TYPES = ['string', 'int', 'boolean', 'double', 'date']
+
+
+def legacy_mock_value(field_type):
+    """原先的逐值实现（按类型逐个判断，每次调用都重新导入模块），仅用于对比"""
+    import random
+    import string
+
+    if field_type in ['java.lang.String', 'string', 'java.lang.Object']:
+        return ''.join(random.choices(string.ascii_letters, k=10))
+    elif field_type in ['java.lang.Integer', 'int', 'java.lang.Long', 'long']:
+        return random.randint(0, 1000)
+    elif field_type in ['java.lang.Boolean', 'boolean']:
+        return random.choice([True, False])
+    elif field_type in ['java.lang.Double', 'double', 'java.lang.Float', 'float', 'java.math.BigDecimal', 'decimal']:
+        return round(random.uniform(0, 1000), 2)
+    elif field_type in ['java.util.Date', 'date', 'java.time.LocalDate']:
+        return datetime.now().strftime('%Y-%m-%d')
+    return 'mock_value'
+
+
+def compare_legacy(response_fields, rows, repeat=3):
+    """返回 (原实现单行耗时, 生成计划单行耗时)，单位微秒，各取多次中的最小值"""
+    legacy, planned = [], []
+    plan = MockPlan(response_fields)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        [{name: legacy_mock_value(field_type) for name, field_type in response_fields} for _ in range(rows)]
+        legacy.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        plan.generate_rows(rows, '/benchmark')
+        planned.append(time.perf_counter() - start)
+    return min(legacy) / rows * 1e6, min(planned) / rows * 1e6
+
+
+def run_once(plan, rows, bulk):
+    """返回 (生成列耗时, 含拼装行的总耗时)，单位秒"""
+    start = time.perf_counter()
+    columns = plan.generate_columns(rows, '/benchmark', bulk=bulk)
+    generated = time.perf_counter() - start
+    for _ in columns:
+        pass
+    return generated, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock数据生成性能对比')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000], help='生成行数')
+    parser.add_argument('--fields', type=int, default=20, help='响应字段数')
+    parser.add_argument('--legacy', action='store_true', help='与原先逐值生成的实现对比（纯Python，不使用NumPy）')
+    args = parser.parse_args()
+
+    response_fields = [(f'field_{i}', FIELD_TYPES[i % len(FIELD_TYPES)]) for i in range(args.fields)]
+    if args.legacy:
+        print(f"{'行数':>10} {'原实现(us/行)':>14} {'生成计划(us/行)':>16} {'加速':>8}")
+        for rows in args.rows:
+            # 原实现较慢，行数较大时只取前20000行估算
+            legacy, planned = compare_legacy(response_fields, min(rows, 20000))
+            print(f"{rows:>10} {legacy:>14.2f} {planned:>16.2f} {legacy / planned:>7.1f}x")
+        return
+
+    plan = MockPlan(response_fields)
+    modes = [('python', False)]
+    if mock_generator.np is not None:
+        modes.append(('numpy', True))
+    else:
+        print('未安装numpy，只测试纯Python实现')
+
+    print(f"{'行数':>10} {'模式':>8} {'生成列(s)':>12} {'含拼装行(s)':>12} {'行/秒':>12}")
+    for rows in args.rows:
+        for mode, bulk in modes:
+            generated, total = run_once(plan, rows, bulk)
+            print(f"{rows:>10} {mode:>8} {generated:>12.3f} {total:>12.3f} {rows / total:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大规模OpenAPI规范的解析与入库耗时
+生成包含N个操作的OpenAPI 3.0规范（每个操作若干请求参数和响应字段），在临时数据库中调用 parse_file_async，
+分别统计总耗时和其中批量写入数据库（save_parsed_interfaces）的耗时
+
+用法: python benchmarks/bench_parser_persist.py [--operations 10000] [--params 3] [--fields 6]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+
+# 使用临时数据库，避免修改真实数据
+TEMP_DIR = tempfile.mkdtemp(prefix='bench_parser_')
+config.DATABASE_PATH = os.path.join(TEMP_DIR, 'bench.db')
+
+import async_parser
+import db_migrations
+import db_pool
+
+FIELD_TYPES = ['string', 'integer', 'boolean', 'number']
+
+
+def build_spec(operations, params, fields):
+    """生成包含operations个操作的OpenAPI规范"""
+    properties = {f'field{i}': {'type': FIELD_TYPES[i % len(FIELD_TYPES)], 'description': f'字段{i}'}
+                  for i in range(fields)}
+    paths = {}
+    for i in range(operations):
+        paths[f'/api/resource{i}/{{id}}'] = {
+            'get': {
+                'summary': f'查询资源{i}',
+                'parameters': [{'name': f'param{j}', 'in': 'query', 'required': j == 0, 'schema': {'type': 'string'}}
+                               for j in range(params)],
+                'responses': {'200': {'content': {'application/json': {'schema': {
+                    'type': 'object', 'properties': properties}}}}}
+            }
+        }
+    return {'openapi': '3.0.0', 'info': {'title': 'bench', 'version': '1'}, 'paths': paths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='大规模OpenAPI规范的解析与入库耗时')
+    parser.add_argument('--operations', type=int, default=10000, help='操作数')
+    parser.add_argument('--params', type=int, default=3, help='每个操作的请求参数数')
+    parser.add_argument('--fields', type=int, default=6, help='每个操作的响应字段数')
+    args = parser.parse_args()
+
+    conn = db_pool.connect(config.DATABASE_PATH)
+    db_migrations.migrate(conn)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO interface_files (filename, file_path, file_type, size, uploaded_at, parsed)
+        VALUES ('bench.json', 'bench.json', 'application/json', 0, '', 1)
+    ''')
+    file_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+
+    spec_path = os.path.join(TEMP_DIR, 'bench.json')
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump(build_spec(args.operations, args.params, args.fields), f)
+
+    # 记录批量写入的耗时
+    save = async_parser.save_parsed_interfaces
+    persist_seconds = []
+
+    def timed_save(*save_args):
+        started = time.perf_counter()
+        save(*save_args)
+        persist_seconds.append(time.perf_counter() - started)
+
+    async_parser.save_parsed_interfaces = timed_save
+    # 解析过程逐个接口输出调试信息，计时期间丢弃
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        async_parser.parse_file_async(file_id, spec_path, 'bench.json', 'application/json')
+    total = time.perf_counter() - started
+
+    conn = db_pool.connect(config.DATABASE_PATH)
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+              for table in ('interfaces', 'mock_configs', 'interface_params', 'interface_responses')}
+    conn.close()
+    print(f"操作数 {args.operations}，写入行数 {counts}")
+    print(f"总耗时 {total:.3f}s，其中写入数据库 {sum(persist_seconds):.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mock服务的基准测试套件
+在进程内通过Flask测试客户端和Socket.IO测试客户端驱动 handle_dynamic_request、dynamic_interface 事件，
+并直接调用 generate_mock_value；按响应字段数、mock_count 和接口总数分别测试，
+结果以JSON输出，可保存为基线，之后的运行与基线比较，吞吐量或p99耗时退化超过阈值时以退出码1结束
+
+用法:
+    python benchmarks/bench_suite.py [--quick] [--filter http.rows] [--output result.json]
+    python benchmarks/bench_suite.py --save-baseline            # 把本次结果保存为基线
+    python benchmarks/bench_suite.py --threshold 0.2 --p99-threshold 0.3
+
+基线与运行的机器有关，换机器后应重新保存基线
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+import logging
+
+import config
+
+# 由 setup_app 导入；导入本模块本身不修改配置、不导入应用（压力测试等脚本只使用 percentile）
+simple_app = None
+generate_mock_value = None
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+FIELD_TYPES = ['string', 'int', 'boolean', 'double', 'date', 'email', 'phone', 'url']
+
+# 各维度的取值，--quick 时使用较小的集合
+SWEEPS = {
+    'fields': [4, 20, 50, 200],
+    'rows': [1, 100, 1000, 10000, 100000],
+    'catalog': [10, 1000, 100000],
+}
+QUICK_SWEEPS = {
+    'fields': [4, 20, 200],
+    'rows': [1, 100, 10000],
+    'catalog': [10, 1000],
+}
+
+# 按字段数和行数测试时其余维度的固定取值
+BASE_FIELDS = 10
+BASE_ROWS = 10
+
+
+class Catalog:
+    """临时数据库中的测试接口，按需追加到指定数量"""
+
+    def __init__(self):
+        self.file_id = None
+        self.paths = {}
+        self.catalog_paths = []
+
+    def _file_id(self, cursor):
+        if self.file_id is None:
+            cursor.execute('''
+                INSERT INTO interface_files (filename, file_path, file_type, size, uploaded_at, parsed)
+                VALUES ('bench.json', 'bench.json', 'application/json', 0, '', 1)
+            ''')
+            self.file_id = cursor.lastrowid
+        return self.file_id
+
+    def _insert(self, cursor, items):
+        """items为 (名称, 路径, 字段数) 列表，返回新接口的id列表"""
+        file_id = self._file_id(cursor)
+        ids = []
+        for name, path, fields in items:
+            cursor.execute('INSERT INTO interfaces (name, path, method, description, file_id) VALUES (?, ?, ?, ?, ?)',
+                           (name, path, 'POST', '', file_id))
+            ids.append(cursor.lastrowid)
+        cursor.executemany('INSERT INTO mock_configs (interface_id, enabled, default_count) VALUES (?, 1, ?)',
+                           [(interface_id, BASE_ROWS) for interface_id in ids])
+        cursor.executemany('INSERT INTO interface_responses (interface_id, name, response_type) VALUES (?, ?, ?)',
+                           [(interface_id, f'field_{j}', FIELD_TYPES[j % len(FIELD_TYPES)])
+                            for interface_id, (_, _, fields) in zip(ids, items) for j in range(fields)])
+        return ids
+
+    def with_fields(self, fields):
+        """返回有fields个响应字段的接口路径"""
+        if fields not in self.paths:
+            path = f'/bench/fields{fields}'
+            self._write([(f'fields{fields}', path, fields)])
+            self.paths[fields] = path
+        return self.paths[fields]
+
+    def grow(self, size):
+        """把目录中的接口补足到size个，每10个中有1个带路径参数，返回可请求的路径列表"""
+        items = []
+        for i in range(len(self.catalog_paths), size):
+            path = f'/catalog/{i}/items/{{id}}' if i % 10 == 0 else f'/catalog/{i}/items'
+            items.append((f'catalog{i}', path, 4))
+            self.catalog_paths.append(path.replace('{id}', '42'))
+        if items:
+            self._write(items)
+        return self.catalog_paths[:size]
+
+    def _write(self, items):
+        conn = simple_app.db_pool.connect(config.DATABASE_PATH)
+        try:
+            with conn:
+                self._insert(conn.cursor(), items)
+        finally:
+            conn.close()
+        simple_app.route_table.load()
+
+
+def setup_app():
+    """导入应用并准备测试环境，重复调用时直接返回已导入的应用"""
+    global simple_app, generate_mock_value
+    if simple_app is not None:
+        return simple_app
+
+    # 使用临时数据库，避免修改真实数据；关闭预生成池和请求日志，避免后台线程影响结果
+    temp_dir = tempfile.mkdtemp(prefix='bench_suite_')
+    config.DATABASE_PATH = os.path.join(temp_dir, 'bench.db')
+    config.UPLOAD_FOLDER = temp_dir
+    config.MOCK_POOL_ENABLED = False
+    config.REQUEST_LOG_ENABLED = False
+
+    import simple_app as app_module
+    from mock_generator import generate_mock_value as generate
+
+    # 测试期间只输出警告以上的日志（Socket.IO按配置逐条输出收发的事件）
+    logging.getLogger().setLevel(logging.WARNING)
+    if app_module.socketio is not None:
+        app_module.socketio.server.logger.setLevel(logging.WARNING)
+        app_module.socketio.server.eio.logger.setLevel(logging.WARNING)
+    simple_app, generate_mock_value = app_module, generate
+    return simple_app
+
+
+def percentile(sorted_values, fraction):
+    """已排序的样本的分位数（基准测试套件、压力测试和数据库连接对比共用），没有样本时返回0"""
+    if not sorted_values:
+        return 0.0
+    # 最近秩法：第 ceil(fraction * n) 个值
+    index = min(len(sorted_values) - 1, max(0, math.ceil(round(fraction * len(sorted_values), 9)) - 1))
+    return sorted_values[index]
+
+
+def measure(func, min_time, min_iterations, max_iterations):
+    """重复调用func，返回每次耗时（秒）的列表；先调用一次预热"""
+    func()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_iterations and (len(samples) < min_iterations or time.perf_counter() - started < min_time):
+        t = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t)
+    return samples
+
+
+def summarize(samples, rows=None):
+    ordered = sorted(samples)
+    total = sum(samples)
+    result = {
+        'iterations': len(samples),
+        'ops_per_sec': round(len(samples) / total, 2),
+        'mean_ms': round(total / len(samples) * 1000, 4),
+        'p50_ms': round(percentile(ordered, 0.5) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+    }
+    if rows:
+        result['rows_per_sec'] = round(rows * len(samples) / total, 1)
+    return result
+
+
+# ---------- 测试场景 ----------
+
+def http_request(client, path, rows):
+    def run():
+        response = client.post(f'/dynamic{path}', json={'mock_count': rows})
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} 返回 {response.status_code}')
+    return run
+
+
+def socket_request(socket_client, path, rows):
+    def run():
+        socket_client.emit('dynamic_interface', {'path': path, 'method': 'POST', 'mock_count': rows})
+        received = socket_client.get_received()
+        if not received or received[-1]['args'][0]['code'] != 0:
+            raise RuntimeError(f'{path} 的Socket.IO响应异常: {received[-1:] or "无响应"}')
+    return run
+
+
+def generate_row(fields):
+    types = [FIELD_TYPES[j % len(FIELD_TYPES)] for j in range(fields)]
+
+    def run():
+        for field_type in types:
+            generate_mock_value(field_type)
+    return run
+
+
+def build_scenarios(sweeps, catalog):
+    """返回 (名称, 函数, 行数, 最少次数) 列表；接口在此时创建，不计入耗时"""
+    client = simple_app.app.test_client()
+    socket_client = simple_app.socketio.test_client(simple_app.app) if simple_app.socketio else None
+    scenarios = []
+    for fields in sweeps['fields']:
+        scenarios.append((f'generate_mock_value.fields={fields}', generate_row(fields), None, 20))
+        path = catalog.with_fields(fields)
+        scenarios.append((f'http.fields={fields}', http_request(client, path, BASE_ROWS), BASE_ROWS, 20))
+        if socket_client is not None:
+            scenarios.append((f'socketio.fields={fields}', socket_request(socket_client, path, BASE_ROWS),
+                              BASE_ROWS, 20))
+    path = catalog.with_fields(BASE_FIELDS)
+    for rows in sweeps['rows']:
+        scenarios.append((f'http.rows={rows}', http_request(client, path, rows), rows, 5))
+        if socket_client is not None:
+            scenarios.append((f'socketio.rows={rows}', socket_request(socket_client, path, rows), rows, 5))
+    return scenarios
+
+
+def catalog_scenario(client, paths):
+    rng = random.Random(0)
+    order = [rng.choice(paths) for _ in range(1000)]
+    position = [0]
+
+    def run():
+        path = order[position[0] % len(order)]
+        position[0] += 1
+        response = client.post(f'/dynamic{path}', json={'mock_count': 1})
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} 返回 {response.status_code}')
+    return run
+
+
+def run_suite(sweeps, name_filter, min_time, max_iterations):
+    catalog = Catalog()
+    results = {}
+
+    def record(name, func, rows, min_iterations):
+        if name_filter and name_filter not in name:
+            return
+        samples = measure(func, min_time, min_iterations, max_iterations)
+        results[name] = summarize(samples, rows)
+        item = results[name]
+        print(f"{name:<34} {item['ops_per_sec']:>12.1f} {item['p50_ms']:>10.3f} {item['p99_ms']:>10.3f}"
+              f" {item['iterations']:>8}", flush=True)
+
+    print(f"{'场景':<34} {'次/秒':>12} {'p50(ms)':>10} {'p99(ms)':>10} {'次数':>8}")
+    for scenario in build_scenarios(sweeps, catalog):
+        record(*scenario)
+    client = simple_app.app.test_client()
+    for size in sweeps['catalog']:
+        name = f'http.catalog={size}'
+        if name_filter and name_filter not in name:
+            continue
+        started = time.perf_counter()
+        paths = catalog.grow(size)
+        print(f"  (创建 {size} 个接口并加载路由表: {time.perf_counter() - started:.1f}s)", flush=True)
+        record(name, catalog_scenario(client, paths), 1, 20)
+    return results
+
+
+# ---------- 基线比较 ----------
+
+def compare(results, baseline, threshold, p99_threshold):
+    """与基线比较，返回退化的场景名称列表"""
+    regressions = []
+    print(f"\n{'场景':<34} {'次/秒':>12} {'基线':>12} {'变化':>8} {'p99(ms)':>10} {'基线':>10} {'变化':>8}  结果")
+    for name, item in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} {item['ops_per_sec']:>12.1f} {'-':>12} {'-':>8} {item['p99_ms']:>10.3f}"
+                  f" {'-':>10} {'-':>8}  新场景")
+            continue
+        ops_change = item['ops_per_sec'] / base['ops_per_sec'] - 1
+        p99_change = item['p99_ms'] / base['p99_ms'] - 1 if base['p99_ms'] else 0.0
+        failed = []
+        if ops_change < -threshold:
+            failed.append('吞吐量')
+        if p99_change > p99_threshold:
+            failed.append('p99')
+        status = '退化: ' + '、'.join(failed) if failed else 'ok'
+        if failed:
+            regressions.append(name)
+        print(f"{name:<34} {item['ops_per_sec']:>12.1f} {base['ops_per_sec']:>12.1f} {ops_change:>+8.1%}"
+              f" {item['p99_ms']:>10.3f} {base['p99_ms']:>10.3f} {p99_change:>+8.1%}  {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock服务的基准测试套件')
+    parser.add_argument('--quick', action='store_true', help='使用较小的取值范围，快速运行')
+    parser.add_argument('--filter', default=None, help='只运行名称包含该文本的场景')
+    parser.add_argument('--min-time', type=float, default=1.0, help='每个场景至少运行的时间（秒）')
+    parser.add_argument('--max-iterations', type=int, default=2000, help='每个场景最多运行的次数')
+    parser.add_argument('--output', default=None, help='把结果写入该JSON文件')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线（合并到已有基线中）')
+    parser.add_argument('--threshold', type=float, default=0.2, help='吞吐量下降超过该比例时视为退化')
+    parser.add_argument('--p99-threshold', type=float, default=0.3, help='p99耗时上升超过该比例时视为退化')
+    args = parser.parse_args()
+
+    setup_app()
+    sweeps = QUICK_SWEEPS if args.quick else SWEEPS
+    results = run_suite(sweeps, args.filter, args.min_time, args.max_iterations)
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'json_encoder': simple_app.app.json.encoder,
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+    if args.save_baseline:
+        baseline = {'meta': report['meta'], 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline['results'] = json.load(f).get('results', {})
+        baseline['results'].update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存到 {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n基线文件 {args.baseline} 不存在，使用 --save-baseline 保存本次结果作为基线")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get('results', {}), args.threshold, args.p99_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} 个场景相对基线退化: {', '.join(regressions)}")
+        return 1
+    print('\n未发现超过阈值的退化')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
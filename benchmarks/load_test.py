@@ -0,0 +1,427 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+端到端多进程压力测试
+在本机启动 simple_app.py（使用临时数据库、上传目录和日志文件，不影响真实数据），
+上传 test_files/ 中的文件生成接口，然后由多个客户端进程发起混合请求：
+Mock请求（按接口自身的请求方法）、接口和文件列表、接口详情（参数、响应字段、Mock配置），
+以及定期的文件上传和删除；最后输出各类请求的吞吐量、p50/p95/p99/最大耗时、错误率和服务进程的内存变化
+
+用法:
+    python benchmarks/load_test.py [--duration 30] [--processes 4] [--threads 4] [--server asgi]
+    python benchmarks/load_test.py --url http://127.0.0.1:8000     # 测试已在运行的服务（不统计内存）
+    python benchmarks/load_test.py --output load.json
+
+客户端只使用标准库（http.client，每个线程一个keep-alive连接）
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+TEST_FILES_DIR = os.path.join(ROOT_DIR, 'test_files')
+
+from bench_suite import percentile
+
+# 各类请求的权重，上传和删除不在其中，由第一个客户端进程按 --upload-interval 定期执行
+TRAFFIC_MIX = {
+    'mock': 60,
+    'list_interfaces': 10,
+    'list_files': 5,
+    'detail': 25,
+}
+
+# 服务启动脚本：覆盖数据库、上传目录和日志等路径后以 __main__ 运行 simple_app.py
+LAUNCHER = '''
+import os, runpy, sys
+backend_dir, data_dir = sys.argv[1], sys.argv[2]
+sys.path.insert(0, backend_dir)
+import config
+config.DATABASE_PATH = os.path.join(data_dir, 'load_test.db')
+config.UPLOAD_FOLDER = os.path.join(data_dir, 'uploads')
+config.LOG_FILE = os.path.join(data_dir, 'app.log')
+config.PROFILE_FOLDER = os.path.join(data_dir, 'profiles')
+config.LOG_LEVEL = 'WARNING'
+sys.argv = [os.path.join(backend_dir, 'simple_app.py')] + sys.argv[3:]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+# ---------- HTTP客户端 ----------
+
+class Client:
+    """一个keep-alive连接，连接断开时下次请求自动重连"""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """返回 (状态码, 响应内容)，连接失败时状态码为0"""
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers or {})
+                response = self.conn.getresponse()
+                data = response.read()
+                if response.will_close:
+                    self.close()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                # 服务端关闭了空闲连接时重试一次
+                self.close()
+                if attempt:
+                    return 0, b''
+        return 0, b''
+
+    def get_json(self, path):
+        status, data = self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f'GET {path} 返回 {status}')
+        return json.loads(data)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def multipart_body(filename, content):
+    boundary = uuid.uuid4().hex
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode('utf-8')
+    body = head + content + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def upload(client, path):
+    with open(path, 'rb') as f:
+        body, headers = multipart_body(os.path.basename(path), f.read())
+    status, data = client.request('POST', '/files/upload', body, headers)
+    file_id = json.loads(data).get('id') if status == 200 else None
+    return status, file_id
+
+
+# ---------- 服务进程 ----------
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(server_mode, data_dir):
+    port = free_port()
+    log = open(os.path.join(data_dir, 'server_output.log'), 'wb')
+    process = subprocess.Popen(
+        [sys.executable, '-c', LAUNCHER, BACKEND_DIR, data_dir,
+         '--port', str(port), '--host', '127.0.0.1', '--no-browser', '--server', server_mode],
+        cwd=BACKEND_DIR, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    client = Client(base_url, timeout=2)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'服务进程已退出，输出见 {log.name}')
+        if client.request('GET', '/health')[0] == 200:
+            client.close()
+            return process, base_url
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'服务在60秒内未启动，输出见 {log.name}')
+
+
+def read_rss(pid):
+    """进程的常驻内存（MB），优先使用psutil，否则读取 /proc（仅Linux），都不可用时返回None"""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1048576
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+# ---------- 客户端进程 ----------
+
+def concrete_path(path):
+    # 带路径参数的接口（/items/{id}）用固定值代替参数
+    return re.sub(r'\{[^}]+\}', '1', path)
+
+
+class Recorder:
+    """记录每类请求的耗时和错误数，以及每秒的请求数和错误数"""
+
+    def __init__(self, started):
+        self.started = started
+        self.latencies = {}
+        self.errors = {}
+        self.timeline = {}
+        self._lock = threading.Lock()
+
+    def record(self, op, latency, ok):
+        second = int(time.time() - self.started)
+        with self._lock:
+            self.latencies.setdefault(op, []).append(latency)
+            if not ok:
+                self.errors[op] = self.errors.get(op, 0) + 1
+            bucket = self.timeline.setdefault(second, [0, 0])
+            bucket[0] += 1
+            if not ok:
+                bucket[1] += 1
+
+
+def timed(recorder, op, func, *args):
+    t = time.perf_counter()
+    try:
+        status = func(*args)[0]
+    except Exception:
+        status = 0
+    recorder.record(op, time.perf_counter() - t, 200 <= status < 400)
+    return status
+
+
+def traffic_loop(base_url, interfaces, mix, recorder, deadline, mock_count, seed):
+    rng = random.Random(seed)
+    client = Client(base_url)
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    while time.time() < deadline:
+        op = rng.choices(ops, weights)[0]
+        if op == 'mock':
+            interface = rng.choice(interfaces)
+            method = interface['method'].upper()
+            path = '/dynamic' + concrete_path(interface['path'])
+            if method == 'GET':
+                timed(recorder, 'mock_GET', client.request, 'GET', f'{path}?{urlencode({"mock_count": mock_count})}')
+            else:
+                body = json.dumps({'mock_count': mock_count}).encode('utf-8')
+                timed(recorder, f'mock_{method}', client.request, method, path, body,
+                      {'Content-Type': 'application/json'})
+        elif op == 'list_interfaces':
+            timed(recorder, op, client.request, 'GET', '/interfaces')
+        elif op == 'list_files':
+            timed(recorder, op, client.request, 'GET', '/files')
+        else:
+            interface_id = rng.choice(interfaces)['id']
+            timed(recorder, 'detail_params', client.request, 'GET', f'/interfaces/{interface_id}/params')
+            timed(recorder, 'detail_responses', client.request, 'GET', f'/interfaces/{interface_id}/responses')
+            timed(recorder, 'detail_mock_config', client.request, 'GET', f'/interfaces/{interface_id}/mock-config')
+    client.close()
+
+
+def upload_loop(base_url, files, delete_files, recorder, deadline, interval):
+    """定期上传一个文件并删除上一次上传的文件，接口总数保持稳定；delete_files为False时只上传"""
+    client = Client(base_url, timeout=120)
+    previous = None
+    index = 0
+    while time.time() + interval < deadline:
+        time.sleep(interval)
+        t = time.perf_counter()
+        status, file_id = upload(client, files[index % len(files)])
+        recorder.record('upload', time.perf_counter() - t, status == 200)
+        index += 1
+        if previous is not None and delete_files:
+            timed(recorder, 'delete', client.request, 'DELETE', f'/files/{previous}')
+        previous = file_id
+    if previous is not None and delete_files:
+        timed(recorder, 'delete', client.request, 'DELETE', f'/files/{previous}')
+    client.close()
+
+
+def worker(index, base_url, interfaces, mix, files, admin_routes, args, started, deadline, results):
+    """客户端进程：threads个线程发起混合请求，第一个进程另外定期上传和删除文件"""
+    recorder = Recorder(started)
+    threads = [threading.Thread(target=traffic_loop,
+                                args=(base_url, interfaces, mix, recorder, deadline, args.mock_count,
+                                      index * 1000 + i))
+               for i in range(args.threads)]
+    if index == 0 and args.upload_interval > 0 and files:
+        threads.append(threading.Thread(target=upload_loop,
+                                        args=(base_url, files, admin_routes, recorder, deadline,
+                                              args.upload_interval)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((recorder.latencies, recorder.errors, recorder.timeline))
+
+
+# ---------- 汇总 ----------
+
+def summarize(latencies, errors, elapsed):
+    summary = {}
+    for op in sorted(latencies):
+        values = sorted(latencies[op])
+        summary[op] = {
+            'requests': len(values),
+            'rps': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2),
+            'error_rate': round(errors.get(op, 0) / len(values), 4),
+        }
+    return summary
+
+
+def print_summary(summary, total):
+    print(f"\n{'请求':<20} {'次数':>8} {'次/秒':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}"
+          f" {'max(ms)':>9} {'错误率':>8}")
+    for op, item in list(summary.items()) + [('total', total)]:
+        print(f"{op:<20} {item['requests']:>8} {item['rps']:>8.1f} {item['p50_ms']:>9.2f} {item['p95_ms']:>9.2f}"
+              f" {item['p99_ms']:>9.2f} {item['max_ms']:>9.2f} {item['error_rate']:>8.2%}")
+
+
+def seed_server(base_url, files):
+    """上传测试文件，返回全部接口"""
+    client = Client(base_url, timeout=120)
+    for path in files:
+        status, file_id = upload(client, path)
+        print(f"上传 {os.path.basename(path)}: {status} 文件ID {file_id}")
+    interfaces = client.get_json('/interfaces')
+    client.close()
+    return interfaces
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端多进程压力测试')
+    parser.add_argument('--url', default=None, help='测试已在运行的服务，不指定时在本机启动 simple_app.py')
+    parser.add_argument('--server', choices=['threading', 'asgi'], default='threading', help='本机启动时的服务方式')
+    parser.add_argument('--duration', type=float, default=30, help='测试时长（秒）')
+    parser.add_argument('--processes', type=int, default=4, help='客户端进程数')
+    parser.add_argument('--threads', type=int, default=4, help='每个客户端进程的并发连接数')
+    parser.add_argument('--mock-count', type=int, default=10, help='Mock请求的数据行数')
+    parser.add_argument('--upload-interval', type=float, default=5, help='上传和删除文件的间隔（秒），0表示不上传')
+    parser.add_argument('--files', nargs='*', default=None, help='用于生成接口和定期上传的文件，默认 test_files/ 下全部文件')
+    parser.add_argument('--output', default=None, help='把结果写入该JSON文件')
+    args = parser.parse_args()
+
+    files = args.files
+    if files is None:
+        files = sorted(os.path.join(TEST_FILES_DIR, name) for name in os.listdir(TEST_FILES_DIR))
+
+    process = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        data_dir = tempfile.mkdtemp(prefix='load_test_')
+        print(f"启动服务（{args.server}），数据目录: {data_dir}")
+        process, base_url = start_server(args.server, data_dir)
+    try:
+        interfaces = seed_server(base_url, files)
+        if not interfaces:
+            print('没有可用的接口，结束测试')
+            return 1
+        # 不提供接口详情和文件删除的服务（例如只部署了Mock接口的服务），这两类请求不参与测试；
+        # 本机以ASGI方式启动时，其余路由会转交Flask应用处理，同样测试这两类请求
+        mix = dict(TRAFFIC_MIX)
+        probe = Client(base_url)
+        admin_routes = probe.request('GET', f"/interfaces/{interfaces[0]['id']}/params")[0] == 200
+        probe.close()
+        if not admin_routes:
+            del mix['detail']
+            print('服务不提供接口详情和文件删除，不测试这两类请求')
+        print(f"接口数: {len(interfaces)}，客户端: {args.processes} 进程 x {args.threads} 连接，时长 {args.duration:g}s\n")
+
+        started = time.time()
+        deadline = started + args.duration
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=worker,
+                                           args=(i, base_url, interfaces, mix, files, admin_routes, args, started, deadline,
+                                                 results))
+                   for i in range(args.processes)]
+        for w in workers:
+            w.start()
+
+        # 每秒记录一次服务进程的内存
+        rss = []
+        while time.time() < deadline:
+            if process is not None:
+                rss.append((int(time.time() - started), read_rss(process.pid)))
+            time.sleep(1)
+
+        latencies, errors, timeline = {}, {}, {}
+        for _ in workers:
+            worker_latencies, worker_errors, worker_timeline = results.get()
+            for op, values in worker_latencies.items():
+                latencies.setdefault(op, []).extend(values)
+            for op, count in worker_errors.items():
+                errors[op] = errors.get(op, 0) + count
+            for second, (count, failed) in worker_timeline.items():
+                bucket = timeline.setdefault(second, [0, 0])
+                bucket[0] += count
+                bucket[1] += failed
+        for w in workers:
+            w.join()
+        elapsed = time.time() - started
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    summary = summarize(latencies, errors, elapsed)
+    total = summarize({'total': [v for values in latencies.values() for v in values]},
+                      {'total': sum(errors.values())}, elapsed)['total']
+    print_summary(summary, total)
+
+    rss_by_second = dict(rss)
+    print(f"\n{'秒':>6} {'次/秒':>8} {'错误':>6} {'内存(MB)':>10}")
+    for second in sorted(timeline):
+        count, failed = timeline[second]
+        memory = rss_by_second.get(second)
+        memory_text = f'{memory:.1f}' if memory is not None else '-'
+        print(f"{second:>6} {count:>8} {failed:>6} {memory_text:>10}")
+
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'url': base_url if args.url else None,
+                'server': None if args.url else args.server,
+                'duration': args.duration,
+                'processes': args.processes,
+                'threads': args.threads,
+                'mock_count': args.mock_count,
+                'interfaces': len(interfaces),
+            },
+            'requests': summary,
+            'total': total,
+            'timeline': [{'second': second, 'requests': timeline[second][0], 'errors': timeline[second][1],
+                          'rss_mb': rss_by_second.get(second)} for second in sorted(timeline)],
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
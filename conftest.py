@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+pytest公共设置（不需要启动服务）
+把backend加入导入路径；导入应用之前把数据库、上传目录、分析结果目录和日志文件指向临时目录，测试不会修改真实数据
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import config
+
+TEMP_DIR = tempfile.mkdtemp(prefix='api_generator_test_')
+config.DATABASE_PATH = os.path.join(TEMP_DIR, 'api_generator.db')
+config.UPLOAD_FOLDER = os.path.join(TEMP_DIR, 'uploads')
+config.PROFILE_FOLDER = os.path.join(TEMP_DIR, 'profiles')
+config.LOG_FILE = os.path.join(TEMP_DIR, 'app.log')
+
+# 根目录下其余的 test_*.py 是需要启动服务的联调脚本，不由pytest收集
+collect_ignore = ['test_health.py', 'test_health_detailed.py', 'test_json_upload.py', 'test_markdown_upload.py',
+                  'test_upload.py']
+
+
+@pytest.fixture
+def database(tmp_path):
+    """迁移到最新版本的临时数据库，返回数据库文件路径"""
+    import db_migrations
+    import db_pool
+
+    path = str(tmp_path / 'test.db')
+    conn = db_pool.connect(path)
+    try:
+        db_migrations.migrate(conn)
+    finally:
+        conn.close()
+    yield path
+    db_pool.get_pool(path).close_all()
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """simple_app模块（使用临时数据库），整个测试会话共用一个应用实例"""
+    import simple_app
+    return simple_app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def create_interface(app_module):
+    """在应用的数据库中创建接口（参数同insert_interface）并加载到路由表，返回接口id；各测试应使用不同的路径"""
+    import db_pool
+
+    def create(path, method='GET', **kwargs):
+        conn = db_pool.connect(app_module.DATABASE)
+        try:
+            with conn:
+                file_id = insert_file(conn)
+                interface_id = insert_interface(conn, file_id, path, method, **kwargs)
+        finally:
+            conn.close()
+        app_module.route_table.reload_file(file_id)
+        return interface_id
+    return create
+
+
+def insert_file(conn, filename='test.json', file_path='', parsed=1):
+    cursor = conn.execute('''
+        INSERT INTO interface_files (filename, file_path, file_type, size, uploaded_at, parsed)
+        VALUES (?, ?, 'application/json', 0, '2024-01-01T00:00:00', ?)
+    ''', (filename, file_path, parsed))
+    return cursor.lastrowid
+
+
+def insert_interface(conn, file_id, path, method='GET', fields=(), enabled=1, default_count=10, seed=None,
+                     total_count=None, fault_config=None, name=None):
+    """写入一个接口及其Mock配置和响应字段，fields为 [(字段名, 类型)]，返回接口id"""
+    cursor = conn.execute('''
+        INSERT INTO interfaces (name, path, method, description, file_id, is_websocket) VALUES (?, ?, ?, '', ?, 0)
+    ''', (name or path, path, method, file_id))
+    interface_id = cursor.lastrowid
+    conn.execute('''
+        INSERT INTO mock_configs (interface_id, enabled, default_count, seed, total_count, fault_config)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (interface_id, enabled, default_count, seed, total_count, fault_config))
+    conn.executemany('INSERT INTO interface_responses (interface_id, name, response_type) VALUES (?, ?, ?)',
+                     [(interface_id, name, response_type) for name, response_type in fields])
+    return interface_id
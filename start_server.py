@@ -34,6 +34,8 @@ def start_server():
         '--host', '127.0.0.1',
         '--no-browser'
     ]
+    # 透传额外的命令行参数，例如 --server asgi
+    command.extend(sys.argv[1:])
     
     logger.info(f"执行命令: {' '.join(command)}")
     
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ASGI服务入口的测试（不需要启动服务，使用临时数据库）
+"""
+
+import asyncio
+from contextlib import closing
+
+import pytest
+
+starlette = pytest.importorskip('starlette')
+pytest.importorskip('a2wsgi')
+
+from starlette.testclient import TestClient
+
+import db_pool
+from conftest import insert_file, insert_interface
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+@pytest.fixture(scope='module')
+def asgi_app(app_module):
+    import asgi_app
+    return asgi_app
+
+
+@pytest.fixture
+def asgi_client(asgi_app):
+    with TestClient(asgi_app.http_app) as client:
+        yield client
+
+
+def _file_id(app_module, interface_id):
+    return app_module.route_table.get(interface_id).file_id
+
+
+def test_direct_mock_path(asgi_client, create_interface):
+    """直接路径匹配到Mock接口时在ASGI中处理"""
+    create_interface('/asgi/users', fields=FIELDS, default_count=3)
+    response = asgi_client.get('/asgi/users')
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert len(data) == 3 and list(data[0]) == ['id', 'name']
+    assert asgi_client.get('/dynamic/asgi/users').status_code == 200
+
+
+def test_flask_routes_are_served(app_module, asgi_client, create_interface):
+    """ASGI没有实现的路由转交给Flask应用，不再返回Mock接口的404"""
+    interface_id = create_interface('/asgi/flask', fields=FIELDS)
+    assert asgi_client.get('/').status_code == 200
+
+    params = asgi_client.get(f'/interfaces/{interface_id}/params')
+    assert params.status_code == 200 and params.json()[0]['interface_id'] == interface_id
+    config = asgi_client.get(f'/interfaces/{interface_id}/mock-config')
+    assert config.status_code == 200 and config.json()['default_count'] == 10
+
+    file_id = _file_id(app_module, interface_id)
+    deleted = asgi_client.delete(f'/files/{file_id}')
+    assert deleted.status_code == 200 and deleted.json()['file_id'] == file_id
+    assert app_module.route_table.get(interface_id) is None
+    assert asgi_client.delete(f'/files/{file_id}').status_code == 404
+
+    # 未匹配的Mock请求由Flask返回接口不存在
+    missing = asgi_client.post('/asgi/missing', json={})
+    assert missing.json()['code'] == 404
+
+
+def test_if_none_match_list(asgi_client, create_interface):
+    """If-None-Match 按ETag列表比较"""
+    create_interface('/asgi/etag', fields=FIELDS, seed=5)
+    first = asgi_client.get('/asgi/etag')
+    etag = first.headers['ETag']
+    for header in (f'"other", {etag}', f'W/{etag}', '*'):
+        response = asgi_client.get('/asgi/etag', headers={'If-None-Match': header})
+        assert response.status_code == 304, header
+    # 只是包含ETag的字符串不算匹配
+    partial = f'"x{etag.strip(chr(34))}x"'
+    response = asgi_client.get('/asgi/etag', headers={'If-None-Match': partial})
+    assert response.status_code == 200 and response.content == first.content
+
+
+def test_mock_generated_off_event_loop(app_module, asgi_client, create_interface, monkeypatch):
+    """单个Mock请求的数据在线程池中生成，不占用事件循环"""
+    create_interface('/asgi/thread', fields=FIELDS)
+    resolve = app_module.resolve_mock_request
+    loops = []
+
+    def spy(*args):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return resolve(*args)
+
+    monkeypatch.setattr(app_module, 'resolve_mock_request', spy)
+    assert asgi_client.get('/asgi/thread').status_code == 200
+    assert loops == [None]
+
+
+def test_interface_events(app_module):
+    """Socket.IO的get_interfaces事件：不分批时返回一次列表，带chunk_size时分批返回"""
+    with closing(db_pool.connect(app_module.DATABASE)) as conn, conn:
+        file_id = insert_file(conn)
+        for index in range(3):
+            insert_interface(conn, file_id, f'/asgi/events/{index}', fields=FIELDS)
+
+    events = list(app_module.iter_interface_events({'file_id': file_id}))
+    assert [event for event, _ in events] == ['interfaces_response']
+    assert len(events[0][1]['interfaces']) == 3
+
+    chunks = list(app_module.iter_interface_events({'file_id': file_id, 'chunk_size': 2, 'request_id': 'r1'}))
+    assert [event for event, _ in chunks] == ['interfaces_chunk', 'interfaces_chunk']
+    assert [payload['seq'] for _, payload in chunks] == [0, 1]
+    assert [payload['done'] for _, payload in chunks] == [False, True]
+    assert sum(len(payload['interfaces']) for _, payload in chunks) == 3
+    assert chunks[0][1]['request_id'] == 'r1'
+
+    error = list(app_module.iter_interface_events({'sort': 'nonexistent'}))
+    assert error[0][0] == 'error'
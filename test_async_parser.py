@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+解析结果批量写入的测试（不需要启动服务，使用临时数据库）
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import closing
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import async_parser
+import db_pool
+from async_parser import DEFAULT_PARAMS, DEFAULT_RESPONSES, save_parsed_interfaces
+from conftest import insert_file, insert_interface
+
+TEST_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_files')
+
+
+def _interfaces(count, prefix='/parsed'):
+    return [(f'接口{i}', f'{prefix}/{i}', 'GET', [('id', 'int', 1, '', '1')], [('name', 'string', '', 'a')])
+            for i in range(count)]
+
+
+def _save(database, file_id, interfaces):
+    with closing(db_pool.connect(database)) as conn:
+        save_parsed_interfaces(conn, file_id, interfaces, len(interfaces), len(interfaces))
+
+
+def _ids(database, file_id):
+    with closing(db_pool.connect(database)) as conn:
+        return [row[0] for row in conn.execute('SELECT id FROM interfaces WHERE file_id = ? ORDER BY id', (file_id,))]
+
+
+def test_bulk_insert(database):
+    """接口、Mock配置、请求参数和响应字段在一个事务中写入，并更新文件的解析统计"""
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn)
+    interfaces = _interfaces(3) + [('默认', '/parsed/default', 'POST', DEFAULT_PARAMS, DEFAULT_RESPONSES)]
+    _save(database, file_id, interfaces)
+
+    ids = _ids(database, file_id)
+    assert ids == [1, 2, 3, 4]
+    with closing(db_pool.connect(database)) as conn:
+        assert conn.execute('SELECT name, path, method, description FROM interfaces WHERE id = 4').fetchone() == \
+            ('默认', '/parsed/default', 'POST', '')
+        assert conn.execute('SELECT interface_id, enabled, default_count FROM mock_configs ORDER BY id').fetchall() \
+            == [(i, 1, 10) for i in ids]
+        assert conn.execute('SELECT COUNT(*) FROM interface_params WHERE interface_id = 4').fetchone()[0] == \
+            len(DEFAULT_PARAMS)
+        assert conn.execute('SELECT name, response_type, interface_id FROM interface_responses WHERE interface_id = 2'
+                            ).fetchall() == [('name', 'string', 2)]
+        assert conn.execute('SELECT parsed_interfaces, parsed_params, parsed_responses FROM interface_files '
+                            'WHERE id = ?', (file_id,)).fetchone() == (4, 4, 4)
+        assert not conn.in_transaction
+
+
+def test_ids_continue_after_sqlite_sequence(database):
+    """接口id从 sqlite_sequence 和现有最大id中较大的一个之后分配，已删除接口的id不会被重新使用"""
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn)
+        for i in range(5):
+            insert_interface(conn, file_id, f'/seq/{i}')
+        conn.execute('DELETE FROM interfaces WHERE id >= 4')
+    _save(database, file_id, _interfaces(2, '/seq/new'))
+    assert _ids(database, file_id) == [1, 2, 3, 6, 7]
+
+    # sqlite_sequence 随显式写入的id更新，之后 AUTOINCREMENT 分配的id也不会重复
+    with closing(db_pool.connect(database)) as conn, conn:
+        assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'interfaces'").fetchone() == (7,)
+        assert insert_interface(conn, file_id, '/seq/auto') == 8
+        # 缺少 sqlite_sequence 记录时（例如从备份恢复的表）按现有的最大id分配
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'interfaces'")
+    _save(database, file_id, _interfaces(1, '/seq/restored'))
+    assert _ids(database, file_id)[-1] == 9
+
+
+def test_concurrent_saves_do_not_collide(database):
+    """多个线程同时写入时，写锁内分配的id不会重复"""
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_ids = [insert_file(conn) for _ in range(4)]
+    errors = []
+
+    def save(file_id):
+        try:
+            _save(database, file_id, _interfaces(50, f'/concurrent/{file_id}'))
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(file_id,)) for file_id in file_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    ids = [interface_id for file_id in file_ids for interface_id in _ids(database, file_id)]
+    assert len(ids) == len(set(ids)) == 200
+    # 每个文件的接口id是连续的一段
+    for file_id in file_ids:
+        own = _ids(database, file_id)
+        assert own == list(range(own[0], own[0] + 50))
+
+
+def test_failed_save_writes_nothing(database):
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn)
+    interfaces = _interfaces(2) + [(None, '/parsed/bad', 'GET', [], [])]
+    with closing(db_pool.connect(database)) as conn:
+        with pytest.raises(sqlite3.IntegrityError):
+            save_parsed_interfaces(conn, file_id, interfaces, 0, 0)
+    assert _ids(database, file_id) == []
+
+
+def test_parse_file(database, monkeypatch):
+    """解析OpenAPI文件并写入数据库"""
+    monkeypatch.setattr(async_parser, 'DATABASE', database)
+    path = os.path.join(TEST_FILES_DIR, 'test_openapi3.json')
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn, 'test_openapi3.json', path, parsed=1)
+    async_parser.parse_file_async(file_id, path, 'test_openapi3.json', 'application/json')
+    ids = _ids(database, file_id)
+    with closing(db_pool.connect(database)) as conn:
+        parsed = conn.execute('SELECT parsed, parsed_interfaces FROM interface_files WHERE id = ?',
+                              (file_id,)).fetchone()
+        configs = conn.execute('SELECT COUNT(*) FROM mock_configs').fetchone()[0]
+    assert ids and parsed == (1, len(ids)) and configs == len(ids)
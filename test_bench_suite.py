@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基准测试套件的测试：统计、基线保存和退化判断（不需要启动服务，场景只运行几次）
+"""
+
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+
+@pytest.fixture
+def bench_suite(app_module):
+    """
+    导入基准测试模块并准备应用；setup_app 会把数据库指向自己的临时目录并关闭请求日志，
+    测试中恢复为应用当前的配置，场景创建的接口写入应用的测试数据库
+    """
+    import config
+
+    names = ('DATABASE_PATH', 'UPLOAD_FOLDER', 'MOCK_POOL_ENABLED', 'REQUEST_LOG_ENABLED')
+    saved = {name: getattr(config, name) for name in names}
+    level = logging.getLogger().level
+    import bench_suite
+    bench_suite.setup_app()
+    for name, value in saved.items():
+        setattr(config, name, value)
+    logging.getLogger().setLevel(level)
+    return bench_suite
+
+
+def _result(ops, p99):
+    return {'iterations': 10, 'ops_per_sec': ops, 'mean_ms': 1, 'p50_ms': 1, 'p99_ms': p99}
+
+
+def test_summarize(bench_suite):
+    samples = [0.001] * 98 + [0.01, 0.02]
+    result = bench_suite.summarize(samples, rows=10)
+    assert result['iterations'] == 100 and result['p50_ms'] == 1 and result['p99_ms'] == 10
+    assert result['ops_per_sec'] == pytest.approx(100 / 0.128, rel=1e-3)
+    assert result['rows_per_sec'] == pytest.approx(1000 / 0.128, rel=1e-3)
+    assert bench_suite.percentile([1, 2, 3], 1.0) == 3 and bench_suite.percentile([1, 2, 3], 0) == 1
+    assert bench_suite.percentile([], 0.5) == 0.0
+
+
+def test_measure_respects_limits(bench_suite):
+    calls = []
+    samples = bench_suite.measure(lambda: calls.append(1), min_time=10, min_iterations=1, max_iterations=5)
+    # 先预热一次，不计入样本
+    assert len(samples) == 5 and len(calls) == 6
+    assert len(bench_suite.measure(lambda: None, min_time=0, min_iterations=3, max_iterations=100)) == 3
+
+
+def test_compare(bench_suite):
+    """吞吐量下降或p99上升超过阈值时视为退化，基线中没有的场景不比较"""
+    baseline = {'a': _result(100, 10), 'b': _result(100, 10), 'c': _result(100, 10)}
+    results = {'a': _result(85, 12), 'b': _result(70, 10), 'c': _result(100, 14), 'new': _result(1, 1)}
+    assert bench_suite.compare(results, baseline, 0.2, 0.3) == ['b', 'c']
+
+
+def test_run_suite(bench_suite):
+    sweeps = {'fields': [3], 'rows': [2], 'catalog': [5]}
+    results = bench_suite.run_suite(sweeps, None, min_time=0, max_iterations=3)
+    assert {'generate_mock_value.fields=3', 'http.fields=3', 'http.rows=2', 'http.catalog=5'} <= set(results)
+    assert all(item['iterations'] >= 3 for item in results.values())
+    assert set(bench_suite.run_suite(sweeps, 'catalog', min_time=0, max_iterations=3)) == {'http.catalog=5'}
+
+
+def test_baseline_regression_exit_code(bench_suite, tmp_path, monkeypatch):
+    """保存基线后再次运行，退化时以退出码1结束"""
+    baseline = str(tmp_path / 'baseline.json')
+    results = {'http.rows=1': _result(100, 10)}
+    monkeypatch.setattr(bench_suite, 'run_suite', lambda *args: dict(results))
+    monkeypatch.setattr(sys, 'argv', ['bench_suite.py', '--baseline', baseline, '--save-baseline'])
+    assert bench_suite.main() == 0
+    with open(baseline, encoding='utf-8') as f:
+        assert json.load(f)['results'] == results
+
+    monkeypatch.setattr(sys, 'argv', ['bench_suite.py', '--baseline', baseline])
+    assert bench_suite.main() == 0
+    results['http.rows=1'] = _result(50, 10)
+    assert bench_suite.main() == 1
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SQLite连接池的测试（不需要启动服务，使用临时数据库）
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import db_pool
+from db_pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2)
+    conn = pool.connect()
+    with conn:
+        conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.close()
+    yield pool
+    pool.close_all()
+
+
+def _count(pool):
+    conn = pool.connect()
+    try:
+        return conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_connection_is_reused(pool):
+    """close() 归还连接，下次取出同一个连接；重复close不会重复归还"""
+    first = pool.connect()
+    first.close()
+    first.close()
+    second = pool.connect()
+    assert second is first and pool.stats()['idle'] == 0
+    second.close()
+    assert pool.stats()['opened'] == 1 and pool.stats()['reused'] == 2 and pool.stats()['idle'] == 1
+
+
+def test_pragmas(pool):
+    conn = pool.connect()
+    try:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert conn.execute('PRAGMA cache_size').fetchone()[0] == -16384
+        assert isinstance(conn.cursor(), db_pool.metrics.MeteredCursor)
+    finally:
+        conn.close()
+
+
+def test_release_rolls_back_and_resets(pool):
+    """归还时回滚未提交的事务并恢复row_factory"""
+    conn = pool.connect()
+    conn.row_factory = sqlite3.Row
+    conn.execute("INSERT INTO items (name) VALUES ('x')")
+    conn.close()
+    assert _count(pool) == 0
+    conn = pool.connect()
+    assert conn.row_factory is None
+    conn.close()
+
+
+def test_idle_connections_are_capped(pool):
+    connections = [pool.connect() for _ in range(4)]
+    for conn in connections:
+        conn.close()
+    assert pool.stats()['idle'] == 2
+    unpooled = ConnectionPool(pool.database, size=0)
+    conn = unpooled.connect()
+    conn.close()
+    assert unpooled.connect() is not conn and unpooled.stats()['opened'] == 2
+
+
+def test_release_thread(pool):
+    """只归还当前线程未关闭的连接，并计入泄漏数"""
+    leaked = pool.connect()
+    leaked.execute("INSERT INTO items (name) VALUES ('x')")
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.connect()))
+    thread.start()
+    thread.join()
+    assert pool.release_thread() == 1 and pool.release_thread() == 0
+    assert pool.stats()['leaked'] == 1 and _count(pool) == 0
+    other[0].close()
+    assert pool.stats()['idle'] == 2
+
+
+def test_pool_is_discarded_after_fork(pool):
+    conn = pool.connect()
+    conn.close()
+    # 模拟在fork出的子进程中使用连接池
+    pool._pid = -1
+    assert pool.connect() is not conn and pool._pid == os.getpid()
+
+
+def test_get_pool_uses_config(tmp_path, monkeypatch):
+    import config
+
+    monkeypatch.setattr(config, 'DB_POOL_SIZE', 3)
+    monkeypatch.setattr(config, 'DB_JOURNAL_MODE', None)
+    database = str(tmp_path / 'configured.db')
+    try:
+        assert db_pool.get_pool(database) is db_pool.get_pool(database)
+        assert db_pool.get_pool(database).size == 3
+        conn = db_pool.connect(database)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+        conn.close()
+        assert any(item['database'] == database for item in db_pool.stats())
+    finally:
+        db_pool.get_pool(database).close_all()
+        db_pool._pools.pop(database, None)
+
+
+def test_request_releases_leaked_connections(app_module, client):
+    """请求中未关闭的连接在应用上下文结束时归还连接池"""
+    pool = db_pool.get_pool(app_module.DATABASE)
+    leaked = pool.stats()['leaked']
+    with app_module.app.test_request_context('/'):
+        db_pool.connect(app_module.DATABASE).execute('SELECT 1')
+    assert pool.stats()['leaked'] == leaked + 1 and pool.release_thread() == 0
+    stats = client.get('/db-pool/stats').get_json()['pools']
+    assert any(item['database'] == app_module.DATABASE for item in stats)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mock接口延迟和故障注入的测试（不需要启动服务）
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from fault_injection import (MAX_DELAY_MS, DelayScheduler, FaultConfigError, FaultStats, iter_throttled,
+                             parse_fault_config)
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+def test_parse_fault_config():
+    assert parse_fault_config(None) is None and parse_fault_config('') is None and parse_fault_config('{}') is None
+    profile = parse_fault_config('{"latency": {"type": "fixed", "ms": 30}, "error_rate": 0.5, "bandwidth_kbps": 2}')
+    assert profile.latency_type == 'fixed' and profile.error_status == 500 and profile.bytes_per_second == 2048
+    for invalid in ('not json', [], {'error_rate': 2}, {'latency': {'type': 'uniform', 'min_ms': 5, 'max_ms': 1}},
+                    {'latency': {'type': 'percentiles'}}, {'latency': {'type': 'percentiles', 'p50': 9, 'p99': 1}},
+                    {'latency': {'type': 'percentiles', 'x50': 1}}, {'latency': {'type': 'cauchy'}},
+                    {'latency': {'type': 'fixed', 'ms': -1}}):
+        with pytest.raises(FaultConfigError):
+            parse_fault_config(invalid)
+
+
+def test_latency_distributions():
+    rng = random.Random(3)
+    uniform = parse_fault_config({'latency': {'type': 'uniform', 'min_ms': 10, 'max_ms': 20}})
+    assert all(10 <= uniform.sample_delay_ms(rng) <= 20 for _ in range(200))
+    # 正态分布截断在0以上
+    normal = parse_fault_config({'latency': {'type': 'normal', 'mean_ms': 0, 'stddev_ms': 50}})
+    assert min(normal.sample_delay_ms(rng) for _ in range(200)) == 0
+    assert parse_fault_config({'latency': {'ms': MAX_DELAY_MS * 2}}).sample_delay_ms(rng) == MAX_DELAY_MS
+
+
+def test_percentile_latency():
+    """按分位点线性插值，抽样结果的分位数与配置一致"""
+    profile = parse_fault_config({'latency': {'type': 'percentiles', 'p50': 20, 'p95': 200, 'p99': 1500}})
+    assert profile._sample_percentiles(0.1) == 20 and profile._sample_percentiles(1.0) == 1500
+    assert profile._sample_percentiles(0.725) == pytest.approx(110)
+    rng = random.Random(7)
+    samples = sorted(profile.sample_delay_ms(rng) for _ in range(20000))
+    assert samples[len(samples) // 2] == 20
+    assert sum(sample <= 200 for sample in samples) / len(samples) == pytest.approx(0.95, abs=0.01)
+    assert samples[-1] <= 1500
+
+
+def test_error_rate():
+    profile = parse_fault_config({'error_rate': 0.25, 'error_status': 503})
+    rng = random.Random(1)
+    decisions = [profile.decide(9, rng) for _ in range(4000)]
+    errors = sum(decision.error_status == 503 for decision in decisions)
+    assert 800 < errors < 1200
+    assert all(decision.delay == 0 and decision.interface_id == 9 for decision in decisions)
+    failed = next(decision for decision in decisions if decision.error_status)
+    assert failed.error_payload() == {'code': 503, 'message': '故障注入: 模拟接口错误', 'data': None}
+
+
+def test_iter_throttled():
+    """按带宽分段输出，等待的总时长为数据量除以带宽"""
+    waits = []
+    pieces = list(iter_throttled(['ab' * 50, b'x' * 30], 100, sleep=waits.append, slice_seconds=0.2))
+    assert b''.join(pieces) == b'ab' * 50 + b'x' * 30
+    assert max(len(piece) for piece in pieces) == 20
+    assert sum(waits) == pytest.approx(1.3)
+    # 等待的总时长达到上限后，其余内容一次输出
+    waits = []
+    pieces = list(iter_throttled(['ab' * 50, b'x' * 30], 100, sleep=waits.append, slice_seconds=0.2, max_seconds=0.5))
+    assert b''.join(pieces) == b'ab' * 50 + b'x' * 30
+    assert sum(waits) == pytest.approx(0.5) and [len(piece) for piece in pieces] == [20, 20, 20, 40, 30]
+
+
+def test_delay_scheduler_runs_in_due_order():
+    scheduler = DelayScheduler(name='test-delay')
+    done = threading.Event()
+    order = []
+
+    def run(name):
+        order.append(name)
+        if len(order) == 3:
+            done.set()
+
+    scheduler.call_later(0.06, run, 'c')
+    scheduler.call_later(0.02, run, 'a')
+    scheduler.call_later(0.04, run, 'b')
+    assert done.wait(2)
+    assert order == ['a', 'b', 'c'] and scheduler.pending() == 0
+
+
+def test_fault_stats():
+    stats = FaultStats()
+    stats.record(1, 10, 12)
+    stats.record(1, 30, 33, error=True)
+    item = stats.stats()[1]
+    assert (item['requests'], item['errors'], item['injected_ms_avg'], item['injected_ms_max']) == (2, 1, 20, 30)
+    assert item['real_ms_max'] == 33
+
+
+def test_http_fault_injection(app_module, client, create_interface):
+    """HTTP请求注入错误状态码；统计接口返回注入结果"""
+    interface_id = create_interface('/fault/error', fields=FIELDS,
+                                    fault_config=json.dumps({'error_rate': 1, 'error_status': 503}))
+    response = client.get('/dynamic/fault/error')
+    assert response.status_code == 503 and response.get_json()['code'] == 503
+    stats = client.get('/mock-faults/stats').get_json()
+    assert stats['interfaces'][str(interface_id)]['errors'] >= 1
+
+
+def test_threading_delay_is_capped(app_module, client, create_interface, monkeypatch):
+    """Flask线程模式下注入的延迟不超过上限，响应头给出配置的延迟"""
+    import config
+
+    monkeypatch.setattr(config, 'MOCK_FAULT_THREADING_MAX_DELAY_MS', 20)
+    create_interface('/fault/slow', fields=FIELDS, fault_config=json.dumps({'latency': {'ms': 60000}}))
+    started = time.perf_counter()
+    response = client.get('/dynamic/fault/slow')
+    assert response.status_code == 200 and time.perf_counter() - started < 5
+    assert response.headers['X-Fault-Delay-Capped'] == '60000'
+
+    create_interface('/fault/short', fields=FIELDS, fault_config=json.dumps({'latency': {'ms': 10}}))
+    assert 'X-Fault-Delay-Capped' not in client.get('/dynamic/fault/short').headers
+
+
+def test_threading_throttle_is_capped(app_module, client, create_interface, monkeypatch):
+    """带宽限制的传输时长与延迟合计不超过上限，响应头给出配置的延迟加上按带宽传输的时长"""
+    import config
+
+    monkeypatch.setattr(config, 'MOCK_FAULT_THREADING_MAX_DELAY_MS', 100)
+    create_interface('/fault/throttled', fields=FIELDS,
+                     fault_config=json.dumps({'latency': {'ms': 40}, 'bandwidth_kbps': 1}))
+    started = time.perf_counter()
+    response = client.get('/dynamic/fault/throttled', query_string={'mock_count': 100})
+    body = response.get_data()
+    assert time.perf_counter() - started < 2 and response.get_json()['code'] == 0
+    # 按1KB/s传输约2~3KB的响应需要数秒
+    assert int(response.headers['X-Fault-Delay-Capped']) == round(40 + len(body) / 1024 * 1000)
+
+    create_interface('/fault/fast', fields=FIELDS, fault_config=json.dumps({'bandwidth_kbps': 1024}))
+    response = client.get('/dynamic/fault/fast')
+    assert response.get_json()['code'] == 0 and 'X-Fault-Delay-Capped' not in response.headers
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+删除文件的墓碑和后台分批清理的测试（不需要启动服务，使用临时数据库）
+"""
+
+import os
+import sys
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import db_pool
+from conftest import insert_file, insert_interface
+from file_purge import FilePurger
+from listing import INTERFACE_LISTING
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+def _count(database, table, condition='1', params=()):
+    with closing(db_pool.connect(database)) as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {condition}', params).fetchone()[0]
+
+
+def _tombstoned_file(database, tmp_path, interfaces=3, params=0, logs=0):
+    """写入一个带墓碑的文件及其接口、参数和请求日志，返回 (文件id, 上传文件路径)"""
+    upload = tmp_path / 'upload.json'
+    upload.write_text('{}')
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn, file_path=str(upload))
+        for i in range(interfaces):
+            interface_id = insert_interface(conn, file_id, f'/purge/{file_id}/{i}', fields=FIELDS)
+            conn.executemany("INSERT INTO interface_params (name, param_type, interface_id) VALUES (?, 'string', ?)",
+                             [(f'p{j}', interface_id) for j in range(params)])
+            conn.executemany('''
+                INSERT INTO request_logs (interface_id, method, path, response_status, request_time)
+                VALUES (?, 'GET', '/purge', 200, '2024-01-01T00:00:00')
+            ''', [(interface_id,)] * logs)
+            conn.execute('''
+                INSERT INTO request_log_rollups (resolution, bucket_start, interface_id, request_count, total_ms,
+                                                 max_ms, status_counts, histogram)
+                VALUES (60, 0, ?, 1, 1, 1, '{}', '{}')
+            ''', (interface_id,))
+        conn.execute("UPDATE interface_files SET deleted_at = '2024-01-01T00:00:00' WHERE id = ?", (file_id,))
+    return file_id, upload
+
+
+def test_purge_removes_everything(database, tmp_path):
+    """清理带墓碑的文件：接口及其关联数据、上传的文件和文件记录全部删除，其他文件不受影响"""
+    with closing(db_pool.connect(database)) as conn, conn:
+        kept_file = insert_file(conn)
+        kept = insert_interface(conn, kept_file, '/purge/kept', fields=FIELDS)
+    file_id, upload = _tombstoned_file(database, tmp_path, interfaces=3, params=4, logs=5)
+    purger = FilePurger(database, pause=0)
+    assert purger.pending() == 1
+
+    assert purger.run_once() == 1
+    assert purger.pending() == 0 and not upload.exists()
+    assert _count(database, 'interface_files', 'id = ?', (file_id,)) == 0
+    assert _count(database, 'interfaces') == 1
+    for table in ('interface_params', 'request_logs', 'mock_configs', 'interface_responses', 'request_log_rollups'):
+        assert _count(database, table, 'interface_id != ?', (kept,)) == 0, table
+    assert _count(database, 'interface_responses', 'interface_id = ?', (kept,)) == 2
+    stats = purger.stats()
+    # 3个接口各有4个参数、5条日志、1条Mock配置、2个响应字段、1条汇总，加上接口和文件记录
+    assert stats['files_purged'] == 1 and stats['rows_deleted'] == 3 * (4 + 5 + 1 + 2 + 1 + 1) + 1
+    assert stats['failed'] == 0 and not stats['running']
+
+
+def test_purge_in_small_transactions(database, tmp_path):
+    """每个事务最多删除chunk_rows行，每批最多处理chunk_interfaces个接口"""
+    _tombstoned_file(database, tmp_path, interfaces=5, params=7, logs=0)
+    purger = FilePurger(database, chunk_interfaces=2, chunk_rows=3, pause=0)
+    purger.run_once()
+    assert _count(database, 'interfaces') == 0 and _count(database, 'interface_params') == 0
+    # 3批接口（2、2、1个），参数每批最多3行
+    assert purger.stats()['transactions'] >= 35 // 3
+
+
+def test_stopped_purge_resumes(database, tmp_path):
+    """中途停止时保留文件记录和墓碑，下次（例如重启后）继续清理"""
+    file_id, upload = _tombstoned_file(database, tmp_path, interfaces=4)
+    purger = FilePurger(database, chunk_interfaces=1, pause=0)
+    commits = []
+    original = purger._committed
+
+    def committed(rows):
+        original(rows)
+        commits.append(rows)
+        if len(commits) == 3:
+            purger._stop.set()
+
+    purger._committed = committed
+    purger.run_once()
+    assert upload.exists() and 0 < _count(database, 'interfaces') < 4
+
+    resumed = FilePurger(database, pause=0)
+    assert resumed.pending() == 1 and resumed.run_once() == 1
+    assert _count(database, 'interface_files', 'id = ?', (file_id,)) == 0 and not upload.exists()
+
+
+def test_tombstoned_interfaces_are_hidden(database, tmp_path):
+    """带墓碑的文件下的接口不出现在接口列表中"""
+    file_id, _ = _tombstoned_file(database, tmp_path, interfaces=2)
+    items, _ = INTERFACE_LISTING.fetch(database, {})
+    assert all(item['file_id'] != file_id for item in items)
+
+
+def test_delete_file_route(app_module, client, create_interface, tmp_path):
+    """删除文件后立即从列表和路由表中消失，后台清理完成后统计接口返回清理结果"""
+    create_interface('/purge/route/users', fields=FIELDS)
+    file_id = app_module.route_table.lookup('GET', '/purge/route/users').file_id
+    assert client.get('/dynamic/purge/route/users').get_json()['code'] == 0
+
+    assert client.delete(f'/files/{file_id}').status_code == 200
+    assert client.delete(f'/files/{file_id}').status_code == 404
+    assert client.get('/dynamic/purge/route/users').get_json()['code'] == 404
+    assert all(item['id'] != file_id for item in client.get('/files').get_json())
+
+    app_module.file_purger.run_once()
+    stats = client.get('/file-purge/stats').get_json()
+    assert stats['pending_files'] == 0 and stats['files_purged'] >= 1 and stats['failed'] == 0
+    assert _count(app_module.DATABASE, 'interface_files', 'id = ?', (file_id,)) == 0
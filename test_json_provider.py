@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON序列化实现（orjson / 标准库json）的测试（不需要启动服务）
+"""
+
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import json_provider
+from json_provider import ENCODER_JSON, ENCODER_ORJSON, FastJSONProvider, resolve_encoder
+
+PAYLOAD = {
+    'code': 0,
+    'message': '成功',
+    'data': [{'id': i, 'name': f'用户{i}', 'score': i / 3, 'ok': i % 2 == 0, 'tags': None} for i in range(5)],
+    'created': datetime(2024, 5, 6, 7, 8, 9),
+    'day': date(2024, 5, 6),
+    'uid': uuid.UUID(int=7),
+}
+
+
+def _provider(encoder):
+    return FastJSONProvider(Flask(__name__), encoder)
+
+
+def test_resolve_encoder(monkeypatch):
+    assert resolve_encoder('json') == ENCODER_JSON
+    assert resolve_encoder('JSON') == ENCODER_JSON
+    expected = ENCODER_ORJSON if json_provider.orjson is not None else ENCODER_JSON
+    assert resolve_encoder('auto') == expected and resolve_encoder(None) == expected
+    # 未安装orjson时退回标准库json
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert resolve_encoder('orjson') == ENCODER_JSON and resolve_encoder('auto') == ENCODER_JSON
+
+
+def test_encoders_produce_same_json():
+    """两种实现的输出解析后相同：中文原样输出，日期、UUID等按Flask默认格式"""
+    if json_provider.orjson is None:
+        pytest.skip('未安装orjson')
+    fast, standard = _provider(ENCODER_ORJSON), _provider(ENCODER_JSON)
+    assert fast.encoder == ENCODER_ORJSON and standard.encoder == ENCODER_JSON
+    fast_body, standard_body = fast.dumps_bytes(PAYLOAD), standard.dumps_bytes(PAYLOAD)
+    assert json.loads(fast_body) == json.loads(standard_body)
+    assert '成功'.encode('utf-8') in fast_body and '成功'.encode('utf-8') in standard_body
+    assert json.loads(fast.dumps(PAYLOAD)) == json.loads(standard_body)
+    assert json.loads(fast_body)['created'] == 'Mon, 06 May 2024 07:08:09 GMT'
+
+
+def test_encoders_produce_same_bytes(monkeypatch):
+    """两种实现（包括未安装orjson时）输出的字节相同，与Flask默认的紧凑格式一致"""
+    app = Flask(__name__)
+    expected = app.json.dumps(PAYLOAD, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    assert _provider(ENCODER_JSON).dumps_bytes(PAYLOAD) == expected
+    assert _provider(ENCODER_JSON).dumps({'a': 1, 'b': [1, 2]}) == '{"a":1,"b":[1,2]}'
+    if json_provider.orjson is not None:
+        assert _provider(ENCODER_ORJSON).dumps_bytes(PAYLOAD) == expected
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert _provider('auto').dumps_bytes(PAYLOAD) == expected
+
+
+def test_orjson_falls_back_for_unsupported_values():
+    """orjson无法处理的数据（超过64位的整数）退回标准库json"""
+    big = {'value': 2 ** 70}
+    for encoder in (ENCODER_ORJSON, ENCODER_JSON):
+        provider = _provider(encoder)
+        assert json.loads(provider.dumps_bytes(big)) == big
+        assert json.loads(provider.dumps(big)) == big
+    # 带参数调用时使用标准库json，参数生效
+    assert _provider(ENCODER_ORJSON).dumps({'b': 1, 'a': 2}, indent=2).startswith('{\n  ')
+
+
+def test_response():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app, 'auto')
+    with app.app_context():
+        response = app.json.response(PAYLOAD)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data())['message'] == '成功'
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件和接口列表键集分页的测试（不需要启动服务，使用临时数据库）
+"""
+
+import os
+import sys
+from contextlib import closing
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import db_pool
+from conftest import insert_file, insert_interface
+from listing import FILE_LISTING, INTERFACE_LISTING, ListQueryError, encode_cursor
+
+METHODS = ('GET', 'POST', 'DELETE')
+
+
+@pytest.fixture
+def records(database):
+    """写入两个文件（第二个带墓碑）和若干文件记录，返回 (数据库路径, 未删除文件下的接口id)"""
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn, 'a.json')
+        # 路径和名称有重复，翻页需要按 (字段, id) 区分
+        ids = [insert_interface(conn, file_id, f'/api/{i % 4}', METHODS[i % 3], name=f'接口{i % 5}')
+               for i in range(12)]
+        ids.append(insert_interface(conn, file_id, '/other/x'))
+        deleted = insert_file(conn, 'deleted.json')
+        insert_interface(conn, deleted, '/api/deleted')
+        for i in range(7):
+            insert_file(conn, f'file{i % 3}.json', parsed=i % 2)
+        conn.execute("UPDATE interface_files SET uploaded_at = '2024-01-0' || (id % 4 + 1) || 'T00:00:00'")
+        conn.execute("UPDATE interface_files SET deleted_at = '2024-01-01T00:00:00' WHERE id = ?", (deleted,))
+    return database, ids
+
+
+def _all_pages(listing, database, args, limit):
+    """逐页查询，返回全部记录和页数"""
+    items, cursor, pages = [], None, 0
+    while True:
+        page, cursor = listing.fetch(database, args, limit, cursor or '')
+        assert len(page) <= limit
+        items.extend(page)
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+
+def _expected(database, table, sort, order, condition):
+    direction = order.upper()
+    with closing(db_pool.connect(database)) as conn:
+        return [row[0] for row in conn.execute(
+            f'SELECT id FROM {table} WHERE {condition} ORDER BY {sort} {direction}, id {direction}')]
+
+
+@pytest.mark.parametrize('sort', INTERFACE_LISTING.sort_fields)
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_interface_pages(records, sort, order):
+    """每个排序字段和方向逐页读取的结果与一次查询全部记录相同，没有重复和遗漏"""
+    database, ids = records
+    items, pages = _all_pages(INTERFACE_LISTING, database, {'sort': sort, 'order': order}, 5)
+    expected = _expected(database, 'interfaces', sort, order, 'file_id = 1')
+    assert [item['id'] for item in items] == expected and len(expected) == len(ids)
+    assert pages == 3
+
+
+@pytest.mark.parametrize('sort', FILE_LISTING.sort_fields)
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_file_pages(records, sort, order):
+    """文件列表逐页读取，带墓碑的文件不返回"""
+    database, _ = records
+    items, _ = _all_pages(FILE_LISTING, database, {'sort': sort, 'order': order}, 3)
+    expected = _expected(database, 'interface_files', sort, order, 'deleted_at IS NULL')
+    assert [item['id'] for item in items] == expected and len(expected) == 8
+    assert all(item['filename'] != 'deleted.json' for item in items)
+    assert all(isinstance(item['parsed'], bool) for item in items)
+
+
+def test_filters(records):
+    database, ids = records
+    prefixed, _ = INTERFACE_LISTING.fetch(database, {'path_prefix': '/api/1'})
+    assert {item['path'] for item in prefixed} == {'/api/1'} and len(prefixed) == 3
+    posts, _ = INTERFACE_LISTING.fetch(database, {'method': 'post'})
+    assert {item['method'] for item in posts} == {'POST'} and len(posts) == 4
+    assert [item['id'] for item in INTERFACE_LISTING.fetch(database, {'file_id': '1'})[0]] == ids
+    # 带墓碑的文件下的接口即使按file_id查询也不返回
+    assert INTERFACE_LISTING.fetch(database, {'file_id': 2})[0] == []
+    # 过滤条件与分页一起使用
+    items, pages = _all_pages(INTERFACE_LISTING, database, {'path_prefix': '/api', 'sort': 'path'}, 4)
+    assert len(items) == 12 and pages == 3
+    parsed, _ = FILE_LISTING.fetch(database, {'parsed': 'true'})
+    assert parsed and all(item['parsed'] for item in parsed)
+
+
+def test_fields_projection(records):
+    """只返回请求的字段（按定义的顺序），排序字段不在投影中时游标仍然可用"""
+    database, _ = records
+    page, cursor = INTERFACE_LISTING.fetch(database, {'fields': 'path,id', 'sort': 'name'}, 5)
+    assert [list(item) for item in page] == [['id', 'path']] * 5 and cursor
+    rest, _ = INTERFACE_LISTING.fetch(database, {'fields': 'path,id', 'sort': 'name', 'cursor': cursor}, 100)
+    assert len(page) + len(rest) == 13
+    with pytest.raises(ListQueryError):
+        INTERFACE_LISTING.fetch(database, {'fields': 'id,secret'})
+
+
+@pytest.mark.parametrize('args', [
+    {'cursor': 'not-base64!'},
+    {'cursor': encode_cursor('path', 'asc', '/api', 1)},
+    {'sort': 'path', 'order': 'desc', 'cursor': encode_cursor('path', 'asc', '/api', 1)},
+    {'sort': 'path', 'cursor': encode_cursor('path', 'asc', '/api', 'x')},
+    {'sort': 'description'},
+    {'order': 'up'},
+    {'limit': 0},
+    {'limit': 'ten'},
+    {'file_id': 'abc'},
+    {'is_websocket': 'maybe'},
+])
+def test_invalid_arguments(records, args):
+    """游标无效或与当前排序参数不一致、以及其他无效参数都抛出ListQueryError"""
+    database, _ = records
+    with pytest.raises(ListQueryError):
+        INTERFACE_LISTING.query(database, args)
+
+
+def test_query_result_shape(records):
+    """没有limit和cursor时返回全部记录的数组，否则返回一页；limit超出上限时按上限返回"""
+    database, _ = records
+    assert len(INTERFACE_LISTING.query(database, {})) == 13
+    page = INTERFACE_LISTING.query(database, {'limit': 50}, default_limit=2, max_limit=4)
+    assert page['limit'] == 4 and len(page['items']) == 4 and page['next_cursor']
+    following = INTERFACE_LISTING.query(database, {'cursor': page['next_cursor']}, default_limit=2, max_limit=4)
+    assert following['limit'] == 2 and following['items'][0]['id'] == page['items'][-1]['id'] + 1
+    last = INTERFACE_LISTING.query(database, {'limit': 13})
+    assert len(last['items']) == 13 and last['next_cursor'] is None
+
+
+def test_pages(records):
+    database, _ = records
+    pages = list(INTERFACE_LISTING.pages(database, {'sort': 'method'}, 5))
+    assert [len(items) for items, _ in pages] == [5, 5, 3] and pages[-1][1] is None
+
+
+def test_list_routes(client, create_interface):
+    """GET /interfaces 和 /files 的分页参数，参数无效时返回400"""
+    create_interface('/listing/route/a')
+    create_interface('/listing/route/b')
+    page = client.get('/interfaces?path_prefix=/listing/route/&limit=1&fields=path').get_json()
+    assert page['items'] == [{'path': '/listing/route/a'}] and page['limit'] == 1
+    page = client.get(f"/interfaces?path_prefix=/listing/route/&limit=1&fields=path&cursor={page['next_cursor']}"
+                      ).get_json()
+    assert page['items'] == [{'path': '/listing/route/b'}] and page['next_cursor'] is None
+    assert isinstance(client.get('/interfaces?path_prefix=/listing/route/').get_json(), list)
+
+    files = client.get('/files?sort=uploaded_at&order=desc&limit=1').get_json()
+    assert len(files['items']) == 1 and files['next_cursor']
+    response = client.get(f"/files?sort=filename&cursor={files['next_cursor']}")
+    assert response.status_code == 400 and 'cursor' in response.get_json()['error']
+    assert client.get('/interfaces?sort=unknown').status_code == 400
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+压力测试脚本的测试：客户端、混合请求和结果汇总（不启动子进程，应用在线程中运行，使用临时数据库）
+"""
+
+import http.client
+import os
+import sys
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+import load_test
+from load_test import Client, Recorder, concrete_path, percentile, summarize
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+@pytest.fixture
+def base_url(app_module):
+    """在线程中运行应用的HTTP服务，返回地址"""
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    thread.join()
+
+
+def test_percentile_and_summarize():
+    """分位数与基准测试套件共用同一个实现"""
+    import bench_suite
+
+    assert percentile is bench_suite.percentile
+    assert percentile(list(range(1, 101)), 0.99) == 99 and percentile(list(range(1, 101)), 0.5) == 50
+    assert percentile([5], 0.99) == 5
+    summary = summarize({'mock_GET': [0.001] * 99 + [0.5]}, {'mock_GET': 2}, elapsed=2)
+    assert summary['mock_GET'] == {'requests': 100, 'rps': 50.0, 'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.0,
+                                   'max_ms': 500.0, 'error_rate': 0.02}
+
+
+def test_concrete_path():
+    assert concrete_path('/users/{id}/orders/{order_id}') == '/users/1/orders/1'
+
+
+def test_recorder_timeline():
+    recorder = Recorder(time.time())
+    recorder.record('mock_GET', 0.01, True)
+    recorder.record('mock_GET', 0.02, False)
+    assert recorder.latencies == {'mock_GET': [0.01, 0.02]} and recorder.errors == {'mock_GET': 1}
+    assert recorder.timeline == {0: [2, 1]}
+    assert load_test.timed(recorder, 'broken', lambda: 1 / 0) == 0 and recorder.errors['broken'] == 1
+
+
+def test_client_reconnects(base_url):
+    """连接断开后下次请求自动重连；服务不可用时状态码为0"""
+    client = Client(base_url)
+    assert client.request('GET', '/health')[0] == 200
+    # 模拟已被关闭的keep-alive连接
+    client.conn = http.client.HTTPConnection(client.host, client.port)
+    client.conn.connect()
+    client.conn.sock.close()
+    assert client.request('GET', '/health')[0] == 200
+    client.close()
+    assert Client(f'http://127.0.0.1:{load_test.free_port()}', timeout=1).request('GET', '/health') == (0, b'')
+
+
+def test_traffic_against_app(base_url, create_interface):
+    """上传文件生成接口，混合请求没有错误"""
+    create_interface('/load/users/{id}', fields=FIELDS)
+    client = Client(base_url, timeout=60)
+    status, file_id = load_test.upload(client, os.path.join(load_test.TEST_FILES_DIR, 'test_openapi3.json'))
+    assert status == 200 and file_id
+    interfaces = client.get_json('/interfaces')
+    client.close()
+    interfaces = [item for item in interfaces if item['path'] == '/load/users/{id}' or item['file_id'] == file_id]
+    assert len(interfaces) > 1
+
+    recorder = Recorder(time.time())
+    load_test.traffic_loop(base_url, interfaces, load_test.TRAFFIC_MIX, recorder, time.time() + 0.5, 3, seed=1)
+    assert recorder.latencies and not recorder.errors
+    assert any(op.startswith('mock_') for op in recorder.latencies)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+运行指标的测试（不需要启动服务）
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import metrics
+from metrics import Counter, Gauge, Histogram, LabelLimiter
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+@pytest.fixture
+def registered():
+    """测试中创建的指标在结束后从注册表中移除，不影响 /metrics 的输出"""
+    count = len(metrics._registry)
+    yield
+    del metrics._registry[count:]
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric('test_abstract', 'x')
+
+
+def test_counter_merges_thread_shards(registered):
+    """各线程计入不同分片，读取和输出时合并"""
+    counter = Counter('test_counter_total', '测试计数', ('kind',))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(('a',))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(('b',), 2.5)
+    assert sum(1 for _, values in counter._shards if values) > 1
+    assert counter.value(('a',)) == 8000
+    assert counter.render() == ['# HELP test_counter_total 测试计数', '# TYPE test_counter_total counter',
+                                'test_counter_total{kind="a"} 8000', 'test_counter_total{kind="b"} 2.5']
+
+
+def test_gauge(registered):
+    gauge = Gauge('test_gauge', '测试仪表')
+    gauge.inc(amount=3)
+    gauge.dec()
+    assert gauge.render()[-1] == 'test_gauge 2'
+    assert Gauge('test_gauge_callback', '回调', callback=lambda: 7).render()[-1] == 'test_gauge_callback 7'
+
+
+def test_histogram_render(registered):
+    histogram = Histogram('test_seconds', '测试耗时', ('path',), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(('/a"b',), value)
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{path="/a\\"b",le="0.1"} 2',
+        'test_seconds_bucket{path="/a\\"b",le="1"} 3',
+        'test_seconds_bucket{path="/a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{path="/a\\"b"} 3.65',
+        'test_seconds_count{path="/a\\"b"} 4'
+    ]
+
+
+def test_disabled_metrics_are_not_recorded(registered, monkeypatch):
+    counter = Counter('test_disabled_total', '关闭时不计数')
+    monkeypatch.setattr(metrics, 'enabled', False)
+    counter.inc()
+    assert counter.value() == 0
+
+
+def test_label_limiter():
+    """最先出现的limit个值原样使用，其余归为other"""
+    limiter = LabelLimiter(2)
+    assert [limiter.label(value) for value in ('1', '2', '3', '1', '4', '2')] == ['1', '2', 'other', '1', 'other', '2']
+    assert LabelLimiter(0).label('1') == LabelLimiter.OTHER
+
+
+def test_mock_request_metrics(app_module, client, create_interface, monkeypatch):
+    """Mock请求按接口id记录耗时，只查找一次路由；超出上限的接口归为other"""
+    interface_id = create_interface('/metrics/users', fields=FIELDS)
+    key = ('http', str(interface_id))
+    before = metrics.MOCK_REQUEST_SECONDS._merged().get(key, [0])[-1]
+    lookups = []
+    lookup = app_module.route_table.lookup
+    monkeypatch.setattr(app_module.route_table, 'lookup', lambda *args: lookups.append(args) or lookup(*args))
+    client.get('/dynamic/metrics/users')
+    assert len(lookups) == 1
+
+    monkeypatch.setattr(metrics, 'MOCK_INTERFACE_LABELS', LabelLimiter(0))
+    client.get('/dynamic/metrics/users')
+    client.get('/dynamic/metrics/missing')
+    merged = metrics.MOCK_REQUEST_SECONDS._merged()
+    assert merged[key][-1] == before + 1
+    assert merged[('http', 'other')][-1] >= 1 and merged[('http', 'unmatched')][-1] >= 1
+
+    response = client.get('/metrics')
+    assert response.content_type == metrics.CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert f'mock_request_duration_seconds_count{{transport="http",interface_id="{interface_id}"}} {before + 1}' in text
+    assert '# TYPE http_request_duration_seconds histogram' in text
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量Mock请求的测试（不需要启动服务，使用临时数据库）
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import mock_batch
+from mock_batch import BatchExecutor, generate_rows_json
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+def test_executor_is_opt_in():
+    """默认不使用进程池，None表示CPU核数"""
+    import config
+
+    assert config.MOCK_BATCH_WORKERS == 1 and not BatchExecutor().enabled
+    assert BatchExecutor(None).workers == (os.cpu_count() or 1)
+    assert BatchExecutor(2).enabled
+
+
+def test_executor_does_not_fork():
+    assert mock_batch._mp_context().get_start_method() in ('forkserver', 'spawn')
+
+
+def test_executor_matches_in_process_generation():
+    """子进程生成的JSON与当前进程生成的相同（指定seed时）"""
+    executor = BatchExecutor(2)
+    try:
+        future = executor.submit(FIELDS, 50, '/batch/a', seed=4)
+        assert future.result(timeout=60) == generate_rows_json(FIELDS, 50, '/batch/a', seed=4)
+        assert executor._executor._mp_context.get_start_method() != 'fork'
+    finally:
+        executor.shutdown()
+    rows = json.loads(generate_rows_json(FIELDS, 3, '/batch/a', seed=4))
+    assert len(rows) == 3 and list(rows[0]) == ['id', 'name']
+
+
+def test_mock_batch(client, create_interface):
+    """每项返回序号、状态码和与单个请求相同的响应内容"""
+    create_interface('/batch/users', method='POST', fields=FIELDS)
+    create_interface('/batch/seeded', fields=FIELDS, seed=3)
+    response = client.post('/mock-batch', json={'requests': [
+        {'method': 'POST', 'path': '/batch/users', 'mock_count': 4},
+        {'path': 'batch/seeded', 'mock_count': 2},
+        {'path': '/batch/missing'},
+        'invalid'
+    ]})
+    assert response.status_code == 200
+    items = response.get_json()['data']
+    assert [item['index'] for item in items] == [0, 1, 2, 3]
+    assert [item['status'] for item in items] == [200, 200, 404, 400]
+    assert len(items[0]['response']['data']) == 4
+    single = client.get('/dynamic/batch/seeded', query_string={'mock_count': 2}).get_json()
+    assert items[1]['response'] == single
+    assert items[2]['response']['code'] == 404
+
+
+@pytest.mark.parametrize('body', [None, {'requests': 'x'}, {'requests': [{}] * 10000}])
+def test_mock_batch_rejects_invalid_body(client, body):
+    response = client.post('/mock-batch', json=body)
+    assert response.status_code == 400 and response.get_json()['code'] == 400
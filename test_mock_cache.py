@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+确定性Mock响应、响应缓存和ETag的测试（不需要启动服务，使用临时数据库）
+"""
+
+import json
+from datetime import datetime
+
+import mock_generator
+from mock_cache import ResponseCache, make_etag
+from mock_generator import MockPlan
+
+FIELDS = [('id', 'int'), ('name', 'string'), ('created', 'date'), ('day', 'java.time.LocalDate')]
+
+
+class _FutureDatetime(datetime):
+    """把当前时间固定在多年以后"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2031, 7, 1, 8, 0, 0)
+
+
+def test_seeded_rows_do_not_depend_on_today(monkeypatch):
+    """相同seed在任何一天生成的数据都相同（包括日期字段和默认结构的时间戳）"""
+    plan = MockPlan(FIELDS)
+    rows = plan.generate_rows(20, '/a', seed=9)
+    default_rows = MockPlan([]).generate_rows(3, '/a', seed=9)
+    bulk_rows = list(plan.generate_columns(20, '/a', bulk=mock_generator.np is not None, seed=9))
+    monkeypatch.setattr(mock_generator, 'datetime', _FutureDatetime)
+    assert plan.generate_rows(20, '/a', seed=9) == rows
+    assert MockPlan([]).generate_rows(3, '/a', seed=9) == default_rows
+    assert list(plan.generate_columns(20, '/a', bulk=mock_generator.np is not None, seed=9)) == bulk_rows
+
+    # 日期在固定的范围内随机选取
+    dates = {row['created'] for row in rows}
+    assert len(dates) > 1
+    last = mock_generator.DATE_EPOCH.toordinal() + mock_generator.DATE_DAYS
+    for value in dates | {row['created'] for row in bulk_rows}:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+        assert mock_generator.DATE_EPOCH <= day and day.toordinal() < last
+
+
+def test_unseeded_dates_are_today(monkeypatch):
+    """未指定seed时日期字段仍为当天日期"""
+    monkeypatch.setattr(mock_generator, 'datetime', _FutureDatetime)
+    plan = MockPlan(FIELDS)
+    rows = plan.generate_rows(5, '/a') + list(plan.generate_columns(5, '/a', bulk=mock_generator.np is not None))
+    assert {row['created'] for row in rows} == {row['day'] for row in rows} == {'2031-07-01'}
+    assert mock_generator.generate_mock_value('date') == '2031-07-01'
+
+
+def test_seeded_response_cached_with_etag(app_module, client, create_interface):
+    """指定seed的响应走缓存并带ETag，If-None-Match匹配时返回304，修改Mock配置后缓存失效"""
+    interface_id = create_interface('/cache/users', fields=FIELDS, seed=11)
+    cache = app_module.response_cache
+    first = client.get('/dynamic/cache/users', query_string={'mock_count': 5})
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.strip('"') == make_etag(first.get_data())
+
+    hits = cache.hits
+    second = client.get('/dynamic/cache/users', query_string={'mock_count': 5})
+    assert second.get_data() == first.get_data() and cache.hits == hits + 1
+
+    not_modified = client.get('/dynamic/cache/users', query_string={'mock_count': 5},
+                              headers={'If-None-Match': f'"other", {etag}'})
+    assert not_modified.status_code == 304 and not not_modified.get_data()
+
+    # 请求中的seed优先于配置中的seed
+    other = client.get('/dynamic/cache/users', query_string={'mock_count': 5, 'seed': 12})
+    assert other.headers['ETag'] != etag
+
+    # Mock配置变化时版本号递增，使用新的缓存项（数据相同，ETag也相同）
+    misses = cache.misses
+    app_module.route_table.update_mock_config(interface_id, True, 5, seed=11)
+    third = client.get('/dynamic/cache/users', query_string={'mock_count': 5})
+    assert cache.misses == misses + 1 and third.headers['ETag'] == etag
+
+    # 未指定seed时不缓存
+    unseeded = create_interface('/cache/random', fields=FIELDS)
+    assert unseeded and 'ETag' not in client.get('/dynamic/cache/random').headers
+
+
+def test_socket_payload_uses_http_handling(app_module, client, create_interface):
+    """Socket.IO请求与HTTP请求的处理方式相同：指定seed时走响应缓存，无效的mock_count按默认条数生成"""
+    create_interface('/cache/socket', fields=FIELDS, seed=21, default_count=3)
+    body = client.get('/dynamic/cache/socket', query_string={'mock_count': 4}).get_data()
+    hits = app_module.response_cache.hits
+    payload, fault, entry = app_module.build_socket_mock_payload({'path': '/cache/socket', 'mock_count': 4})
+    assert app_module.response_cache.hits == hits + 1 and payload == json.loads(body)
+    assert fault is None and entry.path == '/cache/socket'
+    payload, _, _ = app_module.build_socket_mock_payload({'path': '/cache/socket', 'mock_count': 'abc'})
+    assert payload['code'] == 0 and len(payload['data']) == 3
+    assert app_module.build_socket_mock_payload({'path': '/cache/missing'})[0]['code'] == 404
+
+    if app_module.socketio is not None:
+        socket_client = app_module.socketio.test_client(app_module.app)
+        socket_client.emit('dynamic_interface', {'path': '/cache/socket', 'mock_count': 'abc'})
+        responses = [item for item in socket_client.get_received() if item['name'] == 'dynamic_response']
+        socket_client.disconnect()
+        assert responses[-1]['args'][0]['code'] == 0 and len(responses[-1]['args'][0]['data']) == 3
+
+
+def test_response_cache_lru():
+    """按总字节数淘汰最久未使用的响应，超过单项上限的响应不缓存"""
+    cache = ResponseCache(800)
+    for key in 'abcd':
+        cache.put(key, key.encode() * 100)
+    assert cache.get('a') is not None
+    # 容量为8项，再放入5项后淘汰最久未使用的b（a刚被访问过）
+    for key in 'efghi':
+        cache.put(key, key.encode() * 100)
+    assert cache.get('b') is None and cache.get('a') is not None
+    assert cache.stats()['bytes'] <= 800 and cache.evictions >= 1
+
+    body, etag = cache.put('big', b'x' * 101)
+    assert cache.get('big') is None and cache.rejected == 1 and etag == make_etag(body)
+
+
+def test_paginated_mock(client, create_interface):
+    """配置虚拟总条数时按页返回，只生成当前页；翻页数据稳定，与页大小无关"""
+    import config
+
+    create_interface('/cache/pages', fields=FIELDS, total_count=95)
+
+    def page(**query):
+        return client.get('/dynamic/cache/pages', query_string=query).get_json()
+
+    first = page(page=1, page_size=20)
+    assert (first['total'], first['page'], first['page_size'], first['total_pages']) == (95, 1, 20, 5)
+    assert len(first['data']) == 20
+    assert page(page=2, page_size=10)['data'] == first['data'][10:]
+    last = page(page=10, page_size=10)
+    assert len(last['data']) == 5 and last['total_pages'] == 10
+    assert page(page=11, page_size=10)['data'] == []
+    # 默认每页条数为接口的默认行数，每页条数受上限限制
+    assert page()['page_size'] == 10
+    assert page(page_size=config.MOCK_MAX_PAGE_SIZE + 1)['page_size'] == config.MOCK_MAX_PAGE_SIZE
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mock数据生成计划的测试（不需要启动服务）
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import mock_generator
+from mock_generator import MockPlan, generate_mock_value
+from route_table import RouteEntry
+
+FIELDS = [('name', 'java.lang.String'), ('age', 'int'), ('active', 'boolean'), ('score', 'double'),
+          ('birthday', 'date'), ('tags', 'list'), ('extra', 'map'), ('other', 'unknown')]
+
+
+def _check_types(row):
+    assert list(row) == [name for name, _ in FIELDS]
+    assert isinstance(row['name'], str) and len(row['name']) == mock_generator.STRING_LENGTH
+    assert row['name'].isascii() and row['name'].isalpha()
+    assert isinstance(row['age'], int) and 0 <= row['age'] <= 1000
+    assert isinstance(row['active'], bool)
+    assert isinstance(row['score'], float) and 0 <= row['score'] <= 1000
+    assert isinstance(row['birthday'], str) and len(row['birthday']) == 10
+    assert isinstance(row['tags'], list) and 1 <= len(row['tags']) <= 5
+    assert isinstance(row['extra'], dict) and 1 <= len(row['extra']) <= 3
+    assert row['other'] == 'mock_value'
+
+
+def test_plan_generates_typed_rows():
+    """每个字段按类型生成值，字段顺序与定义一致"""
+    rows = MockPlan(FIELDS).generate_rows(50, '/api/test')
+    assert len(rows) == 50
+    for row in rows:
+        _check_types(row)
+    assert len({row['name'] for row in rows}) > 1
+
+
+def test_generate_mock_value():
+    assert isinstance(generate_mock_value('java.lang.Integer'), int)
+    assert isinstance(generate_mock_value('string'), str)
+    assert generate_mock_value('no-such-type') == 'mock_value'
+
+
+def test_default_row_without_fields():
+    """没有响应字段时生成默认结构"""
+    rows = MockPlan([]).generate_rows(3, '/api/empty')
+    assert [row['message'] for row in rows] == ['Success response from /api/empty'] * 3
+    assert len({row['id'] for row in rows}) == 3
+
+
+def test_seed_is_deterministic():
+    """相同seed生成相同的数据，不同seed生成不同的数据"""
+    plan = MockPlan(FIELDS)
+    assert plan.generate_rows(20, '/a', seed=42) == MockPlan(FIELDS).generate_rows(20, '/a', seed=42)
+    assert plan.generate_rows(20, '/a', seed=42) != plan.generate_rows(20, '/a', seed=43)
+    assert MockPlan([]).generate_rows(2, '/a', seed=1) == MockPlan([]).generate_rows(2, '/a', seed=1)
+
+
+def test_random_uints_are_little_endian():
+    """整数按小端字节序从随机字节解码，与所在平台的字节序无关"""
+    data = random.Random(4).randbytes(12)
+    expected = tuple(int.from_bytes(data[i:i + 4], 'little') for i in range(0, 12, 4))
+    assert mock_generator._random_uints(random.Random(4), 3) == expected
+    assert mock_generator._mock_int(random.Random(4), 3) == [value % 1001 for value in expected]
+
+
+def test_plan_cached_on_route_entry():
+    """生成计划在接口首次使用时编译，之后复用；响应字段变化时路由表重建接口，计划随之重建"""
+    entry = RouteEntry(1, 'test', '/api/test', 'GET', 1)
+    entry.response_fields = list(FIELDS)
+    plan = entry.plan
+    assert entry.plan is plan
+    assert plan.names == [name for name, _ in FIELDS]
+    rebuilt = RouteEntry(1, 'test', '/api/test', 'GET', 1)
+    rebuilt.response_fields = FIELDS[:2]
+    assert rebuilt.plan is not plan and rebuilt.plan.names == ['name', 'age']
+
+
+def test_estimate_row_bytes():
+    """按样本行估算单行JSON大小，结果缓存在计划中"""
+    plan = MockPlan(FIELDS)
+    size = plan.estimate_row_bytes('/a')
+    assert 50 < size < 1000 and plan.estimate_row_bytes('/a') == size
+
+
+def test_letters_are_uniform():
+    """随机字母均匀分布：52个字母中出现次数最多与最少的差距很小（取模映射时前48个字母多约25%）"""
+    import random
+    from collections import Counter
+
+    letters = mock_generator._random_letters(random.Random(1), 52 * 4000)
+    counts = Counter(letters)
+    assert len(letters) == 52 * 4000 and set(counts) == set(mock_generator.string.ascii_letters)
+    assert max(counts.values()) / min(counts.values()) < 1.15
+    # 后4个字母不再偏少
+    tail = sum(counts[c] for c in 'WXYZ') / 4
+    head = sum(counts[c] for c in 'abcd') / 4
+    assert 0.9 < tail / head < 1.1
+
+
+def test_bulk_columns_match_python_types():
+    """NumPy批量生成与纯Python生成的类型、取值范围一致；行数达到阈值时自动使用批量生成"""
+    if mock_generator.np is None:
+        pytest.skip('未安装numpy')
+    fields = FIELDS[:5] + [('tags', 'list')]
+    plan = MockPlan(fields)
+    rows = list(plan.generate_columns(200, '/a', bulk=True))
+    for row in rows:
+        assert type(row['name']) is str and row['name'].isalpha() and len(row['name']) == 10
+        assert type(row['age']) is int and 0 <= row['age'] <= 1000
+        assert type(row['active']) is bool
+        assert type(row['score']) is float and 0 <= row['score'] <= 1000
+        assert type(row['birthday']) is str
+        assert isinstance(row['tags'], list)
+    assert list(plan.generate_columns(50, '/a', bulk=True, seed=3)) == \
+        list(plan.generate_columns(50, '/a', bulk=True, seed=3))
+
+    # 自动选择：达到阈值的列为NumPy数组
+    columns = plan.generate_columns(mock_generator.BULK_THRESHOLD, '/a')
+    assert isinstance(columns.columns[1], mock_generator.np.ndarray)
+    columns = plan.generate_columns(mock_generator.BULK_THRESHOLD - 1, '/a')
+    assert isinstance(columns.columns[1], list)
+
+
+def test_nested_fields():
+    """扁平字段名重建为嵌套对象、对象数组和类型化数组"""
+    fields = [('code', 'int'), ('data.total', 'int'), ('data.items[id', 'int'), ('data.items[tags', 'array[string]'),
+              ('data.owner.name', 'string'), ('scores', 'array[double]')]
+    assert mock_generator.is_nested(fields) and not mock_generator.is_nested(FIELDS)
+    plan = MockPlan(fields)
+    rows = plan.generate_rows(30, '/a', seed=1)
+    for row in rows:
+        assert list(row) == ['code', 'data', 'scores']
+        data = row['data']
+        assert isinstance(data['total'], int) and isinstance(data['owner']['name'], str)
+        items = data['items']
+        assert mock_generator.ARRAY_MIN_LENGTH <= len(items) <= mock_generator.ARRAY_MAX_LENGTH
+        for item in items:
+            assert isinstance(item['id'], int)
+            assert all(isinstance(tag, str) for tag in item['tags'])
+        assert all(isinstance(score, float) for score in row['scores'])
+    assert plan.generate_rows(30, '/a', seed=1) == rows
+
+
+def test_nested_field_conflicts():
+    """同一字段既是叶子又被展开为对象时，无论定义顺序都按对象生成"""
+    for fields in ([('user', 'string'), ('user.id', 'int')], [('user.id', 'int'), ('user', 'string')]):
+        row = MockPlan(fields).generate_rows(1, '/a')[0]
+        assert isinstance(row['user'], dict) and isinstance(row['user']['id'], int)
+
+
+
+def test_generate_page_is_stable():
+    """分页数据的第i行只由 (seed, i) 决定，与页大小无关"""
+    plan = MockPlan(FIELDS)
+    assert plan.generate_page(10, 10, '/a', 5) == plan.generate_page(0, 20, '/a', 5)[10:]
+    assert plan.generate_page(0, 5, '/a', 5) != plan.generate_page(0, 5, '/a', 6)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热点接口Mock预生成池的测试（不需要启动服务）
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from mock_pool import MockPoolManager
+from route_table import RouteEntry, RouteTable
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+@pytest.fixture
+def route_table():
+    """不访问数据库的路由表，包含3个启用了Mock的接口"""
+    table = RouteTable(':memory:')
+    for interface_id in (1, 2, 3):
+        entry = RouteEntry(interface_id, f'接口{interface_id}', f'/pool/{interface_id}', 'GET', 1)
+        entry.response_fields = list(FIELDS)
+        entry.set_mock_config(True, 10)
+        table._add(entry)
+    return table
+
+
+@pytest.fixture
+def manager(route_table):
+    # hot_rps为0时有请求的接口都建池；刷新由测试调用refill_once，后台线程不会运行到
+    manager = MockPoolManager(route_table, interval=3600, hot_rps=0, min_rows=50, max_rows=100, max_pools=2)
+    yield manager
+    manager.stop()
+
+
+def test_pool_serves_hot_interface(manager, route_table):
+    entry = route_table.get(1)
+    assert manager.take(entry, 10) is None
+    manager.refill_once()
+    rows = manager.take(entry, 10)
+    assert len(rows) == 10 and list(rows[0]) == ['id', 'name']
+    # 请求的行数超过池的大小时由调用方生成
+    assert manager.take(entry, 1000) is None
+    stats = manager.stats()
+    assert (stats['served'], stats['missed'], stats['pools']) == (1, 2, 1)
+    assert stats['interfaces'][1]['pool_rows'] == 50
+
+    # Mock配置变化（版本号变化）后池作废
+    route_table.update_mock_config(1, True, 10)
+    assert manager.take(entry, 10) is None
+
+
+def test_pool_count_is_capped(manager, route_table):
+    """超过max_pools时回收最久未被取用的池"""
+    entries = [route_table.get(i) for i in (1, 2, 3)]
+    for entry in entries[:2]:
+        manager.take(entry, 5)
+    manager.refill_once()
+    assert manager.stats()['pools'] == 2
+    # 接口1最近被取用过，接口3建池时回收接口2的池
+    assert manager.take(entries[0], 5) is not None
+    manager.take(entries[2], 5)
+    manager.refill_once()
+    stats = manager.stats()
+    assert stats['pools'] == 2 and stats['evictions'] >= 1
+    assert manager.take(entries[2], 5) is not None
+    assert stats['interfaces'][1]['pool_rows'] and not stats['interfaces'][2]['pool_rows']
+
+
+def test_counters_are_thread_safe(manager, route_table):
+    """多个请求线程同时取数据时计数不丢失"""
+    entry = route_table.get(1)
+    manager.take(entry, 5)
+    manager.refill_once()
+    threads, per_thread = 8, 2000
+
+    def worker():
+        for i in range(per_thread):
+            manager.take(entry, 5 if i % 2 else 500)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stats = manager.stats()
+    # 加上建池前未命中的1次
+    assert stats['missed'] == threads * per_thread // 2 + 1
+    assert stats['served'] == threads * per_thread // 2
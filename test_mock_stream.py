@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式Mock响应的测试（不需要启动服务，使用临时数据库）
+"""
+
+import json
+
+import pytest
+
+import config
+import mock_generator
+
+FIELDS = [('id', 'int'), ('name', 'string'), ('price', 'double'), ('on_sale', 'boolean')]
+
+
+def _streamed(response):
+    # 流式响应不带Content-Length（测试客户端中的响应都是可迭代对象，不能用is_streamed判断）
+    return 'Content-Length' not in response.headers
+
+
+def _rows(response):
+    body = json.loads(response.get_data())
+    assert body['code'] == 0
+    return body['data']
+
+
+def test_large_response_is_streamed(client, create_interface):
+    """行数达到 MOCK_STREAM_THRESHOLD 时流式输出，输出完整的JSON，行结构与非流式响应相同"""
+    create_interface('/stream/items', fields=FIELDS)
+    count = config.MOCK_STREAM_THRESHOLD + 5
+    response = client.get('/dynamic/stream/items', query_string={'mock_count': count})
+    assert _streamed(response)
+    rows = _rows(response)
+    assert len(rows) == count
+
+    small = client.get('/dynamic/stream/items', query_string={'mock_count': 3})
+    assert not _streamed(small)
+    expected = _rows(small)[0]
+    for row in rows[::100]:
+        assert list(row) == list(expected)
+        assert all(type(row[key]) is type(expected[key]) for key in row)
+
+    # stream=true 时小数据量也流式输出
+    forced = client.get('/dynamic/stream/items', query_string={'mock_count': 3, 'stream': 'true'})
+    assert _streamed(forced) and len(_rows(forced)) == 3
+
+
+def test_seeded_stream_is_deterministic(client, create_interface):
+    create_interface('/stream/seeded', fields=FIELDS)
+    query = {'mock_count': config.MOCK_STREAM_THRESHOLD * 2, 'seed': 5}
+    assert _rows(client.get('/dynamic/stream/seeded', query_string=query)) == \
+        _rows(client.get('/dynamic/stream/seeded', query_string=query))
+
+
+def test_large_stream_uses_bulk_generation(client, create_interface, monkeypatch):
+    """20000行的流式响应按总行数使用NumPy批量生成（每批的行数低于批量阈值）"""
+    if mock_generator.np is None:
+        pytest.skip('未安装numpy')
+    assert config.MOCK_STREAM_CHUNK_ROWS < mock_generator.BULK_THRESHOLD <= 20000
+    create_interface('/stream/bulk', fields=FIELDS)
+    calls = []
+    generate_columns = mock_generator.MockPlan.generate_columns
+
+    def spy(self, count, full_path, bulk=None, seed=None, source=None):
+        calls.append((count, bulk))
+        return generate_columns(self, count, full_path, bulk, seed, source)
+
+    monkeypatch.setattr(mock_generator.MockPlan, 'generate_columns', spy)
+    rows = _rows(client.get('/dynamic/stream/bulk', query_string={'mock_count': 20000}))
+    assert len(rows) == 20000 and type(rows[0]['id']) is int
+    streamed = [bulk for count, bulk in calls if count == config.MOCK_STREAM_CHUNK_ROWS]
+    assert streamed and all(streamed)
+
+    # 总行数低于阈值时不使用批量生成
+    calls.clear()
+    _rows(client.get('/dynamic/stream/bulk', query_string={'mock_count': config.MOCK_STREAM_THRESHOLD}))
+    assert calls and not any(bulk for count, bulk in calls if count > mock_generator.SAMPLE_ROWS)
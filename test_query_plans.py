@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据库迁移和查询计划检查（不需要启动服务）
+常用查询出现全表扫描（缺少索引）时测试失败
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import db_migrations
+
+
+def test_query_plans():
+    """新建数据库迁移到最新版本后，常用查询都应当使用索引"""
+    conn = sqlite3.connect(':memory:')
+    old_version, new_version = db_migrations.migrate(conn)
+    print(f"数据库结构版本: {old_version} -> {new_version}")
+    assert new_version == db_migrations.SCHEMA_VERSION
+
+    scanned = db_migrations.scanned_queries(conn)
+    for sql, plan in scanned:
+        print(f"全表扫描: {sql}\n    {plan}")
+    assert not scanned, f"{len(scanned)} 条常用查询未使用索引"
+    print(f"{len(db_migrations.HOT_QUERIES)} 条常用查询均使用索引")
+    conn.close()
+
+
+def test_upgrade_existing_db():
+    """旧版本（user_version=0、缺少字段、有重复Mock配置）的数据库原地升级"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'api_generator.db')
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE interface_files (id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL,
+                file_path TEXT NOT NULL, file_type TEXT NOT NULL, size INTEGER NOT NULL,
+                uploaded_at TEXT NOT NULL, parsed INTEGER DEFAULT 0);
+            CREATE TABLE interfaces (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, path TEXT NOT NULL,
+                method TEXT NOT NULL, description TEXT, file_id INTEGER NOT NULL);
+            CREATE TABLE mock_configs (id INTEGER PRIMARY KEY AUTOINCREMENT, interface_id INTEGER NOT NULL,
+                enabled INTEGER DEFAULT 1, default_count INTEGER DEFAULT 10);
+            INSERT INTO interface_files VALUES (1, 'a.json', '/tmp/a.json', 'json', 1, '2024-01-01', 1);
+            INSERT INTO interfaces VALUES (1, 'list', '/api/items', 'GET', '', 1);
+            INSERT INTO mock_configs (interface_id, enabled, default_count) VALUES (1, 1, 5);
+            INSERT INTO mock_configs (interface_id, enabled, default_count) VALUES (1, 0, 99);
+        ''')
+        conn.commit()
+        assert db_migrations.migrate(conn) == (0, db_migrations.SCHEMA_VERSION)
+
+        # 重复的Mock配置只保留第一条，之后不能再插入重复配置
+        rows = conn.execute('SELECT enabled, default_count FROM mock_configs WHERE interface_id = 1').fetchall()
+        assert rows == [(1, 5)], rows
+        try:
+            conn.execute('INSERT INTO mock_configs (interface_id) VALUES (1)')
+        except sqlite3.IntegrityError:
+            pass
+        else:
+            raise AssertionError('mock_configs.interface_id 没有唯一约束')
+
+        # 缺少的字段已补齐，原有数据保留
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(mock_configs)')}
+        assert {'seed', 'total_count', 'fault_config'} <= columns
+        assert conn.execute('SELECT path FROM interfaces WHERE id = 1').fetchone() == ('/api/items',)
+        assert not db_migrations.scanned_queries(conn)
+        conn.close()
+
+        # 再次迁移不做任何修改
+        conn = sqlite3.connect(path)
+        version = db_migrations.SCHEMA_VERSION
+        assert db_migrations.migrate(conn) == (version, version)
+        conn.close()
+    print("旧版本数据库升级通过!")
+
+
+def test_hot_queries_match_executed(database, monkeypatch):
+    """路由表重新加载、列表翻页和后台清理实际执行的语句都在 HOT_QUERIES 中（不是手写的副本）"""
+    import db_pool
+    import metrics
+    from conftest import insert_file, insert_interface
+    from file_purge import FilePurger
+    from listing import INTERFACE_LISTING
+    from route_table import RouteTable
+
+    executed = []
+    execute = metrics.MeteredCursor.execute
+
+    def record(self, sql, parameters=()):
+        executed.append(' '.join(sql.split()))
+        return execute(self, sql, parameters)
+
+    with closing(db_pool.connect(database)) as conn, conn:
+        file_id = insert_file(conn)
+        first = insert_interface(conn, file_id, '/hot/a', fields=[('id', 'int')])
+        insert_interface(conn, file_id, '/hot/b')
+    monkeypatch.setattr(metrics.MeteredCursor, 'execute', record)
+
+    # 只检查各阶段中应当使用索引的语句（列表第一页没有游标条件，按索引顺序读取，不在其中）
+    checked = []
+    table = RouteTable(database)
+    table.reload_file(file_id)
+    table.reload_interface(first)
+    checked += executed
+    for sort in ('id', 'path'):
+        _, cursor = INTERFACE_LISTING.fetch(database, {'sort': sort}, limit=1)
+        executed.clear()
+        INTERFACE_LISTING.fetch(database, {'sort': sort, 'cursor': cursor}, limit=1)
+        checked += executed
+    with closing(db_pool.connect(database)) as conn, conn:
+        conn.execute("UPDATE interface_files SET deleted_at = '2024-01-01' WHERE id = ?", (file_id,))
+    executed.clear()
+    purger = FilePurger(database, pause=0)
+    assert purger.pending() == 1 and purger.run_once() == 1
+    checked += executed
+
+    hot = {' '.join(sql.split()) for sql in db_migrations.HOT_QUERIES}
+    assert len(checked) >= 15
+    assert [sql for sql in checked if sql not in hot] == []
+
+if __name__ == '__main__':
+    test_query_plans()
+    test_upgrade_existing_db()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求时间和资源预算的测试（不需要启动服务）
+"""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import request_budget
+from request_budget import (RESOURCE_BYTES, RESOURCE_ROWS, RESOURCE_TIME, BudgetExceeded, RequestBudget,
+                            budget_scope, charge_rows, check_budget, current_budget, format_size)
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_limits():
+    budget = RequestBudget(max_rows=10, max_bytes=100)
+    budget.add_rows(10)
+    with pytest.raises(BudgetExceeded) as info:
+        budget.add_rows(1)
+    assert info.value.resource == RESOURCE_ROWS and info.value.status == 413
+    budget.add_bytes(100)
+    with pytest.raises(BudgetExceeded) as info:
+        budget.add_bytes(1)
+    assert info.value.resource == RESOURCE_BYTES
+    assert info.value.payload() == {'code': 413, 'message': '响应数据量超过上限 100B', 'data': None}
+    # 不限制的预算
+    unlimited = RequestBudget()
+    unlimited.add_rows(10 ** 9)
+    assert unlimited.remaining() is None
+
+
+def test_deadline(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(request_budget, 'time', clock)
+    budget = RequestBudget(timeout=2)
+    clock.now += 1.5
+    budget.check()
+    assert budget.remaining() == pytest.approx(0.5)
+    clock.now += 1
+    assert budget.remaining() == 0
+    with pytest.raises(BudgetExceeded) as info:
+        budget.add_rows(1)
+    assert info.value.resource == RESOURCE_TIME and info.value.status == 503
+
+
+def test_scope_is_per_thread():
+    """当前预算保存在contextvars中，其他线程看不到；with块结束后恢复"""
+    assert current_budget() is None
+    check_budget()
+    charge_rows(10)
+    seen = []
+    with budget_scope(RequestBudget(max_rows=5)) as budget:
+        assert current_budget() is budget
+        thread = threading.Thread(target=lambda: seen.append(current_budget()))
+        thread.start()
+        thread.join()
+        with pytest.raises(BudgetExceeded):
+            charge_rows(6)
+    assert seen == [None] and current_budget() is None
+
+
+def test_format_size():
+    assert [format_size(size) for size in (512, 2048, 3 * 1024 ** 2, 5 * 1024 ** 3)] == \
+        ['512B', '2.0KB', '3.0MB', '5.0GB']
+
+
+def test_oversize_mock_request(client, create_interface, monkeypatch):
+    """请求的行数超过上限时返回413，truncate策略下截断为上限内的行数"""
+    import config
+
+    create_interface('/budget/rows', fields=FIELDS)
+    monkeypatch.setattr(config, 'MOCK_MAX_ROWS', 50)
+    response = client.get('/dynamic/budget/rows', query_string={'mock_count': 51})
+    assert response.status_code == 413 and response.get_json()['code'] == 413
+
+    monkeypatch.setattr(config, 'MOCK_OVERSIZE_POLICY', 'truncate')
+    response = client.get('/dynamic/budget/rows', query_string={'mock_count': 51})
+    assert response.status_code == 200 and len(response.get_json()['data']) == 50
+
+
+def test_stream_truncated_by_budget(app_module, monkeypatch):
+    """流式输出超出预算时结束数组，响应仍是完整的JSON"""
+    import config
+    from mock_generator import MockPlan
+
+    monkeypatch.setattr(config, 'MOCK_STREAM_CHUNK_ROWS', 10)
+    budget = RequestBudget(max_bytes=2000)
+    body = ''.join(app_module.iter_mock_stream(MockPlan(FIELDS), 5000, '/budget/stream', budget=budget))
+    payload = json.loads(body)
+    assert payload['truncated'] is True and '响应数据量超过上限' in payload['error']
+    assert 0 < len(payload['data']) < 5000
+
+
+def test_budget_error_response(app_module, client, create_interface, monkeypatch):
+    """请求处理中超出预算时返回明确的错误"""
+    create_interface('/budget/error', fields=FIELDS)
+
+    def exceeded(*args, **kwargs):
+        raise BudgetExceeded('请求处理超时（超过 30 秒）', RESOURCE_TIME)
+
+    monkeypatch.setattr(app_module, 'generate_mock_rows', exceeded)
+    response = client.get('/dynamic/budget/error')
+    assert response.status_code == 503
+    assert response.get_json() == {'code': 503, 'message': '请求处理超时（超过 30 秒）', 'data': None}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mock请求日志异步批量写入的测试（不需要启动服务，使用临时数据库）
+"""
+
+import json
+import os
+import sys
+from contextlib import closing
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import db_pool
+from request_log import PREVIEW_ROWS, UNKNOWN_INTERFACE_ID, RequestLogWriter
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+def _logs(database):
+    with closing(db_pool.connect(database)) as conn:
+        cursor = conn.execute('''
+            SELECT interface_id, method, path, params, headers, response_status, response_body, execution_time
+            FROM request_logs ORDER BY id
+        ''')
+        return cursor.fetchall()
+
+
+@pytest.fixture
+def writer(database):
+    # 刷新由测试调用flush，写入间隔足够长，后台线程不会先写入
+    writer = RequestLogWriter(database, resolve_interface=lambda method, path: 7 if path == '/known' else None,
+                              flush_interval=3600, batch_rows=3, max_header_bytes=40, max_body_bytes=30)
+    yield writer
+    writer.close()
+
+
+def test_batched_write(writer, database):
+    """每批最多batch_rows行，一批一个事务；请求中只入队，队列达到batch_rows时唤醒后台线程写入"""
+    for index in range(2):
+        assert writer.record('GET', '/known', {'i': index}, None, 200, None, 1.23456)
+    assert _logs(database) == []
+    for index in range(2, 7):
+        assert writer.record('GET', '/known', {'i': index}, None, 200, None, 1.23456)
+    writer.flush()
+    rows = _logs(database)
+    assert len(rows) == 7 and writer.stats()['written'] == 7 and writer.stats()['flushes'] >= 3
+    assert rows[0] == (7, 'GET', '/known', '{"i": 0}', None, 200, None, 1.235)
+
+    writer.record('POST', '/other', interface_id=3)
+    writer.record('POST', '/missing')
+    writer.flush()
+    assert [row[0] for row in _logs(database)[-2:]] == [3, UNKNOWN_INTERFACE_ID]
+
+
+def test_truncation_and_secrets(writer, database):
+    """请求头去掉令牌后截断，响应内容按字节数截断，大响应只保留前几行"""
+    writer.record('GET', '/known', None, {'X-Profile-Token': 'secret', 'Accept': 'a' * 100}, 200,
+                  {'code': 0, 'data': list(range(PREVIEW_ROWS * 3))})
+    writer.record('GET', '/known', None, None, 200, '中' * 20)
+    writer.record('GET', '/known', None, None, 200, b'x' * 100)
+    writer.flush()
+    (first, text, raw) = _logs(database)
+    assert 'secret' not in first[4] and first[4].endswith('...')
+    assert len(first[4].encode('utf-8')) <= 43
+    assert text[6] == '中' * 10 + '...'
+    assert raw[6] == 'x' * 30 + '...'
+    # 行数较多的响应在入队时只保留前 PREVIEW_ROWS 行
+    queued_body = {'code': 0, 'data': list(range(PREVIEW_ROWS * 3))}
+    writer.record('GET', '/known', body=queued_body)
+    assert writer._queue[-1][6]['data'] == list(range(PREVIEW_ROWS))
+
+
+def test_backpressure_and_sampling(database):
+    writer = RequestLogWriter(database, flush_interval=3600, queue_size=2, sample_rate=0)
+    try:
+        assert not writer.record('GET', '/a')
+        assert writer.stats()['sampled_out'] == 1
+        writer.sample_rate = 1.0
+        assert writer.record('GET', '/a') and writer.record('GET', '/a')
+        # 队列已满时丢弃，不阻塞请求
+        assert not writer.record('GET', '/a')
+        assert writer.stats()['dropped'] == 1 and writer.stats()['queued'] == 2
+    finally:
+        writer.close()
+    assert len(_logs(database)) == 2
+
+
+def test_failed_write_is_counted(tmp_path):
+    """数据库写入失败时丢弃这一批并计数，不影响之后的写入"""
+    writer = RequestLogWriter(str(tmp_path / 'missing' / 'x.db'), flush_interval=3600)
+    try:
+        writer.record('GET', '/a')
+        assert writer.flush() == 0 and writer.stats()['failed'] == 1
+    finally:
+        writer.close()
+
+
+def test_close_flushes_background_thread(database):
+    writer = RequestLogWriter(database, flush_interval=0.01)
+    writer.record('GET', '/a')
+    writer.close()
+    assert not writer._thread.is_alive() and len(_logs(database)) == 1
+
+
+def test_mock_requests_are_logged(app_module, client, create_interface):
+    """HTTP的Mock请求写入request_logs，记录接口id和执行耗时"""
+    if app_module.request_logger is None:
+        pytest.skip('请求日志未开启')
+    interface_id = create_interface('/logs/users', fields=FIELDS)
+    client.get('/dynamic/logs/users', query_string={'mock_count': 2})
+    app_module.request_logger.flush()
+    with closing(db_pool.connect(app_module.DATABASE)) as conn:
+        row = conn.execute('''
+            SELECT interface_id, method, response_status, response_body, execution_time FROM request_logs
+            WHERE path = '/logs/users'
+        ''').fetchone()
+    assert row[:3] == (interface_id, 'GET', 200) and row[4] >= 0
+    assert json.loads(row[3])['code'] == 0
+    stats = client.get('/request-logs/stats').get_json()
+    assert stats['enabled'] and stats['written'] >= 1
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按需单请求性能分析的测试（不需要启动服务，分析结果保存在临时目录）
+"""
+
+import marshal
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from request_profiler import (FORMAT_COLLAPSED, FORMAT_PSTATS, FORMAT_TEXT, MODE_CPROFILE, MODE_SAMPLE,
+                              ProfileStore, RequestProfiler, collapsed_from_pstats)
+
+FIELDS = [('id', 'int'), ('name', 'string')]
+
+
+def _busy(seconds=0.03):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return RequestProfiler(ProfileStore(str(tmp_path / 'profiles')), admin_token='secret', sample_interval=0.001)
+
+
+def test_authorization():
+    """配置了令牌时必须提供相同的令牌；未配置令牌时由enabled决定"""
+    store = ProfileStore('unused')
+    with_token = RequestProfiler(store, enabled=True, admin_token='secret')
+    assert with_token.authorized('secret') and not with_token.authorized('other') and not with_token.authorized(None)
+    assert RequestProfiler(store, enabled=True).authorized(None) and not RequestProfiler(store).authorized(None)
+    assert with_token.requested_mode('1', 'secret') == MODE_CPROFILE
+    assert with_token.requested_mode('sample', 'secret') == MODE_SAMPLE
+    assert with_token.requested_mode('off', 'secret') is None and with_token.requested_mode('', 'secret') is None
+    assert with_token.requested_mode('1', 'other') is None
+
+
+def test_collapsed_from_pstats():
+    """函数在各调用路径上的耗时按调用边的累计耗时分配"""
+    root, a, b, leaf = ('app.py', 1, 'root'), ('app.py', 5, 'a'), ('app.py', 9, 'b'), ('~', 0, '<built-in len>')
+    stats = {
+        root: (1, 1, 0.001, 0.004, {}),
+        a: (1, 1, 0.001, 0.002, {root: (1, 1, 0.001, 0.002)}),
+        b: (1, 1, 0.0, 0.001, {root: (1, 1, 0.0, 0.001)}),
+        leaf: (2, 2, 0.002, 0.002, {a: (1, 1, 0.001, 0.001), b: (1, 1, 0.001, 0.001)})
+    }
+    lines = dict(line.rsplit(' ', 1) for line in collapsed_from_pstats(stats).splitlines())
+    assert lines == {
+        'root (app.py:1)': '1000',
+        'root (app.py:1);a (app.py:5)': '1000',
+        'root (app.py:1);a (app.py:5);<built-in len>': '1000',
+        'root (app.py:1);b (app.py:9);<built-in len>': '1000'
+    }
+
+
+def test_cprofile_capture(profiler):
+    """cProfile分析保存为pstats，可输出三种格式"""
+    result, capture_id = profiler.call(MODE_CPROFILE, 'GET /busy', _busy)
+    assert result > 0
+    meta = profiler.store.get(capture_id)
+    assert meta['mode'] == MODE_CPROFILE and meta['target'] == 'GET /busy' and meta['duration_ms'] >= 30
+    raw, _ = profiler.store.render(capture_id, FORMAT_PSTATS)
+    assert any(func[2] == '_busy' for func in marshal.loads(raw))
+    assert '_busy' in profiler.store.render(capture_id, FORMAT_COLLAPSED)[0]
+    assert 'cumulative' in profiler.store.render(capture_id, FORMAT_TEXT)[0]
+    assert profiler.call(None, 'GET /busy', len, 'ab') == (2, None)
+
+
+def test_sample_capture(profiler):
+    _, capture_id = profiler.call(MODE_SAMPLE, 'GET /busy', _busy, 0.1)
+    text, content_type = profiler.store.render(capture_id, FORMAT_COLLAPSED)
+    assert content_type.startswith('text/plain') and '_busy' in text
+    # 采样分析只有折叠栈格式
+    with pytest.raises(ValueError):
+        profiler.store.render(capture_id, FORMAT_PSTATS)
+
+
+def test_failed_call_keeps_profile(profiler):
+    def fail():
+        raise KeyError('x')
+
+    with pytest.raises(KeyError) as info:
+        profiler.call(MODE_CPROFILE, 'GET /fail', fail)
+    assert profiler.store.get(info.value.profile_id)['target'] == 'GET /fail'
+
+
+def test_store_is_bounded(tmp_path):
+    """超过记录数或总大小上限时删除最早的记录；非法id不会读取目录外的文件"""
+    store = ProfileStore(str(tmp_path), max_captures=3)
+    ids = [store.save(MODE_SAMPLE, f'GET /{i}', 1, f'a;b {i}\n') for i in range(5)]
+    assert [item['id'] for item in store.list()] == ids[:1:-1]
+    assert store.list(limit=1)[0]['id'] == ids[-1]
+
+    size = store.list()[0]['bytes']
+    store.max_bytes = size * 2
+    store.save(MODE_SAMPLE, 'GET /x', 1, 'a;b 0\n')
+    assert len(store.list()) == 2
+    assert store.get('../' + ids[-1]) is None and store.render('missing', FORMAT_COLLAPSED) is None
+
+
+def test_profile_routes(app_module, client, create_interface, monkeypatch):
+    """X-Profile请求头经令牌授权后分析该请求，响应头返回记录id，按id下载分析结果"""
+    monkeypatch.setattr(app_module.request_profiler, 'admin_token', 'secret')
+    create_interface('/profile/users', fields=FIELDS)
+    response = client.get('/dynamic/profile/users', headers={'X-Profile': '1'})
+    assert response.status_code == 200 and 'X-Profile-Id' not in response.headers
+
+    headers = {'X-Profile': 'cprofile', 'X-Profile-Token': 'secret'}
+    capture_id = client.get('/dynamic/profile/users', headers=headers).headers['X-Profile-Id']
+    assert client.get('/profiles').status_code == 403
+    items = client.get('/profiles', headers={'X-Profile-Token': 'secret'}).get_json()['data']
+    assert items[0]['id'] == capture_id and items[0]['target'] == 'GET /dynamic/profile/users'
+    response = client.get(f'/profiles/{capture_id}', query_string={'token': 'secret', 'format': FORMAT_PSTATS})
+    assert response.status_code == 200 and capture_id in response.headers['Content-Disposition']
+    response = client.get(f'/profiles/{capture_id}', query_string={'token': 'secret', 'format': 'svg'})
+    assert response.status_code == 400
+    assert client.get('/profiles/20240101000000-00000000', query_string={'token': 'secret'}).status_code == 404
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求日志汇总和耗时分位数查询的测试（不需要启动服务，使用临时数据库）
+"""
+
+import os
+import random
+import sys
+from contextlib import closing
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import db_pool
+from request_rollup import (RESOLUTION_DAY, RESOLUTION_HOUR, RESOLUTION_MINUTE, RequestLogRollup, bucket_index,
+                            bucket_value, parse_time, percentiles_from_histogram, split_range)
+
+# 整天开始的时间戳，汇总按UTC对齐
+DAY = 1700006400 - 1700006400 % RESOLUTION_DAY
+
+
+def _insert_logs(database, logs):
+    """logs为 [(接口id, 状态码, 耗时ms, 时间戳)]"""
+    with closing(db_pool.connect(database)) as conn, conn:
+        conn.executemany('''
+            INSERT INTO request_logs (interface_id, method, path, response_status, execution_time, request_time)
+            VALUES (?, 'GET', '/a', ?, ?, ?)
+        ''', [(interface_id, status, ms, datetime.fromtimestamp(timestamp).isoformat())
+              for interface_id, status, ms, timestamp in logs])
+
+
+def _count(database, table):
+    with closing(db_pool.connect(database)) as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def test_histogram_buckets():
+    """对数-线性分桶：桶序号随耗时单调递增，代表值的相对误差在精度范围内"""
+    previous = -1
+    for ms in [0, 0.001, 0.031, 0.032, 0.5, 1, 7.7, 100, 2500, 60000]:
+        index = bucket_index(ms)
+        assert index >= previous
+        previous = index
+        if ms >= 0.032:
+            assert abs(bucket_value(index) - ms) / ms <= 1 / 16
+    assert bucket_index(-1) == 0
+
+
+def test_percentiles_from_histogram():
+    values = [i / 10 for i in range(1, 1001)]
+    histogram = {}
+    for value in values:
+        key = str(bucket_index(value))
+        histogram[key] = histogram.get(key, 0) + 1
+    result = percentiles_from_histogram(histogram, (50, 99))
+    assert result[50] == pytest.approx(50, rel=1 / 16) and result[99] == pytest.approx(99, rel=1 / 16)
+    assert percentiles_from_histogram({}, (50,)) == {50: None}
+
+
+def test_split_range():
+    """整天、整小时的部分使用粗粒度的汇总，首尾零散的部分使用分钟汇总"""
+    start, end = DAY - 120, DAY + 2 * RESOLUTION_DAY + RESOLUTION_HOUR + 180
+    ranges = split_range(start, end)
+    assert ranges == [
+        (RESOLUTION_MINUTE, DAY - 120, DAY),
+        (RESOLUTION_DAY, DAY, DAY + 2 * RESOLUTION_DAY),
+        (RESOLUTION_HOUR, DAY + 2 * RESOLUTION_DAY, DAY + 2 * RESOLUTION_DAY + RESOLUTION_HOUR),
+        (RESOLUTION_MINUTE, DAY + 2 * RESOLUTION_DAY + RESOLUTION_HOUR, end)
+    ]
+    assert split_range(DAY, DAY + 60) == [(RESOLUTION_MINUTE, DAY, DAY + 60)]
+
+
+def test_parse_time():
+    assert parse_time('1700000000') == 1700000000
+    assert parse_time('2024-01-02T03:04:05') == datetime(2024, 1, 2, 3, 4, 5).timestamp()
+    assert parse_time('bad', 5) == 5 and parse_time(None, 6) == 6
+
+
+def test_rollup_and_query(database):
+    """汇总后按任意时间范围查询，结果与直接统计原始记录一致；汇总是增量的"""
+    rng = random.Random(5)
+    logs = [(1 + i % 2, 500 if i % 7 == 0 else 200, rng.uniform(1, 100), DAY + rng.randrange(3 * RESOLUTION_DAY))
+            for i in range(3000)]
+    _insert_logs(database, logs[:2000])
+    rollup = RequestLogRollup(database, chunk_rows=700, raw_retention_hours=10 ** 6)
+    assert rollup.run_once(now=DAY) == 2000
+    _insert_logs(database, logs[2000:])
+    assert rollup.run_once(now=DAY) == 1000
+    assert rollup.run_once(now=DAY) == 0
+
+    start, end = DAY + 3600 + 150, DAY + 2 * RESOLUTION_DAY + 7000
+    result = {item['interface_id']: item for item in rollup.query(start, end)}
+    # 查询范围向外对齐到整分钟
+    aligned_start, aligned_end = start - start % 60, end - end % 60 + 60
+    for interface_id in (1, 2):
+        expected = sorted(ms for iface, _, ms, timestamp in logs
+                          if iface == interface_id and aligned_start <= timestamp < aligned_end)
+        item = result[interface_id]
+        assert item['count'] == len(expected)
+        assert item['max_ms'] == pytest.approx(max(expected), abs=0.001)
+        assert item['avg_ms'] == pytest.approx(sum(expected) / len(expected), abs=0.01)
+        assert item['p50_ms'] == pytest.approx(expected[len(expected) // 2], rel=0.1)
+        assert item['p99_ms'] == pytest.approx(expected[int(len(expected) * 0.99)], rel=0.1)
+        assert item['throughput_rps'] == pytest.approx(len(expected) / (aligned_end - aligned_start), rel=1e-3)
+        assert sum(item['status_counts'].values()) == len(expected) and '500' in item['status_counts']
+    assert [item['interface_id'] for item in rollup.query(start, end, interface_id=2)] == [2]
+    assert rollup.query(end, start) == []
+    # end在整分钟上时也包含end所在的分钟
+    minute = logs[0][3] - logs[0][3] % 60
+    expected = sum(1 for iface, _, _, timestamp in logs if iface == logs[0][0] and minute <= timestamp < minute + 60)
+    assert rollup.query(minute, minute, interface_id=logs[0][0])[0]['count'] == expected
+
+
+def test_prune(database):
+    """只删除已汇总且超过保留时长的原始记录，以及超过保留天数的汇总"""
+    _insert_logs(database, [(1, 200, 5, DAY), (1, 200, 5, DAY + 10 * 3600)])
+    rollup = RequestLogRollup(database, raw_retention_hours=5, rollup_retention_days=1)
+    rollup.run_once(now=DAY + 12 * 3600)
+    assert _count(database, 'request_logs') == 1
+    # 未汇总的记录不删除
+    _insert_logs(database, [(1, 200, 5, DAY)])
+    with closing(db_pool.connect(database)) as conn:
+        rollup._prune(conn, DAY + 12 * 3600)
+    assert _count(database, 'request_logs') == 2
+    rollup.run_once(now=DAY + 3 * RESOLUTION_DAY)
+    assert _count(database, 'request_logs') == 0 and _count(database, 'request_log_rollups') == 0
+
+
+def test_latency_route(app_module, client, create_interface):
+    if app_module.request_logger is None:
+        pytest.skip('请求日志未开启')
+    interface_id = create_interface('/rollup/users', fields=[('id', 'int')])
+    for _ in range(3):
+        client.get('/dynamic/rollup/users')
+    response = client.get('/request-logs/latency', query_string={'refresh': 1, 'interface_id': interface_id})
+    items = response.get_json()['interfaces']
+    assert len(items) == 1 and items[0]['count'] == 3 and items[0]['p50_ms'] is not None
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+动态接口路由表和路径模板前缀树的测试（不需要启动服务）
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from route_table import PathRouter, RouteEntry, RouteTable, compile_path, SEGMENT_PARAM, SEGMENT_WILDCARD
+
+
+def _entry(interface_id, path, method='GET'):
+    return RouteEntry(interface_id, f'接口{interface_id}', path, method, 1)
+
+
+def _table(*entries):
+    """不访问数据库，直接向路由表添加接口"""
+    table = RouteTable(':memory:')
+    for entry in entries:
+        table._add(entry)
+    return table
+
+
+def _matched(table, path, method='GET'):
+    entry, params = table.match(method, path)
+    return (entry.interface_id, params) if entry is not None else None
+
+
+def test_compile_path():
+    """{id}、:id 为参数，最后一段的 *、**、{path*}、*path 为通配符，中间的 ** 按参数处理"""
+    assert compile_path('/users/{id}') == ([(0, 'users'), (SEGMENT_PARAM, 'id')], True)
+    assert compile_path('/users/:id/') == ([(0, 'users'), (SEGMENT_PARAM, 'id')], True)
+    assert compile_path('/files/{path*}')[0][-1] == (SEGMENT_WILDCARD, 'path')
+    assert compile_path('/files/*rest')[0][-1] == (SEGMENT_WILDCARD, 'rest')
+    assert compile_path('/a/**/b')[0][1] == (SEGMENT_PARAM, 'wildcard')
+    assert compile_path('/users/list') == ([(0, 'users'), (0, 'list')], False)
+
+
+def test_static_param_wildcard_priority():
+    """同一层的匹配优先级：静态片段 > 参数片段 > 通配符"""
+    table = _table(_entry(3, '/users/**'), _entry(2, '/users/{id}'), _entry(1, '/users/me'))
+    assert _matched(table, '/users/me') == (1, {})
+    assert _matched(table, '/users/42') == (2, {'id': '42'})
+    assert _matched(table, '/users/42/orders') == (3, {'wildcard': '42/orders'})
+    # 方法不同不匹配
+    assert _matched(table, '/users/42', 'POST') is None
+
+
+def test_backtracking():
+    """静态分支在更深的层级匹配失败时回溯到参数分支"""
+    table = _table(_entry(1, '/shops/local/items'), _entry(2, '/shops/{shop}/orders/{order}'))
+    assert _matched(table, '/shops/local/items') == (1, {})
+    assert _matched(table, '/shops/local/orders/7') == (2, {'shop': 'local', 'order': '7'})
+    assert _matched(table, '/shops/local/unknown') is None
+
+
+def test_wildcards():
+    """** 和 {x*} 匹配剩余的全部片段，也匹配空的剩余路径"""
+    table = _table(_entry(1, '/static/{path*}'), _entry(2, '/proxy/**'), _entry(3, '/api/:version/*rest'))
+    assert _matched(table, '/static/css/site/main.css') == (1, {'path': 'css/site/main.css'})
+    assert _matched(table, '/static') == (1, {'path': ''})
+    assert _matched(table, '/proxy/a/b') == (2, {'wildcard': 'a/b'})
+    assert _matched(table, '/api/v2/users/1') == (3, {'version': 'v2', 'rest': 'users/1'})
+    assert _matched(table, '/other/a') is None
+
+
+def test_lowest_interface_id_wins():
+    """同一模板被多个接口定义时总是命中id最小的接口，与添加顺序无关"""
+    for order in ([5, 3, 9], [9, 5, 3]):
+        table = _table(*[_entry(i, '/orders/{id}') for i in order])
+        assert _matched(table, '/orders/1')[0] == 3
+        table._remove(3)
+        assert _matched(table, '/orders/1')[0] == 5
+
+    router = PathRouter()
+    for i in (7, 4):
+        router.add(_entry(i, '/x/{a}/{b}'))
+    # 参数名不同但结构相同的模板共享节点
+    router.add(_entry(6, '/x/{c}/{d}'))
+    assert router.match('GET', ['x', '1', '2'])[0].interface_id == 4
+
+
+def test_remove_prunes_empty_nodes():
+    """反复添加、删除模板后前缀树恢复原来的大小，其他接口不受影响"""
+    router = PathRouter()
+    keep = _entry(1, '/users/{id}')
+    router.add(keep)
+    baseline = router.node_count()
+    for cycle in range(50):
+        entries = [_entry(100 + cycle * 10 + i, f'/tmp{cycle}/{{id}}/items/{i}/**') for i in range(5)]
+        entries.append(_entry(100 + cycle * 10 + 9, '/users/{id}/extra/{x}', 'POST'))
+        for entry in entries:
+            router.add(entry)
+        assert router.node_count() > baseline
+        for entry in entries:
+            router.remove(entry)
+        assert router.node_count() == baseline
+    assert router.match('GET', ['users', '1'])[0] is keep
+    assert router.match('POST', ['users', '1', 'extra', '2']) == (None, None)
+
+    # 删除最后一个接口后整棵树为空；删除不存在的接口不报错
+    router.remove(keep)
+    router.remove(keep)
+    assert router.node_count() == 0
+    assert router.match('GET', ['users', '1']) == (None, None)
+
+
+def test_remove_keeps_shared_prefix():
+    """只删除空节点，仍有接口的公共前缀保留"""
+    router = PathRouter()
+    a, b = _entry(1, '/a/{x}/b'), _entry(2, '/a/{x}/b/c/**')
+    router.add(a)
+    router.add(b)
+    router.remove(b)
+    assert router.match('GET', ['a', '1', 'b'])[0] is a
+    assert router.match('GET', ['a', '1', 'b', 'c', 'd']) == (None, None)
+    router.add(b)
+    router.remove(a)
+    assert router.match('GET', ['a', '1', 'b', 'c', 'd'])[0] is b
+    assert router.match('GET', ['a', '1', 'b']) == (None, None)
+
+
+
+def test_load_and_reload(database):
+    """启动时全量加载；上传、修改Mock配置、删除文件后增量更新"""
+    import db_pool
+    from conftest import insert_file, insert_interface
+
+    conn = db_pool.connect(database)
+    with conn:
+        file_id = insert_file(conn)
+        first = insert_interface(conn, file_id, '/api/users', fields=[('id', 'int'), ('name', 'string')])
+        template = insert_interface(conn, file_id, '/api/users/{id}', default_count=3, seed=7)
+        disabled = insert_interface(conn, file_id, '/api/orders', 'POST', enabled=0)
+    conn.close()
+
+    table = RouteTable(database)
+    assert table.load() == 3 and len(table) == 3
+    entry = table.lookup('GET', '/api/users/')
+    assert entry.interface_id == first and entry.response_fields == [('id', 'int'), ('name', 'string')]
+    entry, params = table.match('GET', '/api/users/5')
+    assert (entry.interface_id, params, entry.default_count, entry.seed) == (template, {'id': '5'}, 3, 7)
+    assert table.lookup('POST', '/api/orders').mock_enabled is False
+
+    # 修改Mock配置时版本号递增（响应缓存随之失效）
+    version = table.get(first).version
+    table.update_mock_config(first, True, 20, seed=1)
+    assert table.get(first).default_count == 20 and table.get(first).version > version
+
+    # 同一文件重新解析：旧接口移除，新接口加入
+    conn = db_pool.connect(database)
+    with conn:
+        conn.execute('DELETE FROM interfaces WHERE id = ?', (disabled,))
+        added = insert_interface(conn, file_id, '/api/items/:id')
+    conn.close()
+    assert table.reload_file(file_id) == 3
+    assert table.lookup('POST', '/api/orders') is None
+    assert table.match('GET', '/api/items/9') == (table.get(added), {'id': '9'})
+
+    # 删除文件（写入墓碑）后接口立即从路由表移除，重新加载时也不再出现
+    table.remove_file(file_id)
+    assert len(table) == 0 and table.lookup('GET', '/api/users/1') is None
+    conn = db_pool.connect(database)
+    with conn:
+        conn.execute("UPDATE interface_files SET deleted_at = '2024-01-02' WHERE id = ?", (file_id,))
+    conn.close()
+    assert table.load() == 0